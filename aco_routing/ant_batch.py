@@ -0,0 +1,256 @@
+from typing import Optional
+
+import numpy as np
+
+from compiled_graph import CompiledGraph
+from wave_config import WaveConfig
+
+
+class RandomAntBatch:
+    """
+    All random ants of one iteration, stepped together with array operations instead of one RandomAnt per ant.
+    Positions and paths of all ants are kept as arrays, the ant with index i is row i. The visited nodes of an ant
+    are looked up in its path row: this needs no memory per node of the graph, but a comparison with every step of
+    the path, so a step costs O(degree * path length) per ant instead of O(degree).
+    """
+
+    graph: CompiledGraph        # the graph, on which the ants are walking
+
+    start_nodes: np.ndarray     # id of the start node of every ant
+    positions: np.ndarray       # id of the current node of every ant
+    paths: np.ndarray           # node ids of the path of every ant, padded with -1
+    path_edges: np.ndarray      # edge ids of the path of every ant, -1 for a step without an edge
+    path_lengths: np.ndarray    # number of nodes in the path of every ant
+    success: np.ndarray         # if the ant has reached a node with a value > 0
+    alive: np.ndarray           # if the ant is still stepping
+
+    def __init__(self, graph: CompiledGraph, wave: WaveConfig, spawn_nodes: np.ndarray | list[int],
+                 rng: Optional[np.random.Generator] = None):
+        """
+        :param graph: the graph
+        :param wave: a wave object
+        :param spawn_nodes: start node id for every ant
+        :param rng: random number stream of the batch
+        """
+
+        self.graph = graph
+        self.alpha = wave.alpha
+        self.beta = wave.beta
+        self.max_steps = wave.ant_max_steps
+        self.random_chance = wave.random_chance
+        self.stop_on_success = wave.stop_on_success
+        self.put_pheromones_always = wave.put_pheromones_always
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.transitions = graph.transitions(self.alpha, self.beta)
+
+        count = len(spawn_nodes)
+        self.start_nodes = np.asarray(spawn_nodes, dtype=np.int64)
+        self.positions = self.start_nodes.copy()
+        self.paths = np.full((count, self.max_steps + 1), -1, dtype=np.int64)
+        self.paths[:, 0] = self.start_nodes
+        self.path_edges = np.full((count, self.max_steps), -1, dtype=np.int64)
+        self.path_lengths = np.ones(count, dtype=np.int64)
+        self.success = np.zeros(count, dtype=bool)
+        self.alive = np.ones(count, dtype=bool)
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self.alive))
+
+    def path(self, ant: int) -> np.ndarray:
+        """
+        :param ant: index of the ant
+        :return: node ids of the path of the ant
+        """
+        return self.paths[ant, :self.path_lengths[ant]]
+
+    def path_costs(self, ants: np.ndarray) -> np.ndarray:
+        """
+        :param ants: indices of the ants
+        :return: sum of the weights along the path of every ant
+        """
+        path_edges = self.path_edges[ants]
+        return np.where(path_edges >= 0, self.graph.weight[path_edges], 0.0).sum(axis=1)
+
+    def _on_paths(self, ants: np.ndarray, nodes: np.ndarray) -> np.ndarray:
+        """
+        Checks, which nodes are on the paths of the ants so far
+
+        :param ants: indices of the ants
+        :param nodes: node ids, one row per ant
+        :return: True for every node on the path of the ant of its row
+        """
+        # the paths are padded with -1 and only compared up to the longest one
+        longest = int(self.path_lengths[ants].max(initial=0))
+        paths = self.paths[ants, :longest]
+        return (nodes[:, :, None] == paths[:, None, :]).any(axis=2)
+
+    def _edge_values(self, edges: np.ndarray) -> np.ndarray:
+        """
+        looks up the value for edges based on pheromones and weight, like RandomAnt._value_for_edge()
+
+        :param edges: edge ids, padded with -1 like CompiledGraph.padded_edges()
+        :return: the values, 0 for padding
+        """
+        self.transitions.update_rows(self.graph.sources[edges[edges >= 0]])
+        return np.where(edges >= 0, self.transitions.values[edges], 0.0)
+
+    def _edge_weights(self, edges: np.ndarray, valid: np.ndarray, unvisited: np.ndarray) -> np.ndarray:
+        """
+        Calculates the selection weights for the outgoing edges of the stepping ants.
+        Rows without a positive weight fall back to a random pick of all edges.
+
+        :param edges: outgoing edge ids, one row per stepping ant, padded with -1
+        :param valid: True for every existing edge in edges
+        :param unvisited: True for every edge leading to a node, which is not on the path of the ant
+        :return: selection weights of the same shape as edges
+        """
+        return valid.astype(np.float64)
+
+    def _sample(self, weights: np.ndarray) -> np.ndarray:
+        """
+        picks one column per row with a probability proportional to the weights in one draw for all rows
+
+        :param weights: non-negative weights, every row has a positive sum
+        :return: column index for every row
+        """
+        cumulative = np.cumsum(weights, axis=1)
+        draws = self.rng.random(len(weights)) * cumulative[:, -1]
+        return np.count_nonzero(cumulative <= draws[:, None], axis=1)
+
+    def _increase_pheromone_on_success(self, ants: np.ndarray):
+        """
+        Called for ants, which reached a success node, if pheromones are not put always.
+        The random ant tries to mark the edge from the success node to itself, which does not exist.
+
+        :param ants: indices of the ants
+        """
+        pass
+
+    def step(self) -> np.ndarray:
+        """
+        Does a step for every alive ant
+
+        :return: indices of the ants, which stopped stepping and died in this step
+        """
+
+        ants = np.flatnonzero(self.alive)
+
+        # ants back at the start node after a success do not step anymore
+        returned = self.success[ants] & (self.positions[ants] == self.start_nodes[ants])
+        died = [ants[returned]]
+        ants = ants[~returned]
+
+        if len(ants) > 0:
+            # gather the outgoing edges of all stepping ants
+            edges = self.graph.padded_edges(self.positions[ants])
+            valid = edges >= 0
+            heads = np.where(valid, self.graph.indices[edges], 0)
+            unvisited = valid & ~self._on_paths(ants, heads)
+
+            # pick a new node, trapped ants stay at their node
+            trapped = ~valid.any(axis=1)
+            new_edges = np.full(len(ants), -1, dtype=np.int64)
+            new_nodes = self.positions[ants].copy()
+            if not trapped.all():
+                stepping = ~trapped
+                weights = self._edge_weights(edges[stepping], valid[stepping], unvisited[stepping])
+                columns = self._sample(weights)
+                new_edges[stepping] = edges[stepping][np.arange(len(columns)), columns]
+                new_nodes[stepping] = self.graph.indices[new_edges[stepping]]
+
+            if self.put_pheromones_always:
+                self.graph.deposit_many(new_edges[new_edges >= 0], 1)
+
+            # step to that node
+            self.path_edges[ants, self.path_lengths[ants] - 1] = new_edges
+            self.paths[ants, self.path_lengths[ants]] = new_nodes
+            self.path_lengths[ants] += 1
+            self.positions[ants] = new_nodes
+
+            # check, if it is a success node
+            successful = self.graph.value[new_nodes] > 0
+            self.success[ants[successful]] = True
+            if not self.put_pheromones_always:
+                self._increase_pheromone_on_success(ants[successful])
+                if self.stop_on_success:
+                    died.append(ants[successful])
+
+        died = np.concatenate(died)
+        self.alive[died] = False
+        return died
+
+    def retire(self, ants: np.ndarray):
+        """
+        stops ants, e.g. after the maximum number of steps
+
+        :param ants: indices of the ants
+        """
+        self.alive[ants] = False
+
+
+class RoutingAntBatch(RandomAntBatch):
+    """
+    All routing ants of one iteration, see RoutingAnt
+    """
+
+    def _edge_weights(self, edges: np.ndarray, valid: np.ndarray, unvisited: np.ndarray) -> np.ndarray:
+        # pheromone sensitive behaviour on unvisited nodes
+        weights = np.where(unvisited, self._edge_values(edges), 0.0)
+
+        # random by chance or if there are no pheromones on its way
+        by_chance = self.rng.random(len(edges)) < self.random_chance
+        fallback = by_chance | ~(weights.sum(axis=1) > 0)
+        weights[fallback] = valid[fallback]
+        return weights
+
+    def _increase_pheromone_on_success(self, ants: np.ndarray):
+        """
+        Increases pheromones on the walked paths of successful ants.
+        Absolute pheromones (double of maximum steps) are distributed to the edges to promote shorter paths
+
+        :param ants: indices of the ants
+        """
+        if len(ants) == 0:
+            return
+        path_edges = self.path_edges[ants]
+        pheromones_to_put = self.max_steps / 2 / self.path_lengths[ants]
+        on_path = path_edges >= 0
+        self.graph.deposit_many(path_edges[on_path],
+                                np.broadcast_to(pheromones_to_put[:, None], path_edges.shape)[on_path])
+
+
+class MinorityAntBatch(RoutingAntBatch):
+    """
+    All minority ants of one iteration, see MinorityAnt
+    """
+
+    def __init__(self, graph: CompiledGraph, wave: WaveConfig, spawn_nodes: np.ndarray | list[int],
+                 rng: Optional[np.random.Generator] = None):
+        super().__init__(graph, wave, spawn_nodes, rng)
+
+        self.prioritize_pheromone_routes = wave.prioritize_pheromone_routes
+
+    def _edge_weights(self, edges: np.ndarray, valid: np.ndarray, unvisited: np.ndarray) -> np.ndarray:
+        edge_values = np.where(unvisited, self._edge_values(edges), 0.0)
+
+        # filter possible nodes for pheromones
+        candidates = unvisited
+        if self.prioritize_pheromone_routes:
+            candidates = unvisited & (edge_values >= 0.01)
+            edge_values = np.where(candidates, edge_values, 0.0)
+
+        sum_edge_values = edge_values.sum(axis=1)
+        pheromoned = sum_edge_values > 0
+        safe_sums = np.where(pheromoned, sum_edge_values, 1.0)
+        weights = np.where(candidates, 1 - edge_values / safe_sums[:, None], 0.0)
+
+        # the first candidate, if all probabilities are 0 (e.g. only one candidate)
+        no_probabilities = pheromoned & ~(weights.sum(axis=1) > 0)
+        first_candidate = np.argmax(candidates, axis=1)
+        weights[no_probabilities, first_candidate[no_probabilities]] = 1.0
+
+        # random by chance or if there are no pheromones on its way
+        by_chance = self.rng.random(len(edges)) < self.random_chance
+        fallback = by_chance | ~pheromoned
+        weights[fallback] = valid[fallback]
+        return weights
@@ -1,65 +1,204 @@
-import random
+from __future__ import annotations
+
 import threading
 import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, Callable, Optional
 
 import networkx as nx
+import numpy as np
 
-import minority_ant
+import ant_batch
+import ant_registry
+import jit_kernels
 import random_ant
-import routing_ant
+from compiled_graph import CompiledGraph
 from graph_tools import GraphTools
+from metrics import IterationMetrics, MetricsSink
+from snapshot import ColonySnapshot
+from storage import ArrayStorage
 from wave_config import WaveConfig
 
+if TYPE_CHECKING:
+    # only for the annotations, both modules import this one
+    from checkpoint import AutoCheckpoint
+    from plot import Plot
+
 
 class AntColonyRunner:
     """
     Driver fot the ant colony. Runs itself in a separate thread
     """
 
-    G: nx.DiGraph                           # the graph
+    G: nx.DiGraph[Any]                      # the graph
+    graph: CompiledGraph                    # array representation of the graph, holds the current pheromones
+    graph_changed: bool = False             # if G was changed and the arrays have to be rebuilt
+    graph_lock: threading.RLock             # held while G is read or changed, e.g. by the plot
 
     ants: list[random_ant.RandomAnt] = []  # list of currently stepping (alive) ants
+    # all ants of the current iteration, if the wave is vectorized
+    batch: Optional[ant_batch.RandomAntBatch] = None
+    wave_index: int = 0                     # number of the current wave
     iteration: int = 0                      # number of the current iteration
+    step: int = 0                           # number of finished steps of the current iteration
+    stage: str = 'wave'                     # next work of the run, see _run(): wave, iteration, step or finished
+    # stage, wave, iteration and step to continue at, see checkpoint.py
+    resume_position: Optional[dict[str, Any]] = None
     waves: list[WaveConfig] = []            # config for the current wave
 
-    thread: threading.Thread                # thread object
+    thread: Optional[threading.Thread]      # thread object, None before the first start
     stop_event: threading.Event             # stop event
-
-    visited_nodes: dict = {}                # counts visits on the nodes
-
-    def __init__(self, plot, log_callback):
+    wake_event: threading.Event             # interrupts the sleeps, when stopping or switching to full speed
+
+    seed: Optional[int | list[int]] = None  # seed of the run, fresh entropy for every run if None
+    seed_sequence: np.random.SeedSequence   # root of the random number streams of the current run
+
+    snapshot: Optional[ColonySnapshot]      # latest published state for the plot, None without a plot
+    snapshot_interval: float = 0.05         # seconds between two published snapshots while running
+    snapshot_history: deque[ColonySnapshot]  # the latest published snapshots for a replay, empty by default
+
+    storage: ArrayStorage                   # holds the pheromones, weights and the visit counts, e.g. in files
+    visit_counts: np.ndarray                # visits on every node id of the graph, see also visited_nodes
+    edge_visits: np.ndarray                 # traversals of every edge id of the graph
+    wave_visit_counts: np.ndarray           # visits on every node id in the current wave
+    wave_edge_visits: np.ndarray            # traversals of every edge id in the current wave
+    removed_node_visits: dict[Any, int] = {}  # visits on nodes, which were removed from the graph
+    convergence: list[dict[str, Any]] = []  # metrics record after each iteration, see metrics.IterationMetrics
+    metrics_sinks: list[MetricsSink] = []   # receive the metrics record after each iteration
+    iteration_metrics: IterationMetrics     # collects the finished ants of the current iteration
+    # (cost, node ids) of the cheapest successful path of the iteration
+    iteration_best: Optional[tuple[float, list[int]]] = None
+    # (cost, node names) of the cheapest successful path of the wave
+    best_so_far: Optional[tuple[float, list[Any]]] = None
+    stagnant_iterations: int = 0            # iterations since best_so_far improved, see WaveConfig.restart_after
+    # saves checkpoints after iterations, see checkpoint.AutoCheckpoint
+    checkpointer: Optional[AutoCheckpoint] = None
+
+    def __init__(self, G: nx.DiGraph[Any], ants_config: list[dict[str, Any]], log_callback: Callable[[str], Any],
+                 pos: Optional[dict[Any, Any]] = None, plot: Optional[Plot] = None, ignore_sleep: bool = False,
+                 seed: Optional[int | list[int]] = None, metrics_sinks: Optional[list[MetricsSink]] = None,
+                 graph: Optional[CompiledGraph] = None, checkpointer: Optional[AutoCheckpoint] = None,
+                 storage: Optional[ArrayStorage] = None):
+        """
+        :param G: the graph the ants are walking on
+        :param ants_config: list of wave configurations as loaded from the config file
+        :param log_callback: function, which receives the log messages
+        :param pos: positions of the nodes, only needed by the plot
+        :param plot: the plot object, which shows the colony or None for headless runs
+        :param ignore_sleep: if the step, iteration and wave sleeps shall be skipped
+        :param seed: seed (int or list of ints) for reproducible runs
+        :param metrics_sinks: sinks for the metrics records, the caller closes them after the run
+        :param graph: the compiled graph of G, e.g. from a checkpoint, G is compiled if None
+        :param checkpointer: object with iteration_finished(colony), which is called after every iteration
+        :param storage: storage for the pheromones, weights and visit counts, e.g. storage.MemmapStorage
+        """
+        self.G = G
+        self.ants_config = ants_config
+        self.pos = pos if pos is not None else {}
         self.plot = plot
-        self.G = plot.G
+        self.ignore_sleep = ignore_sleep
         self.stop_event = threading.Event()
+        self.wake_event = threading.Event()
+        self.thread = None
         self.log_callback = log_callback
+        self.seed = seed
+        self.seed_sequence = np.random.SeedSequence(seed)
+
+        self.graph_lock = threading.RLock()
+        self.storage = storage if storage is not None else ArrayStorage()
+        self.graph = graph if graph is not None else CompiledGraph(G, self.storage)
+        self.graph_pos = dict(self.pos)
+        self.graph_changed = False
+
+        self.ants = []
+        self.batch = None
+        self.removed_node_visits = {}
+        self.allocate_visits()
+        self.convergence = []
+        self.metrics_sinks = list(metrics_sinks) if metrics_sinks else []
+        self.iteration_metrics = IterationMetrics()
+        self.iteration_best = None
+        self.best_so_far = None
+        self.stagnant_iterations = 0
+        self.checkpointer = checkpointer
 
         self.waves = []
-        for wave_conf in plot.ants_config:
+        for wave_conf in ants_config:
             self.waves.append(WaveConfig(wave_conf))
 
+        self.snapshot = None
+        self.snapshot_history = deque(maxlen=0)
+        self._last_snapshot_time = 0.0
+        self.publish_snapshot()
+
     def start(self):
-        self.waves = []
-        for wave_conf in self.plot.ants_config:
-            self.waves.append(WaveConfig(wave_conf))
-            
-        for wave in self.waves:
-            print(wave.to_dict())
         """
         starts _run() in a separate thread
         """
+        self.waves = []
+        for wave_conf in self.ants_config:
+            self.waves.append(WaveConfig(wave_conf))
+
         self.log_callback("Running")
         self.thread = threading.Thread(target=self._run)
         self.stop_event = threading.Event()
+        self.wake_event = threading.Event()
         self.thread.start()
 
+    def run(self):
+        """
+        runs all waves in the calling thread and returns when the run is finished
+        """
+        self.waves = []
+        for wave_conf in self.ants_config:
+            self.waves.append(WaveConfig(wave_conf))
+
+        self.stop_event = threading.Event()
+        self.wake_event = threading.Event()
+        self._run()
+
     def stop(self):
         """
         stops the current thread
         """
-        self.plot.start_colony_button.ax.set_visible(True)
-        self.plot.stop_colony_button.ax.set_visible(False)
+        if self.plot is not None:
+            self.plot.start_colony_button.ax.set_visible(True)
+            self.plot.stop_colony_button.ax.set_visible(False)
         self.log_callback("Stopped")
         self.stop_event.set()
+        self.wake_event.set()
+
+    def set_full_speed(self, full_speed: bool):
+        """
+        Switches the sleeps of the waves off or on. At full speed the colony runs as fast as possible and the plot
+        only samples the published snapshots, a running sleep is interrupted.
+
+        :param full_speed: if the sleeps shall be ignored
+        """
+        self.ignore_sleep = full_speed
+        if full_speed:
+            self.wake_event.set()
+        elif not self.stop_event.is_set():
+            # a stopping colony has to stay awake
+            self.wake_event.clear()
+
+    def keep_snapshot_history(self, size: int):
+        """
+        keeps the latest published snapshots, e.g. for a slowed down replay in the plot
+
+        :param size: number of snapshots to keep, 0 keeps none
+        """
+        if self.snapshot_history.maxlen != size:
+            self.snapshot_history = deque(self.snapshot_history, maxlen=size)
+
+    def _sleep(self, seconds: float):
+        """
+        sleeps between steps, iterations and waves, unless sleeps are ignored
+
+        :param seconds: time to sleep
+        """
+        if not self.ignore_sleep:
+            self.wake_event.wait(seconds)
 
     def evaporation(self, rate: float):
         """
@@ -67,33 +206,376 @@ class AntColonyRunner:
 
         :param rate: reducing factor
         """
-        if rate > 0.0:
-            for u, v, data in self.G.edges(data=True):
-                self.G[u][v]['pheromone'] *= (1 - rate)
-            
+        self.graph.evaporate(rate)
+
     def _clear_pheromones(self):
         """
         sets all pheromones to 0
         """
-        
-        self.evaporation(1)
 
-    def spawn_ant(self, wave):
+        self.graph.clear_pheromones()
+
+    def sync_graph(self):
+        """
+        writes the current pheromones to the edges of G.
+        The pheromones are only kept in the arrays while running, so the plot and exports have to call this first.
+        """
+
+        with self.graph_lock:
+            self.graph.write_pheromones(self.G)
+
+    def update_graph(self):
+        """
+        Marks G as changed (e.g. added or deleted edges by the plot), the arrays are rebuilt before the next iteration.
+        Call sync_graph() before changing G to keep the pheromones and hold graph_lock while changing G and pos.
+        If the colony is not running, the arrays are rebuilt at once.
+        """
+
+        self.graph_changed = True
+        if self.thread is None or not self.thread.is_alive():
+            self._compile_graph()
+
+    def _compile_graph(self):
+        """
+        rebuilds the arrays from G
+        """
+
+        with self.graph_lock:
+            self.graph_changed = False
+            old_graph = self.graph
+            # G only holds the pheromones of the last sync, the deposits and evaporations since then are in the arrays
+            old_graph.write_pheromones(self.G)
+            self.graph = CompiledGraph(self.G, self.storage)
+            self.graph_pos = dict(self.pos)
+            self._remap_visits(old_graph)
+            # removed or reweighted edges may break the best paths or make them more expensive
+            self.iteration_best = None
+            self.best_so_far = None
+            # the stagnation counts from the forgotten best path
+            self.stagnant_iterations = 0
+        self.publish_snapshot()
+
+    def allocate_visits(self, visit_counts: Optional[np.ndarray] = None, edge_visits: Optional[np.ndarray] = None,
+                        wave_visit_counts: Optional[np.ndarray] = None,
+                        wave_edge_visits: Optional[np.ndarray] = None):
+        """
+        creates the visit counts of the current graph in the storage
+
+        :param visit_counts: visits for every node id, 0 if None
+        :param edge_visits: traversals for every edge id, 0 if None
+        :param wave_visit_counts: visits in the current wave for every node id, 0 if None
+        :param wave_edge_visits: traversals in the current wave for every edge id, 0 if None
+        """
+
+        def initial(values: Optional[np.ndarray], length: int) -> np.ndarray:
+            return values if values is not None else np.zeros(length, dtype=np.int64)
+
+        node_count, edge_count = self.graph.node_count, self.graph.edge_count
+        self.visit_counts = self.storage.array('visits', initial(visit_counts, node_count))
+        self.edge_visits = self.storage.array('edge_visits', initial(edge_visits, edge_count))
+        self.wave_visit_counts = self.storage.array('wave_visits', initial(wave_visit_counts, node_count))
+        self.wave_edge_visits = self.storage.array('wave_edge_visits', initial(wave_edge_visits, edge_count))
+
+    def _remap_visits(self, old_graph: CompiledGraph):
+        """
+        moves the visit counts from the ids of the old graph to the ids of the recompiled graph.
+        Visits on removed nodes are kept in removed_node_visits, traversals of removed edges are dropped.
+
+        :param old_graph: the graph, which the visit counts belong to
+        """
+
+        new_ids = np.array([self.graph.node_index.get(node, -1) for node in old_graph.nodes], dtype=np.int64)
+        kept = new_ids >= 0
+        for old_id in np.flatnonzero(~kept & (self.visit_counts > 0)).tolist():
+            node = old_graph.nodes[old_id]
+            self.removed_node_visits[node] = self.removed_node_visits.get(node, 0) + int(self.visit_counts[old_id])
+
+        node_arrays: list[np.ndarray] = []
+        for old_counts in (self.visit_counts, self.wave_visit_counts):
+            counts = np.zeros(self.graph.node_count, dtype=np.int64)
+            counts[new_ids[kept]] = old_counts[kept]
+            node_arrays.append(counts)
+        # nodes, which were added again
+        for node in [node for node in self.removed_node_visits if node in self.graph.node_index]:
+            node_arrays[0][self.graph.node_index[node]] += self.removed_node_visits.pop(node)
+
+        new_edges = np.full(old_graph.edge_count, -1, dtype=np.int64)
+        both_kept = kept[old_graph.sources] & kept[old_graph.indices]
+        new_edges[both_kept] = self.graph.edge_ids(new_ids[old_graph.sources[both_kept]],
+                                                   new_ids[old_graph.indices[both_kept]])
+        edge_arrays: list[np.ndarray] = []
+        for old_counts in (self.edge_visits, self.wave_edge_visits):
+            counts = np.zeros(self.graph.edge_count, dtype=np.int64)
+            counts[new_edges[new_edges >= 0]] = old_counts[new_edges >= 0]
+            edge_arrays.append(counts)
+
+        self.allocate_visits(node_arrays[0], edge_arrays[0], node_arrays[1], edge_arrays[1])
+
+    @property
+    def visited_nodes(self) -> dict[Any, int]:
+        """
+        visits on the nodes by name, e.g. for exports and config files. Built from visit_counts on every access.
+        """
+        nodes = self.graph.nodes
+        visited_nodes = dict(self.removed_node_visits)
+        for node_id in np.flatnonzero(self.visit_counts).tolist():
+            visited_nodes[nodes[node_id]] = int(self.visit_counts[node_id])
+        return visited_nodes
+
+    @visited_nodes.setter
+    def visited_nodes(self, visited_nodes: dict[Any, int]):
+        """
+        sets the visits on the nodes by name, e.g. from a config file
+
+        :param visited_nodes: node name -> visits
+        """
+        node_index = self.graph.node_index
+        self.removed_node_visits = {}
+        self.visit_counts.fill(0)
+        for node, visits in visited_nodes.items():
+            if node in node_index:
+                self.visit_counts[node_index[node]] = visits
+            else:
+                self.removed_node_visits[node] = visits
+
+    def edge_traversals(self) -> dict[tuple[Any, Any], int]:
+        """
+        :return: (tail, head) node names -> traversals for every traversed edge
+        """
+        nodes = self.graph.nodes
+        sources, indices = self.graph.sources, self.graph.indices
+        return {(nodes[sources[edge]], nodes[indices[edge]]): int(self.edge_visits[edge])
+                for edge in np.flatnonzero(self.edge_visits).tolist()}
+
+    def visited_node_count(self) -> int:
+        """
+        :return: number of nodes, which were visited at least once
+        """
+        return int(np.count_nonzero(self.visit_counts)) + len(self.removed_node_visits)
+
+    def publish_snapshot(self):
+        """
+        Publishes the current state for the plot. The reference is replaced at once, so the plot reads either the
+        old or the new snapshot without waiting for the colony. Without a plot nothing reads the snapshots, so none
+        are made.
+        """
+
+        if self.plot is None:
+            return
+        version = self.snapshot.version + 1 if self.snapshot is not None else 0
+        self.snapshot = ColonySnapshot(version, self.graph, self.graph_pos, self._ant_id_paths(), self.visit_counts,
+                                       self.wave_index, self.iteration)
+        self._last_snapshot_time = self.snapshot.created
+        self.snapshot_history.append(self.snapshot)
+
+    def _publish_snapshot_if_due(self):
+        """
+        publishes a snapshot, if the last one is older than snapshot_interval
+        """
+
+        if time.monotonic() - self._last_snapshot_time >= self.snapshot_interval:
+            self.publish_snapshot()
+
+    def _prepare_wave(self, wave: WaveConfig):
         """
-        creates an ant object depending on a given class
+        precomputes the heuristic and the transition cache of the graph for alpha and beta of a wave
 
         :param wave: a wave object
+        """
+
+        self.graph.transitions(wave.alpha, wave.beta)
+        if wave.jit and not jit_kernels.JIT_AVAILABLE:
+            self.log_callback("numba is not installed, the ants are stepped without the compiled kernels")
+        elif wave.jit and jit_kernels.kernel_kind(ant_registry.get_ant_class(wave.ant_class).ant_class) is None:
+            self.log_callback(f"There is no compiled kernel for {wave.ant_class} ants, they are stepped without it")
+
+    @staticmethod
+    def _jit_kind(wave: WaveConfig) -> Optional[int]:
+        """
+        :param wave: a wave object
+        :return: kind of the compiled kernel, which steps the ants of the wave, None if they are stepped without it
+        """
+        if not wave.jit or not jit_kernels.JIT_AVAILABLE:
+            return None
+        return jit_kernels.kernel_kind(ant_registry.get_ant_class(wave.ant_class).ant_class)
+
+    def _uses_jit(self, wave: WaveConfig) -> bool:
+        """
+        :param wave: a wave object
+        :return: if the ants of the wave are stepped by the compiled kernels
+        """
+        return self._jit_kind(wave) is not None
+
+    def spawn_ant(self, wave: WaveConfig, rng: Optional[np.random.Generator] = None) -> random_ant.RandomAnt:
+        """
+        creates an ant object of the class of the wave, see ant_registry
+
+        :param wave: a wave object
+        :param rng: random number stream of the ant
         :return: an ant object
         """
 
-        if wave.ant_class == "random":
-            return random_ant.RandomAnt(self.G, wave)
-        if wave.ant_class == "routing":
-            return routing_ant.RoutingAnt(self.G, wave)
-        if wave.ant_class == "minority":
-            return minority_ant.MinorityAnt(self.G, wave)
+        return ant_registry.get_ant_class(wave.ant_class).ant_class(self.graph, wave, rng)
+
+    def spawn_ant_batch(self, wave: WaveConfig, spawn_nodes: list[str],
+                        rng: Optional[np.random.Generator] = None) -> ant_batch.RandomAntBatch:
+        """
+        creates a batch of ants of the class of the wave, which are stepped together, see ant_registry
+
+        :param wave: a wave object
+        :param spawn_nodes: start node for every ant
+        :param rng: random number stream of the batch
+        :return: an ant batch object
+        """
+
+        spawn_node_ids = [self.graph.node_index[node] for node in spawn_nodes]
+        kind = self._jit_kind(wave)
+        if kind is not None:
+            return jit_kernels.JitAntBatch(self.graph, wave, spawn_node_ids, kind, rng)
+        return ant_registry.get_ant_class(wave.ant_class).batch_class(self.graph, wave, spawn_node_ids, rng)
+
+    def _iteration_seed_sequence(self, wave_i: int, wave: WaveConfig, iteration: int) -> np.random.SeedSequence:
+        """
+        Derives the random number stream of an iteration from the seed of the wave or the run.
+        The streams only depend on the seed, wave and iteration, so runs are reproducible and independent of
+        other runs, threads or processes.
+
+        :param wave_i: number of the wave
+        :param wave: a wave object
+        :param iteration: number of the iteration
+        :return: the seed sequence of the iteration, ants get their streams spawned from it
+        """
+
+        if wave.seed is not None:
+            wave_seed_sequence = np.random.SeedSequence(wave.seed)
+        else:
+            wave_seed_sequence = np.random.SeedSequence(self.seed_sequence.entropy, spawn_key=(wave_i,))
+        return np.random.SeedSequence(wave_seed_sequence.entropy,
+                                      spawn_key=wave_seed_sequence.spawn_key + (iteration,))
+
+    def _ant_id_paths(self) -> list[np.ndarray] | list[list[int]]:
+        """
+        :return: paths of all currently stepping ants, each as node ids
+        """
+
+        if self.batch is not None:
+            return [self.batch.path(i) for i in np.flatnonzero(self.batch.alive).tolist()]
+        return [ant.path for ant in list(self.ants)]
+
+    def ant_paths(self) -> list[list[str]]:
+        """
+        paths of all currently stepping ants
+
+        :return: a list of paths, each as a list of node names
+        """
+
+        return [[self.graph.nodes[node_id] for node_id in path] for path in self._ant_id_paths()]
+
+    def _finish_ants(self, ants: list[random_ant.RandomAnt]):
+        """
+        counts the visits and the metrics of the ants, which died in a step
 
-    def _change_graph_values(self, wave):
+        :param ants: ant objects
+        """
+
+        if not ants:
+            return
+        path_edges = [self.graph.path_edges(ant.path) for ant in ants]
+        self._count_visits(np.concatenate([ant.path for ant in ants]), np.concatenate(path_edges))
+        for ant, edges in zip(ants, path_edges):
+            path_cost = float(self.graph.weight[edges[edges >= 0]].sum())
+            self.iteration_metrics.add_ant(len(ant.path) - 1, path_cost, ant.success)
+            if ant.success:
+                self._offer_best_path(path_cost, ant.path)
+
+    def _offer_best_path(self, path_cost: float, path: np.ndarray | list[int]):
+        """
+        keeps the path of a successful ant as the best path of the iteration, if it is the cheapest so far
+
+        :param path_cost: sum of the weights along the path
+        :param path: node ids of the path
+        """
+
+        if self.iteration_best is None or path_cost < self.iteration_best[0]:
+            self.iteration_best = (path_cost, [int(node) for node in path])
+
+    def _count_visits(self, node_ids: np.ndarray, edge_ids: np.ndarray):
+        """
+        Counts the visits on the nodes and the traversals of the edges of the paths of dying ants at once
+
+        :param node_ids: node ids of all paths
+        :param edge_ids: edge ids of all paths, -1 for steps without an edge
+        """
+
+        # proportional to the length of the paths, not to the size of the graph
+        node_ids, counts = np.unique(node_ids, return_counts=True)
+        self.visit_counts[node_ids] += counts
+        self.wave_visit_counts[node_ids] += counts
+        edge_ids, counts = np.unique(edge_ids[edge_ids >= 0], return_counts=True)
+        self.edge_visits[edge_ids] += counts
+        self.wave_edge_visits[edge_ids] += counts
+
+    def _step_ant_batch(self, batch: ant_batch.RandomAntBatch, wave: WaveConfig, steps: int):
+        """
+        Does one step for all ants of the batch
+
+        :param batch: the ants of the current iteration
+        :param wave: a wave-object
+        :param steps: number of the current step
+        """
+
+        died = batch.step()
+        if steps == wave.ant_max_steps - 1:
+            died = np.concatenate((died, np.flatnonzero(batch.alive)))
+            batch.retire(died)
+
+        paths = batch.paths[died]
+        self._count_visits(paths[paths >= 0], batch.path_edges[died].ravel())
+        path_costs = batch.path_costs(died)
+        successes = batch.success[died]
+        self.iteration_metrics.add_ants(batch.path_lengths[died] - 1, path_costs, successes)
+        if successes.any():
+            best = np.flatnonzero(successes)[np.argmin(path_costs[successes])]
+            self._offer_best_path(float(path_costs[best]), batch.path(int(died[best])))
+
+    def _finish_iteration_pheromones(self, wave: WaveConfig, wave_i: int, iteration: int):
+        """
+        Updates the pheromones after all ants of an iteration have finished: puts the elitist pheromones,
+        limits the pheromones to tau_min..tau_max and resets them, if the best path stagnates
+
+        :param wave: a wave object
+        :param wave_i: number of the wave
+        :param iteration: number of the iteration
+        """
+
+        if self.iteration_best is not None and (self.best_so_far is None
+                                                or self.iteration_best[0] < self.best_so_far[0]):
+            self.best_so_far = (self.iteration_best[0], [self.graph.nodes[node] for node in self.iteration_best[1]])
+            self.stagnant_iterations = 0
+        else:
+            self.stagnant_iterations += 1
+
+        elitist_path = None
+        if wave.elitist_deposit == 'iteration_best' and self.iteration_best is not None:
+            elitist_path = self.iteration_best[1]
+        elif wave.elitist_deposit == 'best_so_far' and self.best_so_far is not None:
+            elitist_path = [self.graph.node_index[node] for node in self.best_so_far[1]]
+        if elitist_path is not None:
+            # like a successful routing ant, weighted with elitist_weight
+            edges = self.graph.path_edges(elitist_path)
+            edges = edges[edges >= 0]
+            if len(edges) > 0:
+                self.graph.deposit_many(edges, wave.elitist_weight * wave.ant_max_steps / 2 / len(elitist_path))
+
+        self.graph.clamp_pheromones(wave.tau_min, wave.tau_max)
+
+        if wave.restart_after is not None and self.stagnant_iterations >= wave.restart_after:
+            self.graph.fill_pheromones(wave.tau_max if wave.tau_max is not None else 0.0)
+            self.stagnant_iterations = 0
+            self.log_callback(f"No better path for {wave.restart_after} iterations, pheromones reset in wave {wave_i}"
+                              f" iteration {iteration}")
+
+    def _change_graph_values(self, wave: WaveConfig):
         """
         Changes node values for a new wave
 
@@ -110,16 +592,9 @@ class AntColonyRunner:
         :return: number of pheromones edges
         """
 
-        total_edges: int = len(self.G.edges.keys())
-        pheromoned_edges: int = 0
-        edges = self.G.edges(data=True)
-        for i, o, data in edges:
-            if data['pheromone'] > 0:
-                pheromoned_edges += 1
-
-        return pheromoned_edges
+        return self.graph.count_pheromoned_edges()
 
-    def _remove_edges(self, wave):
+    def _remove_edges(self, wave: WaveConfig):
         """
         Removes a list of edges
 
@@ -127,14 +602,19 @@ class AntColonyRunner:
         """
 
         for tail, head in wave.remove_edges:
-            GraphTools.delete_edge(self.G, tail, head, self.plot.pos)
+            GraphTools.delete_edge(self.G, tail, head, self.pos)
 
     def _run(self):
         """
         controls the steps of the ants, runs iterations of stepping ants and runs waves of iterations
         """
 
-        time.sleep(1)
+        self.seed_sequence = np.random.SeedSequence(self.seed)
+        # empty, if the run starts at the beginning
+        resume: dict[str, Any] = self.resume_position or {}
+        self.resume_position = None
+
+        self._sleep(1)
 
         """
         a wave is a configuration of ants.
@@ -142,68 +622,152 @@ class AntColonyRunner:
         It can be useful for elite ants or combining different ant types in one experiment
         """
         for wave_i, wave in enumerate(self.waves):
-            
+            if resume and wave_i < resume['wave']:
+                continue
+
             if self.stop_event.is_set():
                 break
-                
-            if wave.clear_pheromones:
+
+            # the stage and the counters are the position for checkpoints, they are set after the stop check,
+            # so a stopped run can be continued at the work it didn't do
+            self.wave_index = wave_i
+            self.stage = 'wave'
+            resume_wave = bool(resume) and wave_i == resume['wave'] and resume['stage'] != 'wave'
+
+            # the changes of a resumed wave are already part of the checkpoint
+            if wave.clear_pheromones and not resume_wave:
                 self._clear_pheromones()
 
-            self._change_graph_values(wave)
-            self._remove_edges(wave)
+            if (wave.node_value_changes or wave.remove_edges) and not resume_wave:
+                with self.graph_lock:
+                    self.sync_graph()
+                    self._change_graph_values(wave)
+                    self._remove_edges(wave)
+                    self._compile_graph()
+
+            if not resume_wave:
+                self.wave_visit_counts.fill(0)
+                self.wave_edge_visits.fill(0)
+                self.best_so_far = None
+                self.stagnant_iterations = 0
+
+            # alpha and beta are fixed for the wave, the heuristic 1 / (eta ** beta) is computed once
+            self._prepare_wave(wave)
 
             '''
             iterations define a number of ants, which can walk at the same time and which behave homogeneous
             '''
-            for iteration in range(wave.max_iterations):
+            self.stage = 'iteration'
+            first_iteration = resume['iteration'] if resume_wave else 0
+            for iteration in range(first_iteration, wave.max_iterations):
                 if self.stop_event.is_set():
                     break
 
-                # spawn ants
-                self.ants.clear()
-                for i in range(0, wave.concurrent_ants):
-                    if wave.ant_random_spawn:
-                        wave.ant_spawn_node = random.choice(list(self.G.nodes()))
-                    self.ants.append(self.spawn_ant(wave))
-
-                # Evaporate pheromones after each iteration
-                self.evaporation(wave.evaporation_rate)
+                self.iteration = iteration
+                iteration_start_time = time.perf_counter()
+                first_step = 0
+                if resume_wave and iteration == first_iteration and resume['stage'] == 'step':
+                    # the ants and the metrics of the interrupted iteration were restored from the checkpoint
+                    first_step = resume['step']
+                else:
+                    self.iteration_metrics = IterationMetrics()
+                    self.iteration_best = None
+
+                    if self.graph_changed:
+                        self._compile_graph()
+                        self._prepare_wave(wave)
+
+                    # Evaporate pheromones after each iteration
+                    self.evaporation(wave.evaporation_rate)
+                    self.graph.clamp_pheromones(wave.tau_min, wave.tau_max)
+
+                    # spawn ants
+                    iteration_seed_sequence = self._iteration_seed_sequence(wave_i, wave, iteration)
+                    rng = np.random.default_rng(iteration_seed_sequence)
+                    self.ants.clear()
+                    self.batch = None
+                    if wave.vectorized or self._uses_jit(wave):
+                        spawn_nodes: list[str] = []
+                        for _ in range(0, wave.concurrent_ants):
+                            if wave.ant_random_spawn:
+                                wave.ant_spawn_node = self.graph.nodes[rng.integers(self.graph.node_count)]
+                            spawn_nodes.append(wave.ant_spawn_node)
+                        self.batch = self.spawn_ant_batch(wave, spawn_nodes, rng)
+                    else:
+                        for ant_seed_sequence in iteration_seed_sequence.spawn(wave.concurrent_ants):
+                            if wave.ant_random_spawn:
+                                wave.ant_spawn_node = self.graph.nodes[rng.integers(self.graph.node_count)]
+                            self.ants.append(self.spawn_ant(wave, np.random.default_rng(ant_seed_sequence)))
+                self.step = first_step
+                self.stage = 'step'
 
                 '''
                 steps are the steps of the ants. passing one edge at a time.
                 '''
-                for steps in range(wave.ant_max_steps):
+                for steps in range(first_step, wave.ant_max_steps):
                     if self.stop_event.is_set():
                         break
 
-                    # delete an ant from the list of this iteration if it stops stepping
-                    for i, ant in enumerate(self.ants):
-                        if not ant.step() or steps == wave.ant_max_steps -1:  # Each ant performs one step and dies if not
-                            # Count the visits on the node
-                            for node in ant.path:
-                                if node in self.visited_nodes:
-                                    self.visited_nodes[node] += 1
-                                else:
-                                    self.visited_nodes[node] = 1
-                                
-                            self.ants.pop(i)
-
+                    if self.batch is not None:
+                        self._step_ant_batch(self.batch, wave, steps)
+                        self.step = steps + 1
+                        self._publish_snapshot_if_due()
+                        if len(self.batch) > 0:
+                            self._sleep(wave.step_sleep)
+                        continue
+
+                    # every ant performs one step, the ants which stop stepping are retired together and the
+                    # list is compacted to the living ants
+                    last_step = steps == wave.ant_max_steps - 1
+                    living_ants: list[random_ant.RandomAnt] = []
+                    dying_ants: list[random_ant.RandomAnt] = []
+                    for ant in self.ants:
+                        if ant.step() and not last_step:
+                            living_ants.append(ant)
+                        else:
+                            dying_ants.append(ant)
+                    self.ants = living_ants
+                    self._finish_ants(dying_ants)
+
+                    self.step = steps + 1
+                    self._publish_snapshot_if_due()
                     if len(self.ants) > 0:
-                        time.sleep(wave.step_sleep)
+                        self._sleep(wave.step_sleep)
 
-                time.sleep(wave.iteration_sleep)
-                self.log_callback("Edges found so far: " + str(self._count_pheromoned_edges())
-                                  + " / " + str(len(self.G.edges.keys()))
+                if self.stop_event.is_set():
+                    # the iteration is not finished, a checkpoint continues it at the current step
+                    break
+
+                self._finish_iteration_pheromones(wave, wave_i, iteration)
+                record = self.iteration_metrics.record(wave_i, iteration, self.graph,
+                                                       time.perf_counter() - iteration_start_time)
+                self.convergence.append(record)
+                for sink in self.metrics_sinks:
+                    sink.write(record)
+
+                self.publish_snapshot()
+                self.iteration = iteration + 1
+                self.stage = 'iteration'
+                if self.checkpointer is not None:
+                    self.checkpointer.iteration_finished(self)
+                self._sleep(wave.iteration_sleep)
+                pheromoned_edges = record['pheromoned_edges']
+                self.log_callback("Edges found so far: " + str(pheromoned_edges)
+                                  + " / " + str(self.graph.edge_count)
                                   + " in wave " + str(wave_i)
                                   + " interation " + str(iteration)
                                   + " at " + str(wave.ant_max_steps) + " steps")
                 
-            self.log_callback("Nodes visited in this wave: " + str(
-                dict(sorted(self.visited_nodes.items(), key=lambda item: item[1], reverse=True))))
+            self.log_callback("Wave " + str(wave_i) + " finished, "
+                              + str(int(np.count_nonzero(self.wave_visit_counts))) + " nodes visited in this wave, "
+                              + str(self.visited_node_count()) + " so far")
+
+            self._sleep(wave.wave_sleep)
 
-            time.sleep(wave.wave_sleep)
+        if not self.stop_event.is_set():
+            self.stage = 'finished'
+        self.storage.flush()
 
-        # print("Run finished")
         self.log_callback("Run finished")
         
         self.stop()
@@ -0,0 +1,74 @@
+"""
+Registry of the ant classes, which can be chosen by the 'class' of a wave. Every ant class has a scalar
+implementation, one object per ant (see RandomAnt), and a batch implementation, which steps all ants of an
+iteration together with array operations (see RandomAntBatch). New strategies are added with register_ant_class()
+before the colony is created, the runner and the plot pick them up by their name.
+"""
+
+import ant_batch
+import minority_ant
+import random_ant
+import routing_ant
+
+
+class AntClass:
+    """
+    the implementations of one ant strategy
+    """
+
+    name: str                                       # name of the class in the config, e.g. 'routing'
+    ant_class: type[random_ant.RandomAnt]           # scalar implementation, created with (graph, wave, rng)
+    batch_class: type[ant_batch.RandomAntBatch]     # batch implementation, created with (graph, wave, node ids, rng)
+
+    def __init__(self, name: str, ant_class: type[random_ant.RandomAnt],
+                 batch_class: type[ant_batch.RandomAntBatch]):
+        """
+        :param name: name of the class in the config
+        :param ant_class: scalar implementation, a subclass of RandomAnt
+        :param batch_class: batch implementation, a subclass of RandomAntBatch
+        """
+        self.name = name
+        self.ant_class = ant_class
+        self.batch_class = batch_class
+
+
+_ant_classes: dict[str, AntClass] = {}
+
+
+def register_ant_class(name: str, ant_class: type[random_ant.RandomAnt], batch_class: type[ant_batch.RandomAntBatch],
+                       replace: bool = False):
+    """
+    Registers an ant strategy, so waves can use it by its name
+
+    :param name: name of the class in the config
+    :param ant_class: scalar implementation, a subclass of RandomAnt
+    :param batch_class: batch implementation, a subclass of RandomAntBatch
+    :param replace: replace a registered class with the same name instead of raising a ValueError
+    """
+
+    if name in _ant_classes and not replace:
+        raise ValueError(f"Ant class {name} is already registered")
+    _ant_classes[name] = AntClass(name, ant_class, batch_class)
+
+
+def get_ant_class(name: str) -> AntClass:
+    """
+    :param name: name of the class in the config
+    :return: the registered implementations
+    """
+
+    if name not in _ant_classes:
+        raise ValueError(f"Unknown ant class {name}, use one of {', '.join(_ant_classes)}")
+    return _ant_classes[name]
+
+
+def ant_class_names() -> list[str]:
+    """
+    :return: names of all registered ant classes in the order of registration
+    """
+    return list(_ant_classes)
+
+
+register_ant_class('random', random_ant.RandomAnt, ant_batch.RandomAntBatch)
+register_ant_class('routing', routing_ant.RoutingAnt, ant_batch.RoutingAntBatch)
+register_ant_class('minority', minority_ant.MinorityAnt, ant_batch.MinorityAntBatch)
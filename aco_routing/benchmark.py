@@ -0,0 +1,90 @@
+import argparse
+import time
+from typing import Optional
+
+import numpy as np
+
+import graph_generators
+import routing_ant
+from compiled_graph import CompiledGraph
+from wave_config import WaveConfig
+
+
+class _VisitedList(list[int]):
+    """
+    the former membership test on the path list, offered with the interface of a set
+    """
+    add = list[int].append
+
+
+class _ListVisitedRoutingAnt(routing_ant.RoutingAnt):
+    """
+    a routing ant, which tests visited nodes on a list like before the visited set
+    """
+
+    def __init__(self, graph: CompiledGraph, wave: WaveConfig, rng: Optional[np.random.Generator] = None):
+        super().__init__(graph, wave, rng)
+        # the list is only used with add and in like the set
+        self.visited = _VisitedList(self.path)  # pyright: ignore[reportAttributeAccessIssue]
+
+
+def torus_graph(x: int, y: int) -> CompiledGraph:
+    """
+    :param x: number of nodes in x direction
+    :param y: number of nodes in y direction
+    :return: a compiled 2d grid torus without success nodes and with some pheromones on every edge
+    """
+    sources, targets, _ = graph_generators.torus_2d(x, y)
+    pheromone = np.random.default_rng(0).random(len(sources)) + 0.1
+    return CompiledGraph.from_arrays(x * y, sources, targets, pheromone=pheromone)
+
+
+def walk_time(ant_class: type[routing_ant.RoutingAnt], graph: CompiledGraph, max_steps: int, ants: int) -> float:
+    """
+    lets ants walk all their steps and measures the time
+
+    :param ant_class: class of the ants
+    :param graph: the graph
+    :param max_steps: steps of every ant
+    :param ants: number of ants
+    :return: seconds per step
+    """
+    wave = WaveConfig({'class': 'routing', 'ant_max_steps': max_steps, 'spawn_node': graph.nodes[0],
+                       'random_chance': 0.0, 'stop_on_success': False})
+    start_time = time.perf_counter()
+    for i in range(ants):
+        ant = ant_class(graph, wave, np.random.default_rng(i))
+        for _ in range(max_steps):
+            ant.step()
+    return (time.perf_counter() - start_time) / (ants * max_steps)
+
+
+def benchmark_visited(steps: tuple[int, ...] = (50, 100, 200, 400, 800), ants: int = 10):
+    """
+    compares the visited set of the ants with the former membership test on the path list
+
+    :param steps: values for ant_max_steps
+    :param ants: number of ants per measurement
+    """
+    graph = torus_graph(60, 60)
+    print(f"{'max steps':>10} {'list [us/step]':>15} {'set [us/step]':>15} {'speedup':>8}")
+    for max_steps in steps:
+        list_time = walk_time(_ListVisitedRoutingAnt, graph, max_steps, ants)
+        set_time = walk_time(routing_ant.RoutingAnt, graph, max_steps, ants)
+        print(f"{max_steps:>10} {list_time * 1e6:>15.1f} {set_time * 1e6:>15.1f} {list_time / set_time:>8.2f}")
+
+
+def main():
+    """
+    Command line entry point for the benchmarks
+    """
+
+    parser = argparse.ArgumentParser(description='Benchmarks for the ant hot path')
+    parser.add_argument('--ants', type=int, default=10, help='ants per measurement')
+    args = parser.parse_args()
+
+    benchmark_visited(ants=args.ants)
+
+
+if __name__ == '__main__':
+    main()
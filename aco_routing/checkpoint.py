@@ -0,0 +1,285 @@
+"""
+Binary checkpoints of a colony as one NumPy .npz file. A checkpoint holds the arrays of the compiled graph,
+the positions and visits of the nodes, every wave and the position of the run with the stepping ants and their
+random number streams, so a stopped run continues exactly where it stopped.
+Everything, which is not an array, is stored as JSON in the entry 'meta'.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import IO, Any, Callable, Optional
+
+import networkx as nx
+import numpy as np
+
+from ant_colony_runner import AntColonyRunner
+from compiled_graph import CompiledGraph
+from metrics import IterationMetrics
+
+CHECKPOINT_VERSION = 1
+
+
+def save_checkpoint(colony: AntColonyRunner, path: str | IO[bytes], plot_config: Optional[dict[str, Any]] = None):
+    """
+    Writes the state of a stopped colony or of the colony thread itself, e.g. after an iteration
+
+    :param colony: the colony
+    :param path: file path or file object for the checkpoint
+    :param plot_config: plot section of the config, which is restored together with the colony
+    """
+
+    if colony.thread is not None and colony.thread.is_alive() and threading.current_thread() is not colony.thread:
+        raise RuntimeError("Stop the colony before saving a checkpoint")
+
+    graph = colony.graph
+    with colony.graph_lock:
+        pos = np.array([colony.pos.get(node, (np.nan, np.nan)) for node in graph.nodes], dtype=np.float64)
+    arrays: dict[str, Any] = {
+        'indptr': graph.indptr,
+        'indices': graph.indices,
+        'weight': graph.weight,
+        'pheromone': graph.pheromone,
+        'value': graph.value,
+        'pos': pos.reshape(-1, 2),
+        'visit_counts': colony.visit_counts,
+        'edge_visits': colony.edge_visits,
+        'wave_visit_counts': colony.wave_visit_counts,
+        'wave_edge_visits': colony.wave_edge_visits
+    }
+    meta: dict[str, Any] = {
+        'version': CHECKPOINT_VERSION,
+        'seed': colony.seed_sequence.entropy,
+        'waves': [wave.to_dict() for wave in colony.waves],
+        'position': {'stage': colony.stage, 'wave': colony.wave_index, 'iteration': colony.iteration,
+                     'step': colony.step},
+        'iteration_metrics': vars(colony.iteration_metrics),
+        'convergence': colony.convergence,
+        'plot': plot_config,
+        'removed_node_visits': list(colony.removed_node_visits.items()),
+        'iteration_best': colony.iteration_best,
+        'best_so_far': colony.best_so_far,
+        'stagnant_iterations': colony.stagnant_iterations
+    }
+    meta['node_names'] = _store_names(arrays, 'nodes', graph.nodes)
+
+    if colony.stage == 'step':
+        _store_ants(colony, arrays, meta)
+
+    np.savez(path, meta=np.array(json.dumps(meta)), **arrays)
+
+
+def save_checkpoint_atomic(colony: AntColonyRunner, path: str, plot_config: Optional[dict[str, Any]] = None):
+    """
+    Writes a checkpoint to a temporary file next to path and replaces path with it, so path always holds a
+    complete checkpoint, even if the process is killed while writing
+
+    :param colony: the colony
+    :param path: file path of the checkpoint
+    :param plot_config: plot section of the config, see save_checkpoint()
+    """
+
+    temporary_path = path + '.tmp'
+    try:
+        with open(temporary_path, 'wb') as f:
+            save_checkpoint(colony, f, plot_config)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary_path, path)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+
+
+class AutoCheckpoint:
+    """
+    Saves checkpoints of a running colony every n iterations and/or every t seconds.
+    The colony calls iteration_finished() after each iteration, see AntColonyRunner.checkpointer.
+    """
+
+    path: str                   # file path of the checkpoint, replaced by every save
+    every_iterations: Optional[int]  # iterations between two checkpoints, not by iterations if None
+    interval: Optional[float]   # seconds between two checkpoints, not by time if None
+    iterations: int             # finished iterations since the last checkpoint
+    last_save_time: float       # time.monotonic() of the last checkpoint
+    saves: int                  # number of written checkpoints
+
+    def __init__(self, path: str, every_iterations: Optional[int] = None, interval: Optional[float] = None):
+        """
+        :param path: file path of the checkpoint
+        :param every_iterations: iterations between two checkpoints
+        :param interval: seconds between two checkpoints
+        """
+        self.path = path
+        self.every_iterations = every_iterations
+        self.interval = interval
+        self.iterations = 0
+        self.last_save_time = time.monotonic()
+        self.saves = 0
+
+    def iteration_finished(self, colony: AntColonyRunner):
+        """
+        saves a checkpoint, if enough iterations or time passed since the last one
+
+        :param colony: the colony, called from its thread
+        """
+        self.iterations += 1
+        if ((self.every_iterations and self.iterations >= self.every_iterations)
+                or (self.interval is not None and time.monotonic() - self.last_save_time >= self.interval)):
+            self.save(colony)
+
+    def save(self, colony: AntColonyRunner):
+        """
+        saves a checkpoint at once
+
+        :param colony: the stopped colony or the colony calling from its thread
+        """
+        save_checkpoint_atomic(colony, self.path)
+        self.iterations = 0
+        self.last_save_time = time.monotonic()
+        self.saves += 1
+
+
+def load_checkpoint(path: str | IO[bytes], log_callback: Callable[[str], Any],
+                    **runner_kwargs: Any) -> tuple[AntColonyRunner, Optional[dict[str, Any]]]:
+    """
+    Restores a colony from a checkpoint. Calling run() or start() continues the run at the stored position.
+
+    :param path: file path or file object of the checkpoint
+    :param log_callback: function, which receives the log messages of the colony
+    :param runner_kwargs: further arguments for the AntColonyRunner, e.g. plot or metrics_sinks
+    :return: the colony and the plot section of the config (None, if it wasn't saved)
+    """
+
+    with np.load(path, allow_pickle=False) as data:
+        meta: dict[str, Any] = json.loads(str(data['meta']))
+        if meta['version'] != CHECKPOINT_VERSION:
+            raise ValueError(f"Unknown checkpoint version {meta['version']}")
+        arrays: dict[str, Any] = {key: data[key] for key in data.files if key != 'meta'}
+
+    nodes = _load_names(arrays, 'nodes', meta['node_names'])
+    indptr = arrays['indptr']
+    sources = np.repeat(np.arange(len(nodes), dtype=np.int64), np.diff(indptr))
+    graph = CompiledGraph.from_arrays(len(nodes), sources, arrays['indices'], arrays['weight'], arrays['pheromone'],
+                                      arrays['value'], nodes=nodes, storage=runner_kwargs.get('storage'))
+
+    G: nx.DiGraph[Any] = nx.DiGraph()
+    G.add_nodes_from((node, {'value': value}) for node, value in zip(nodes, graph.value.tolist()))
+    G.add_edges_from((nodes[tail], nodes[head], {'weight': weight, 'pheromone': pheromone})
+                     for tail, head, weight, pheromone in zip(graph.sources.tolist(), graph.indices.tolist(),
+                                                              graph.weight.tolist(), graph.pheromone.tolist()))
+    pos = {node: xy for node, xy in zip(nodes, arrays['pos']) if not np.isnan(xy).any()}
+
+    colony = AntColonyRunner(G, meta['waves'], log_callback, pos=pos, seed=meta['seed'], graph=graph,
+                             **runner_kwargs)
+    colony.removed_node_visits = {node: visits for node, visits in meta['removed_node_visits']}
+    colony.allocate_visits(arrays['visit_counts'], arrays['edge_visits'], arrays['wave_visit_counts'],
+                            arrays['wave_edge_visits'])
+    colony.convergence = meta['convergence']
+    colony.best_so_far = _load_best_path(meta['best_so_far'])
+    colony.stagnant_iterations = meta['stagnant_iterations']
+
+    position = meta['position']
+    colony.wave_index, colony.iteration, colony.step = position['wave'], position['iteration'], position['step']
+    colony.stage = position['stage']
+    colony.resume_position = position
+    colony.seed_sequence = np.random.SeedSequence(meta['seed'])
+    if position['stage'] == 'step':
+        colony.iteration_metrics = IterationMetrics()
+        vars(colony.iteration_metrics).update(meta['iteration_metrics'])
+        colony.iteration_best = _load_best_path(meta['iteration_best'])
+        _load_ants(colony, arrays, meta)
+    colony.publish_snapshot()
+
+    return colony, meta['plot']
+
+
+def _load_best_path(best_path: Optional[list[Any]]) -> Optional[tuple[float, list[Any]]]:
+    """
+    :param best_path: a (cost, path) tuple of the colony, which JSON stores as a list, or None
+    :return: the tuple again
+    """
+    return (best_path[0], best_path[1]) if best_path is not None else None
+
+
+def _store_names(arrays: dict[str, Any], key: str, names: list[Any]) -> Optional[list[Any]]:
+    """
+    stores node names as an array, if they are all numbers or all strings
+
+    :param arrays: the arrays of the checkpoint, the names are added as key
+    :param key: name of the entry
+    :param names: node names
+    :return: the names for the JSON meta data, if they can't be stored as an array, else None
+    """
+
+    if all(isinstance(name, int) for name in names):
+        arrays[key] = np.array(names, dtype=np.int64)
+    elif all(isinstance(name, str) for name in names):
+        arrays[key] = np.array(names, dtype=str)
+    else:
+        return names
+    return None
+
+
+def _load_names(arrays: dict[str, Any], key: str, names: Optional[list[Any]]) -> list[Any]:
+    """
+    :return: the node names stored by _store_names()
+    """
+    return names if names is not None else arrays[key].tolist()
+
+
+def _store_ants(colony: AntColonyRunner, arrays: dict[str, Any], meta: dict[str, Any]):
+    """
+    stores the stepping ants of the interrupted iteration with the states of their random number streams
+    """
+
+    if colony.batch is not None:
+        batch = colony.batch
+        for key in ('start_nodes', 'positions', 'paths', 'path_edges', 'path_lengths', 'success', 'alive'):
+            arrays['batch_' + key] = getattr(batch, key)
+        meta['batch_rng'] = batch.rng.bit_generator.state
+        return
+
+    paths = [ant.path for ant in colony.ants]
+    lengths = np.array([len(path) for path in paths], dtype=np.int64)
+    arrays['ant_paths'] = np.full((len(paths), int(lengths.max(initial=0))), -1, dtype=np.int64)
+    for i, path in enumerate(paths):
+        arrays['ant_paths'][i, :len(path)] = path
+    arrays['ant_path_lengths'] = lengths
+    arrays['ant_success'] = np.array([ant.success for ant in colony.ants], dtype=bool)
+    meta['ant_rngs'] = [ant.rng.bit_generator.state for ant in colony.ants]
+
+
+def _load_ants(colony: AntColonyRunner, arrays: dict[str, Any], meta: dict[str, Any]):
+    """
+    creates the stepping ants of the interrupted iteration again, see _store_ants()
+    """
+
+    wave = colony.waves[colony.wave_index]
+    graph = colony.graph
+    if 'batch_rng' in meta:
+        rng = np.random.default_rng()
+        rng.bit_generator.state = meta['batch_rng']
+        start_nodes = arrays['batch_start_nodes']
+        batch = colony.spawn_ant_batch(wave, [graph.nodes[node] for node in start_nodes.tolist()], rng)
+        for key in ('positions', 'paths', 'path_edges', 'path_lengths', 'success', 'alive'):
+            setattr(batch, key, arrays['batch_' + key].copy())
+        colony.batch = batch
+        colony.ants = []
+        return
+
+    colony.batch = None
+    colony.ants = []
+    for path, length, success, rng_state in zip(arrays['ant_paths'], arrays['ant_path_lengths'].tolist(),
+                                                arrays['ant_success'].tolist(), meta['ant_rngs']):
+        rng = np.random.default_rng()
+        rng.bit_generator.state = rng_state
+        ant = colony.spawn_ant(wave, rng)
+        ant.path = path[:length].tolist()
+        ant.visited = set(ant.path)
+        ant.start_node = ant.path[0]
+        ant.current_node = ant.path[-1]
+        ant.success = success
+        colony.ants.append(ant)
@@ -0,0 +1,435 @@
+from __future__ import annotations
+
+import math
+from typing import Any, Optional
+
+import networkx as nx
+import numpy as np
+
+from storage import ArrayStorage
+from transition_cache import TransitionCache
+
+
+class CompiledGraph:
+    """
+    Array representation of a graph for the hot path of the ants.
+    Nodes get integer ids, the outgoing edges of each node are stored as CSR adjacency (sorted by head node)
+    and weights, pheromones and node values are kept in contiguous arrays
+    """
+
+    nodes: list[Any]            # node names, the index of a name is its node id
+    node_index: dict[Any, int]  # node name -> node id
+
+    indptr: np.ndarray          # the outgoing edges of node i are the edge ids indptr[i]:indptr[i + 1]
+    indices: np.ndarray         # head node id for every edge
+    sources: np.ndarray         # tail node id for every edge
+
+    weight: np.ndarray          # weight for every edge
+    pheromone: np.ndarray       # pheromones for every edge
+    value: np.ndarray           # value for every node
+
+    max_degree: int             # maximum number of outgoing edges of a node
+
+    # aggregates of the pheromones, kept up to date by deposit(), evaporate() and clear_pheromones()
+    pheromoned_edges: int       # number of edges with pheromones > 0
+    pheromone_total: float      # sum of all pheromones
+    pheromone_max: float        # maximum pheromones on an edge
+    _pheromone_min: float       # minimum pheromones on an edge, see pheromone_min
+    _pheromone_min_count: int   # number of edges with the minimum, the minimum is searched again if it drops to 0
+    _pheromone_log_sum: float   # sum of tau * log(tau) over all edges with pheromones
+
+    # fixed for a compiled graph, e.g. for the color normalization of the plot
+    weight_min: float           # minimum weight of an edge
+    weight_max: float           # maximum weight of an edge
+    value_min: float            # minimum value of a node
+    value_max: float            # maximum value of a node
+
+    _edge_keys: Optional[np.ndarray] = None
+    _transitions: Optional[TransitionCache] = None
+    _heuristic: Optional[np.ndarray] = None
+    _heuristic_beta: Optional[float] = None
+
+    def __init__(self, G: nx.DiGraph[Any], storage: Optional[ArrayStorage] = None):
+        """
+        builds the arrays from a graph with 'weight' and 'pheromone' edge attributes and 'value' node attributes
+
+        :param G: the graph
+        :param storage: storage for the pheromones and weights, kept in memory if None
+        """
+
+        nodes = list(G.nodes())
+        node_index = {node: i for i, node in enumerate(nodes)}
+
+        edge_count = G.number_of_edges()
+        sources = np.empty(edge_count, dtype=np.int64)
+        targets = np.empty(edge_count, dtype=np.int64)
+        weight = np.empty(edge_count, dtype=np.float64)
+        pheromone = np.empty(edge_count, dtype=np.float64)
+        for i, (tail, head, data) in enumerate(G.edges(data=True)):
+            sources[i] = node_index[tail]
+            targets[i] = node_index[head]
+            weight[i] = data['weight']
+            pheromone[i] = data['pheromone']
+
+        value = np.array([data.get('value', 0) for _, data in G.nodes(data=True)], dtype=np.float64)
+        self._build(nodes, sources, targets, weight, pheromone, value, storage)
+
+    @classmethod
+    def from_arrays(cls, node_count: int, sources: np.ndarray, targets: np.ndarray,
+                    weight: Optional[np.ndarray] = None, pheromone: Optional[np.ndarray] = None,
+                    value: Optional[np.ndarray] = None, nodes: Optional[list[Any]] = None,
+                    storage: Optional[ArrayStorage] = None) -> CompiledGraph:
+        """
+        builds the arrays directly from edge arrays, e.g. of graph_generators, without a networkx graph
+
+        :param node_count: number of nodes
+        :param sources: tail node id for every edge
+        :param targets: head node id for every edge
+        :param weight: weight for every edge, 1 if None
+        :param pheromone: pheromones for every edge, 0 if None
+        :param value: value for every node, 0 if None
+        :param nodes: node names, the ids if None
+        :param storage: storage for the pheromones and weights, kept in memory if None
+        :return: the compiled graph
+        """
+
+        graph = cls.__new__(cls)
+        edge_count = len(sources)
+        graph._build(nodes if nodes is not None else list(range(node_count)),
+                     np.asarray(sources, dtype=np.int64), np.asarray(targets, dtype=np.int64),
+                     np.ones(edge_count) if weight is None else np.asarray(weight, dtype=np.float64),
+                     np.zeros(edge_count) if pheromone is None else np.asarray(pheromone, dtype=np.float64),
+                     np.zeros(node_count) if value is None else np.asarray(value, dtype=np.float64), storage)
+        return graph
+
+    def _build(self, nodes: list[Any], sources: np.ndarray, targets: np.ndarray, weight: np.ndarray,
+               pheromone: np.ndarray, value: np.ndarray, storage: Optional[ArrayStorage] = None):
+        """
+        sorts the edges and builds the CSR adjacency
+
+        :param nodes: node names, the index of a name is its node id
+        :param sources: tail node id for every edge
+        :param targets: head node id for every edge
+        :param weight: weight for every edge
+        :param pheromone: pheromones for every edge
+        :param value: value for every node
+        :param storage: storage for the pheromones and weights, kept in memory if None
+        """
+
+        self.nodes = nodes
+        self.node_index = {node: i for i, node in enumerate(self.nodes)}
+
+        # sort edges by tail and head, so the edges of a node are one slice and can be searched
+        order = np.lexsort((targets, sources))
+        self.sources = sources[order]
+        self.indices = targets[order]
+        self.weight = weight[order]
+        self.pheromone = pheromone[order]
+
+        self.indptr = np.zeros(len(self.nodes) + 1, dtype=np.int64)
+        degrees = np.bincount(self.sources, minlength=len(self.nodes))
+        np.cumsum(degrees, out=self.indptr[1:])
+        self.max_degree = int(degrees.max()) if len(degrees) > 0 else 0
+
+        self.value = value
+
+        if storage is not None:
+            # pheromones and weights are only changed in place, so they stay in the storage
+            self.pheromone = storage.array('pheromone', self.pheromone)
+            self.weight = storage.array('weight', self.weight)
+            storage.array('indptr', self.indptr)
+            storage.array('indices', self.indices)
+            storage.write_nodes(self.nodes)
+
+        self.weight_min, self.weight_max = self._min_max(self.weight)
+        self.value_min, self.value_max = self._min_max(self.value)
+        self.recount_pheromones()
+
+    @staticmethod
+    def _min_max(array: np.ndarray) -> tuple[float, float]:
+        """
+        :return: minimum and maximum of the array, 0 for an empty array
+        """
+        if len(array) == 0:
+            return 0.0, 0.0
+        return float(array.min()), float(array.max())
+
+    @property
+    def node_count(self) -> int:
+        return len(self.nodes)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.indices)
+
+    def edge_range(self, node: int) -> tuple[int, int]:
+        """
+        :param node: a node id
+        :return: first and last + 1 edge id of the outgoing edges of the node
+        """
+        return int(self.indptr[node]), int(self.indptr[node + 1])
+
+    def neighbors(self, node: int) -> np.ndarray:
+        """
+        :param node: a node id
+        :return: node ids of all heads of the outgoing edges of the node
+        """
+        return self.indices[self.indptr[node]:self.indptr[node + 1]]
+
+    def padded_edges(self, nodes: np.ndarray) -> np.ndarray:
+        """
+        Outgoing edge ids of some nodes as a matrix with one row per node, padded with -1 to the maximum out degree
+        of these nodes. Used to gather the edges of many nodes at once, the size only depends on the given nodes.
+
+        :param nodes: node ids, may contain duplicates
+        :return: the edge ids with one row per node
+        """
+        starts = self.indptr[nodes]
+        degrees = self.indptr[nodes + 1] - starts
+        padded = np.full((len(nodes), int(degrees.max(initial=0))), -1, dtype=np.int64)
+        rows = np.repeat(np.arange(len(nodes)), degrees)
+        columns = np.arange(int(degrees.sum())) - np.repeat(np.cumsum(degrees) - degrees, degrees)
+        padded[rows, columns] = np.repeat(starts, degrees) + columns
+        return padded
+
+    def edge_id(self, tail: int, head: int) -> int:
+        """
+        Finds the edge between two nodes
+
+        :param tail: outgoing node id
+        :param head: incoming node id
+        :return: the edge id or -1 if there is no such edge
+        """
+        start, stop = self.edge_range(tail)
+        i = start + int(np.searchsorted(self.indices[start:stop], head))
+        if i < stop and self.indices[i] == head:
+            return i
+        return -1
+
+    def heuristic(self, beta: float) -> np.ndarray:
+        """
+        The heuristic term 1 / (eta ** beta) for every edge. Weights only change with the topology, which
+        compiles a new graph, so it is computed once per beta.
+
+        :param beta: relevance exponent for edge cost
+        :return: the heuristic for every edge
+        """
+        if self._heuristic is None or self._heuristic_beta != beta:
+            self._heuristic = 1 / (self.weight ** beta)
+            self._heuristic_beta = beta
+        return self._heuristic
+
+    def transitions(self, alpha: float, beta: float) -> TransitionCache:
+        """
+        The cache of edge values and distributions for alpha and beta. It is kept up to date by the methods,
+        which change pheromones, and replaced if alpha or beta changed.
+
+        :param alpha: relevance exponent for pheromones
+        :param beta: relevance exponent for edge cost
+        :return: the cache
+        """
+        if self._transitions is None or (self._transitions.alpha, self._transitions.beta) != (alpha, beta):
+            self._transitions = TransitionCache(self, alpha, beta)
+        return self._transitions
+
+    def recount_pheromones(self):
+        """
+        computes the pheromone aggregates from the array, needed after writing to the array directly
+        """
+        pheromoned = self.pheromone[self.pheromone > 0]
+        self.pheromoned_edges = len(pheromoned)
+        self.pheromone_total = float(pheromoned.sum())
+        self._pheromone_log_sum = float((pheromoned * np.log(pheromoned)).sum())
+        self._pheromone_min, self.pheromone_max = self._min_max(self.pheromone)
+        self._pheromone_min_count = int(np.count_nonzero(self.pheromone == self._pheromone_min))
+
+    @property
+    def pheromone_min(self) -> float:
+        """
+        minimum pheromones on an edge. Deposits only raise pheromones, so the edges are only searched again,
+        after pheromones were put on all edges with the former minimum
+        """
+        if self._pheromone_min_count <= 0 and self.edge_count > 0:
+            self._pheromone_min = float(self.pheromone.min())
+            self._pheromone_min_count = int(np.count_nonzero(self.pheromone == self._pheromone_min))
+        return self._pheromone_min
+
+    def pheromone_entropy(self) -> float:
+        """
+        Shannon entropy (in nats) of the pheromones as a distribution over the edges, from the kept aggregates.
+        0 if all pheromones are on one edge, log(edge_count) if they are spread evenly.
+
+        :return: the entropy
+        """
+        if self.pheromone_total <= 0:
+            return 0.0
+        return max(math.log(self.pheromone_total) - self._pheromone_log_sum / self.pheromone_total, 0.0)
+
+    def deposit(self, edge: int, amount: float):
+        """
+        puts pheromones on one edge
+
+        :param edge: an edge id
+        :param amount: pheromones to put
+        """
+        old = float(self.pheromone[edge])
+        new = old + amount
+        self.pheromone[edge] = new
+
+        self.pheromoned_edges += (new > 0) - (old > 0)
+        self.pheromone_total += new - old
+        self._pheromone_log_sum += (new * math.log(new) if new > 0 else 0.0) - (old * math.log(old) if old > 0 else 0.0)
+        if new > self.pheromone_max:
+            self.pheromone_max = new
+        if old == self._pheromone_min:
+            self._pheromone_min_count -= 1
+
+        if self._transitions is not None:
+            self._transitions.invalidate(int(self.sources[edge]))
+
+    def deposit_many(self, edges: np.ndarray, amounts: float | np.ndarray):
+        """
+        puts pheromones on many edges, an edge may occur multiple times
+
+        :param edges: edge ids
+        :param amounts: pheromones to put, one for all or one for each edge
+        """
+        changed = np.unique(edges)
+        old = self.pheromone[changed]
+        np.add.at(self.pheromone, edges, amounts)
+        new = self.pheromone[changed]
+
+        self.pheromoned_edges += int(np.count_nonzero(new > 0)) - int(np.count_nonzero(old > 0))
+        self.pheromone_total += float(new.sum() - old.sum())
+        self._pheromone_log_sum += float(self._x_log_x(new).sum() - self._x_log_x(old).sum())
+        if len(new) > 0:
+            self.pheromone_max = max(self.pheromone_max, float(new.max()))
+            self._pheromone_min_count -= int(np.count_nonzero(old == self._pheromone_min))
+
+        if self._transitions is not None:
+            self._transitions.invalidate_edges(edges)
+
+    def evaporate(self, rate: float):
+        """
+        reduces all pheromones by a given factor
+
+        :param rate: reducing factor
+        """
+        if rate > 0.0:
+            factor = 1 - rate
+            self.pheromone *= factor
+
+            if factor > 0:
+                self._pheromone_log_sum = factor * self._pheromone_log_sum \
+                    + factor * math.log(factor) * self.pheromone_total
+                self.pheromone_total *= factor
+                self.pheromone_max *= factor
+                self._pheromone_min *= factor
+            else:
+                self.recount_pheromones()
+
+            if self._transitions is not None:
+                self._transitions.scale((1 - rate) ** self._transitions.alpha)
+
+    def clear_pheromones(self):
+        """
+        sets all pheromones to 0
+        """
+        self.fill_pheromones(0.0)
+
+    def fill_pheromones(self, value: float):
+        """
+        sets the pheromones of all edges to the same value
+
+        :param value: pheromones of every edge
+        """
+        self.pheromone.fill(value)
+        self.recount_pheromones()
+        if self._transitions is not None:
+            self._transitions.invalidate_all()
+
+    def clamp_pheromones(self, tau_min: Optional[float] = None, tau_max: Optional[float] = None):
+        """
+        limits the pheromones of all edges to tau_min..tau_max like the MAX-MIN ant system.
+        The edges are only scanned, if the kept minimum or maximum is outside the limits.
+
+        :param tau_min: lower limit, no lower limit if None
+        :param tau_max: upper limit, no upper limit if None
+        """
+        if ((tau_min is None or self.pheromone_min >= tau_min)
+                and (tau_max is None or self.pheromone_max <= tau_max)):
+            return
+        np.clip(self.pheromone, tau_min, tau_max, out=self.pheromone)
+        self.recount_pheromones()
+        if self._transitions is not None:
+            self._transitions.invalidate_all()
+
+    @staticmethod
+    def _x_log_x(x: np.ndarray) -> np.ndarray:
+        """
+        :return: x * log(x) with 0 for x <= 0
+        """
+        return np.where(x > 0, x * np.log(np.where(x > 0, x, 1.0)), 0.0)
+
+    def count_pheromoned_edges(self) -> int:
+        """
+        :return: number of edges with pheromones, kept up to date without scanning the edges
+        """
+        return self.pheromoned_edges
+
+    def edge_ids(self, tails: np.ndarray, heads: np.ndarray) -> np.ndarray:
+        """
+        Finds the edges between pairs of nodes with one search for all pairs
+
+        :param tails: tail node id for every pair
+        :param heads: head node id for every pair
+        :return: edge id for every pair, -1 if there is no such edge
+        """
+        tails = np.asarray(tails, dtype=np.int64)
+        heads = np.asarray(heads, dtype=np.int64)
+        if self.edge_count == 0:
+            return np.full(len(tails), -1, dtype=np.int64)
+
+        # the edges are sorted by tail and head, so tail * node_count + head is sorted as well
+        if self._edge_keys is None:
+            self._edge_keys = self.sources * self.node_count + self.indices
+        keys = self._edge_keys
+        wanted = tails * self.node_count + heads
+        edges = np.minimum(np.searchsorted(keys, wanted), self.edge_count - 1)
+        return np.where(keys[edges] == wanted, edges, -1)
+
+    def path_edges(self, path: np.ndarray | list[int]) -> np.ndarray:
+        """
+        Finds the edges along a path with one search for all steps
+
+        :param path: node ids of the path
+        :return: edge id for every step of the path, -1 if there is no such edge (e.g. a trapped ant staying)
+        """
+        path = np.asarray(path, dtype=np.int64)
+        if len(path) < 2:
+            return np.full(0, -1, dtype=np.int64)
+        return self.edge_ids(path[:-1], path[1:])
+
+    def write_pheromones(self, G: nx.DiGraph[Any]):
+        """
+        writes the pheromones back to the graph. Edges, which were removed from the graph since it was compiled,
+        are skipped
+
+        :param G: the graph, which was compiled
+        """
+        if self.edge_count == 0:
+            return
+
+        # one pass over the edges of G, the compiled edges are found with one search for all of them
+        edges = list(G.edges(data=True))
+        tails = np.fromiter((self.node_index.get(tail, -1) for tail, _, _ in edges), dtype=np.int64, count=len(edges))
+        heads = np.fromiter((self.node_index.get(head, -1) for _, head, _ in edges), dtype=np.int64, count=len(edges))
+        # edges between nodes, which were added since the graph was compiled, are not compiled
+        compiled = (tails >= 0) & (heads >= 0)
+        edge_ids = np.full(len(edges), -1, dtype=np.int64)
+        edge_ids[compiled] = self.edge_ids(tails[compiled], heads[compiled])
+        pheromones = self.pheromone[np.maximum(edge_ids, 0)].tolist()
+
+        for (_, _, data), edge, pheromone in zip(edges, edge_ids.tolist(), pheromones):
+            if edge >= 0:
+                data['pheromone'] = pheromone
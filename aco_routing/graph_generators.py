@@ -0,0 +1,230 @@
+"""
+Generators for large graphs. Every generator works on integer node ids 0..n-1 and returns the edges as arrays
+(sources, targets) together with positions for the plot as an array with one row per node (or None, if the
+graph has no natural layout). All graphs are directed, links between two nodes are added in both directions.
+"""
+
+import string
+from typing import Optional
+
+import numpy as np
+
+
+def letter_labels(n: int) -> list[str]:
+    """
+    Generates letter names for node ids without an upper limit. All names have the same length, the shortest
+    possible one: A..Z for up to 26 nodes, AA..ZZ for up to 26² nodes, AAA..ZZZ for up to 26³ nodes and so on
+
+    :param n: number of names
+    :return: a list of n names
+    """
+
+    alphabet = np.array(list(string.ascii_uppercase))
+    length = 1
+    while 26 ** length < n:
+        length += 1
+
+    ids = np.arange(n)
+    names = alphabet[ids // 26 ** (length - 1) % 26]
+    for position in reversed(range(length - 1)):
+        names = np.char.add(names, alphabet[ids // 26 ** position % 26])
+    return names.tolist()
+
+
+def _both_directions(sources: np.ndarray, targets: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    :return: the links in both directions without self loops and duplicates
+    """
+
+    all_sources = np.concatenate((sources, targets))
+    all_targets = np.concatenate((targets, sources))
+    return _unique_edges(all_sources, all_targets)
+
+
+def _unique_edges(sources: np.ndarray, targets: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    :return: the edges sorted by source and target without self loops and duplicates
+    """
+
+    keep = sources != targets
+    sources, targets = sources[keep], targets[keep]
+    if len(sources) == 0:
+        return sources.astype(np.int64), targets.astype(np.int64)
+    n = int(max(sources.max(), targets.max())) + 1
+    keys = np.unique(sources.astype(np.int64) * n + targets)
+    return keys // n, keys % n
+
+
+def torus_2d(x: int, y: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    A 2d grid of x * y nodes, every node is linked to its 4 neighbors and the borders wrap around.
+    Node i * y + j is in row i and column j.
+
+    :param x: number of nodes in x direction
+    :param y: number of nodes in y direction
+    :return: sources, targets and positions
+    """
+
+    i, j = np.divmod(np.arange(x * y, dtype=np.int64), y)
+    sources = np.tile(i * y + j, 4)
+    targets = np.concatenate((((i - 1) % x) * y + j,
+                              ((i + 1) % x) * y + j,
+                              i * y + (j + 1) % y,
+                              i * y + (j - 1) % y))
+    if x <= 2 or y <= 2:
+        # neighbors in both directions are the same node
+        sources, targets = _unique_edges(sources, targets)
+    pos = np.stack((i * 100, j * 100), axis=1).astype(np.float64)
+    return sources, targets, pos
+
+
+def torus_3d(x: int, y: int, z: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    A 3d grid of x * y * z nodes, every node is linked to its 6 neighbors and the borders wrap around.
+    Node (i * y + j) * z + k is at i, j, k. The positions are an oblique projection of the layers.
+
+    :param x: number of nodes in x direction
+    :param y: number of nodes in y direction
+    :param z: number of nodes in z direction
+    :return: sources, targets and positions
+    """
+
+    ids = np.arange(x * y * z, dtype=np.int64)
+    i, rest = np.divmod(ids, y * z)
+    j, k = np.divmod(rest, z)
+
+    def node(a: np.ndarray, b: np.ndarray, c: np.ndarray) -> np.ndarray:
+        return (a * y + b) * z + c
+
+    sources = np.tile(ids, 6)
+    targets = np.concatenate((node((i - 1) % x, j, k), node((i + 1) % x, j, k),
+                              node(i, (j - 1) % y, k), node(i, (j + 1) % y, k),
+                              node(i, j, (k - 1) % z), node(i, j, (k + 1) % z)))
+    if x <= 2 or y <= 2 or z <= 2:
+        # neighbors in both directions are the same node
+        sources, targets = _unique_edges(sources, targets)
+    pos = np.stack((i * 100 + k * 40, j * 100 + k * 25), axis=1).astype(np.float64)
+    return sources, targets, pos
+
+
+def fully_linked(n: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    n nodes, every node is linked to all other nodes
+
+    :param n: number of nodes
+    :return: sources, targets and positions on a circle
+    """
+
+    sources = np.repeat(np.arange(n, dtype=np.int64), n)
+    targets = np.tile(np.arange(n, dtype=np.int64), n)
+    sources, targets = _unique_edges(sources, targets)
+    return sources, targets, _circle(n)
+
+
+def small_world(n: int, k: int = 4, p: float = 0.1, rng: Optional[np.random.Generator] = None
+                ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Watts-Strogatz small world graph: a ring, where every node is linked to its k nearest neighbors,
+    and every link is rewired to a random node with probability p
+
+    :param n: number of nodes
+    :param k: number of nearest neighbors in the ring (even)
+    :param p: probability to rewire a link
+    :param rng: random number generator
+    :return: sources, targets and positions on a circle
+    """
+
+    rng = rng if rng is not None else np.random.default_rng()
+    nodes = np.arange(n, dtype=np.int64)
+    sources = np.repeat(nodes, k // 2)
+    targets = (sources + np.tile(np.arange(1, k // 2 + 1), n)) % n
+
+    rewire = rng.random(len(targets)) < p
+    targets[rewire] = rng.integers(n, size=int(np.count_nonzero(rewire)))
+
+    sources, targets = _both_directions(sources, targets)
+    return sources, targets, _circle(n)
+
+
+def scale_free(n: int, m: int = 2, rng: Optional[np.random.Generator] = None) -> tuple[np.ndarray, np.ndarray, None]:
+    """
+    Barabasi-Albert scale free graph: every new node is linked to m earlier nodes with a probability
+    proportional to their degree. Uses the edge list sampling of Batagelj and Brandes, where the
+    references to earlier edges are resolved for all edges at once.
+
+    :param n: number of nodes
+    :param m: number of links of every new node
+    :param rng: random number generator
+    :return: sources, targets and None for the positions
+    """
+
+    rng = rng if rng is not None else np.random.default_rng()
+    slots = 2 * n * m
+    # slot 2e is the new node of link e, slot 2e + 1 copies a random earlier slot
+    ends = np.empty(slots, dtype=np.int64)
+    ends[0::2] = np.repeat(np.arange(n, dtype=np.int64), m)
+    odd = np.arange(1, slots, 2)
+    pointer = np.floor(rng.random(len(odd)) * odd).astype(np.int64)
+    references = np.zeros(slots, dtype=np.int64)
+    references[odd] = pointer
+
+    # follow references to odd slots until an even slot (a known node) is reached
+    unresolved = pointer % 2 == 1
+    while unresolved.any():
+        pointer[unresolved] = references[pointer[unresolved]]
+        unresolved = pointer % 2 == 1
+    ends[odd] = ends[pointer]
+
+    sources, targets = _both_directions(ends[0::2], ends[1::2])
+    return sources, targets, None
+
+
+def random_geometric(n: int, radius: float = 0.1, rng: Optional[np.random.Generator] = None
+                     ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    n random points in the unit square, points closer than radius are linked.
+    The points are sorted into cells of the size of the radius, so only points of neighboring cells are compared.
+
+    :param n: number of nodes
+    :param radius: maximum distance of linked nodes
+    :param rng: random number generator
+    :return: sources, targets and positions (the points scaled by 1000)
+    """
+
+    rng = rng if rng is not None else np.random.default_rng()
+    points = rng.random((n, 2))
+    cells_per_row = max(int(1 / radius), 1)
+    cell_xy = np.minimum((points * cells_per_row).astype(np.int64), cells_per_row - 1)
+    cells = cell_xy[:, 0] * cells_per_row + cell_xy[:, 1]
+    order = np.argsort(cells, kind='stable')
+    cell_start = np.searchsorted(cells[order], np.arange(cells_per_row ** 2 + 1))
+
+    all_sources: list[np.ndarray] = []
+    all_targets: list[np.ndarray] = []
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            neighbor_x, neighbor_y = cell_xy[:, 0] + dx, cell_xy[:, 1] + dy
+            inside = ((neighbor_x >= 0) & (neighbor_x < cells_per_row)
+                      & (neighbor_y >= 0) & (neighbor_y < cells_per_row))
+            nodes = np.flatnonzero(inside)
+            neighbor_cells = neighbor_x[nodes] * cells_per_row + neighbor_y[nodes]
+            starts, stops = cell_start[neighbor_cells], cell_start[neighbor_cells + 1]
+            counts = stops - starts
+            sources = np.repeat(nodes, counts)
+            offsets = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+            targets = order[np.repeat(starts, counts) + offsets]
+            close = np.sum((points[sources] - points[targets]) ** 2, axis=1) < radius ** 2
+            all_sources.append(sources[close])
+            all_targets.append(targets[close])
+
+    sources, targets = _unique_edges(np.concatenate(all_sources), np.concatenate(all_targets))
+    return sources, targets, points * 1000
+
+
+def _circle(n: int) -> np.ndarray:
+    """
+    :return: positions of n nodes on a circle
+    """
+
+    angles = 2 * np.pi * np.arange(n) / max(n, 1)
+    return np.stack((np.cos(angles), np.sin(angles)), axis=1) * 1000
@@ -0,0 +1,138 @@
+"""
+Layouts for the plot. The spring layout of networkx compares all pairs of nodes in every iteration and takes
+seconds for a few thousand nodes, so large graphs use a fast layout, which only looks at the edges.
+Nodes, which already have a position, keep it.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Optional
+
+import networkx as nx
+import numpy as np
+
+# graphs with more nodes use the fast layout, if the backend is 'auto'
+SPRING_LAYOUT_MAX_NODES = 500
+
+LAYOUT_BACKENDS = ['auto', 'spring', 'fast']
+
+
+def layout(G: nx.DiGraph[Any], pos: Optional[dict[Any, Any]] = None, backend: str = 'auto',
+           rng: Optional[np.random.Generator] = None) -> dict[Any, Any]:
+    """
+    Places all nodes of G, which have no position yet
+
+    :param G: the graph
+    :param pos: known positions, which are kept, None if no node is placed yet
+    :param backend: 'spring' (networkx), 'fast' (for large graphs) or 'auto' (by the number of nodes)
+    :param rng: random number generator for the start positions
+    :return: positions of all nodes
+    """
+
+    pos = {node: xy for node, xy in pos.items() if node in G} if pos else {}
+    if len(pos) == G.number_of_nodes():
+        return pos
+    if backend not in LAYOUT_BACKENDS:
+        raise ValueError(f"Unknown layout backend {backend}, use one of {', '.join(LAYOUT_BACKENDS)}")
+
+    if backend == 'spring' or (backend == 'auto' and G.number_of_nodes() <= SPRING_LAYOUT_MAX_NODES):
+        if pos:
+            return nx.spring_layout(G, pos=pos, fixed=list(pos))
+        return nx.spring_layout(G)
+    return fast_layout(G, pos, rng=rng)
+
+
+def fast_layout(G: nx.DiGraph[Any], pos: Optional[dict[Any, Any]] = None, iterations: int = 100,
+                rng: Optional[np.random.Generator] = None) -> dict[Any, Any]:
+    """
+    Approximates the spectral layout by power iteration: every node moves to the mean of its neighbors,
+    then the coordinates are centered, made orthogonal and scaled, so the graph can't collapse to a point.
+    Costs O(edges) per iteration. Nodes with a known position are fixed and pull their neighbors.
+
+    :param G: the graph
+    :param pos: known positions, which are kept
+    :param iterations: number of smoothing iterations
+    :param rng: random number generator for the start positions
+    :return: positions of all nodes
+    """
+
+    rng = rng if rng is not None else np.random.default_rng()
+    pos = pos if pos is not None else {}
+    nodes = list(G.nodes())
+    node_index = {node: i for i, node in enumerate(nodes)}
+    n = len(nodes)
+    if n == 0:
+        return {}
+
+    edges = np.array([(node_index[tail], node_index[head]) for tail, head in G.edges()], dtype=np.int64).reshape(-1, 2)
+    sources = np.concatenate((edges[:, 0], edges[:, 1]))
+    targets = np.concatenate((edges[:, 1], edges[:, 0]))
+    degree = np.bincount(sources, minlength=n).astype(np.float64)
+
+    fixed = np.array([node in pos for node in nodes])
+    coordinates = rng.random((n, 2)) - 0.5
+    if fixed.any():
+        coordinates[fixed] = np.array([pos[node] for node in nodes if node in pos], dtype=np.float64)
+
+    for _ in range(iterations):
+        neighbor_sum = np.stack((np.bincount(sources, weights=coordinates[targets, 0], minlength=n),
+                                 np.bincount(sources, weights=coordinates[targets, 1], minlength=n)), axis=1)
+        moved = 0.5 * coordinates + 0.5 * neighbor_sum / np.maximum(degree, 1)[:, None]
+        # nodes without neighbors stay where they are
+        moved[degree == 0] = coordinates[degree == 0]
+        if fixed.any():
+            moved[fixed] = coordinates[fixed]
+        else:
+            moved = _orthonormalize(moved)
+        coordinates = moved
+
+    return {node: coordinates[i] for i, node in enumerate(nodes)}
+
+
+def _orthonormalize(coordinates: np.ndarray) -> np.ndarray:
+    """
+    :return: the coordinates centered, with y orthogonal to x and both scaled to the range -1..1
+    """
+
+    coordinates = coordinates - coordinates.mean(axis=0)
+    x, y = coordinates[:, 0], coordinates[:, 1]
+    x_norm = np.dot(x, x)
+    if x_norm > 0:
+        y = y - np.dot(x, y) / x_norm * x
+    coordinates = np.stack((x, y), axis=1)
+    scale = np.abs(coordinates).max(axis=0)
+    return coordinates / np.where(scale > 0, scale, 1)
+
+
+def place_new_nodes(G: nx.DiGraph[Any], pos: dict[Any, Any], nodes: list[Any],
+                    rng: Optional[np.random.Generator] = None) -> dict[Any, Any]:
+    """
+    Places nodes without a position next to the mean of their placed neighbors, all other nodes keep their
+    position. Used when single nodes are added, so the graph doesn't jump.
+
+    :param G: the graph
+    :param pos: known positions, changed in place
+    :param nodes: nodes to place, if they have no position yet
+    :param rng: random number generator for the offset
+    :return: the positions
+    """
+
+    rng = rng if rng is not None else np.random.default_rng()
+    if pos:
+        coordinates = np.array(list(pos.values()), dtype=np.float64)
+        spread = float(np.max(coordinates.max(axis=0) - coordinates.min(axis=0)))
+        center = coordinates.mean(axis=0)
+    else:
+        spread, center = 1.0, np.zeros(2)
+    spread = spread if spread > 0 else 1.0
+
+    for node in nodes:
+        if node in pos or node not in G:
+            continue
+        neighbors = [neighbor for neighbor in nx.all_neighbors(G, node) if neighbor in pos]
+        if neighbors:
+            anchor = np.mean([pos[neighbor] for neighbor in neighbors], axis=0)
+            pos[node] = anchor + (rng.random(2) - 0.5) * spread * 0.1
+        else:
+            pos[node] = center + (rng.random(2) - 0.5) * spread
+    return pos
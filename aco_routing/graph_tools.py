@@ -1,8 +1,18 @@
+from __future__ import annotations
+
 import json
-import string
+from typing import TYPE_CHECKING, Any, Optional
+
 import networkx as nx
 import numpy as np
 
+import graph_generators
+import graph_layout
+
+if TYPE_CHECKING:
+    # only for the annotations, plot imports this module
+    from plot import Plot
+
 
 class GraphTools:
     """
@@ -10,54 +20,40 @@ class GraphTools:
     """
 
     @staticmethod
-    def load_config_from_json(path):
+    def load_config_from_json(path: str, layout: bool = True) -> tuple[nx.DiGraph[Any], list[dict[str, Any]],
+                                                                       dict[str, Any], dict[Any, Any], dict[Any, int]]:
         """
         Load the configuration from a JSON file and construct the graph accordingly.
+        Positions stored in the config are used, only nodes without a position are laid out.
 
         :param path: The file path to the JSON configuration file.
+        :param layout: Lay out the nodes without position, positions are only needed by the plot.
         :return: A tuple containing the constructed graph, ants configuration, plot configuration, and node positions.
         """
 
-        G = nx.DiGraph()
+        G: nx.DiGraph[Any] = nx.DiGraph()
 
         try:
             # Opening JSON file
             with open(path, 'r') as f:
-                data = json.load(f)
+                data: dict[str, Any] = json.load(f)
         except (FileNotFoundError, json.JSONDecodeError) as e:
             raise e
 
+        pos: Optional[dict[Any, Any]] = None
+        numeric_ids = False
         if 'macro' in data['nodes']:
             macro_config = data['nodes']['macro']
-            if macro_config['type'] == 'fully_linked_graph':
-                nodes = GraphTools.generate_nodes(macro_config['x'])
-                for node in nodes:
-                    exclusive_nodes = nodes.copy()
-                    exclusive_nodes.remove(node)
-                    GraphTools.add_edges_from_outgoing_node(G, node, exclusive_nodes)
-            elif macro_config['type'] == '2d_grid_torus':
-                x = macro_config['x']
-                y = macro_config['y']
-                pos = {}
-                nodes = GraphTools.generate_nodes(x * y)
-                nodes_2d = np.array(nodes).reshape(x, y)
-                for i in range(x):
-                    for j in range(y):
-                        node = nodes_2d[i, j]
-                        neighborhood_nodes = [
-                            nodes_2d[(i - 1) % x, j],
-                            nodes_2d[(i + 1) % x, j],
-                            nodes_2d[i, (j + 1) % y],
-                            nodes_2d[i, (j - 1) % y]]
-                        GraphTools.add_edges_from_outgoing_node(G, node, neighborhood_nodes)
-                        pos[node] = np.array([i * 100, j * 100])
-            elif macro_config['type'] == 'small_world':
-                # Add your small world graph logic here
-                pass
+            numeric_ids = macro_config.get('numeric_ids', False)
+            pos = GraphTools.add_macro(G, macro_config)
 
         # Other nodes configuration
         for node, node_config in data['nodes'].items():
             if node != 'macro':
+                if numeric_ids:
+                    node = GraphTools.numeric_id(node)
+                    node_config = dict(node_config)
+                    node_config['edges'] = [GraphTools.numeric_id(target) for target in node_config.get('edges', [])]
                 target_nodes = node_config.get('edges', [])
                 edge_weights = node_config.get('weights', None)
                 pheromones = node_config.get('pheromones', None)
@@ -65,50 +61,46 @@ class GraphTools:
                 GraphTools.add_edges_from_outgoing_node(G, node, target_nodes, edge_weights=edge_weights,
                                                         edge_pheromones=pheromones, node_value=node_value)
 
-        if 'pos' not in locals():
-            pos = nx.spring_layout(G)  # positions for all nodes if not 2d_grid_torus
-
         # Ensure default values for ants and plot configurations
         ants_config = data.get('ants', {})
         plot_config = data.get('plot', {})
 
+        # positions of a previous layout
+        pos = pos if pos is not None else {}
+        for node, xy in data.get('pos', {}).items():
+            pos[GraphTools.numeric_id(node) if numeric_ids else node] = np.array(xy, dtype=np.float64)
+        if layout:
+            # place the nodes, which have no position from the macro or the config, around the placed nodes
+            pos = graph_layout.layout(G, pos, plot_config.get('layout', 'auto'))
+
         visited_nodes = data.get('visited_nodes', {})  # Load visit counts
+        if numeric_ids:
+            visited_nodes = {GraphTools.numeric_id(node): visits for node, visits in visited_nodes.items()}
 
         return G, ants_config, plot_config, pos, visited_nodes
 
     @staticmethod
-    def load_default_config():
+    def load_default_config() -> tuple[nx.DiGraph[Any], list[dict[str, Any]], dict[str, Any], dict[Any, Any],
+                                       dict[Any, int]]:
         """
         Load the default configuration.
 
         :return: A tuple containing the constructed graph, ants configuration, plot configuration, and node positions.
         """
-        G = nx.DiGraph()
+        G: nx.DiGraph[Any] = nx.DiGraph()
 
-        default_macro_config = {
+        default_macro_config: dict[str, Any] = {
             'type': '2d_grid_torus',
             'x': 9,
             'y': 9
         }
 
-        nodes = GraphTools.generate_nodes(default_macro_config['x'] * default_macro_config['y'])
-        nodes_2d = np.array(nodes).reshape(default_macro_config['x'], default_macro_config['y'])
-        pos = {}
-        for i in range(default_macro_config['x']):
-            for j in range(default_macro_config['y']):
-                node = nodes_2d[i, j]
-                neighborhood_nodes = [
-                    nodes_2d[(i - 1) % default_macro_config['x'], j],
-                    nodes_2d[(i + 1) % default_macro_config['x'], j],
-                    nodes_2d[i, (j + 1) % default_macro_config['y']],
-                    nodes_2d[i, (j - 1) % default_macro_config['y']]]
-                GraphTools.add_edges_from_outgoing_node(G, node, neighborhood_nodes)
-                pos[node] = np.array([i * 100, j * 100])
+        pos = GraphTools.add_2d_grid_torus(G, default_macro_config['x'], default_macro_config['y'])
 
         # Setting a specific value for node "BX"
         G.nodes['BX']['value'] = 1
 
-        default_ants_config = [
+        default_ants_config: list[dict[str, Any]] = [
             {
                 "class": "minority",
                 "ant_max_steps": 35,
@@ -129,7 +121,7 @@ class GraphTools:
             }
         ]
 
-        default_plot_config = {
+        default_plot_config: dict[str, Any] = {
             'show_edge_parameters': False,
             'show_ant_animation': False,
             'cmap_edges': 'Purples',
@@ -142,77 +134,169 @@ class GraphTools:
             'cmap_nodes': 'winter'
         }
 
-        visited_nodes = {}
+        visited_nodes: dict[Any, int] = {}
 
         return G, default_ants_config, default_plot_config, pos, visited_nodes
 
+    @staticmethod
+    def add_macro(G: nx.DiGraph[Any], macro_config: dict[str, Any]) -> Optional[dict[Any, np.ndarray]]:
+        """
+        Adds a generated graph as described by the macro of a config file.
+        Types: 2d_grid_torus (x, y), 3d_grid_torus (x, y, z), fully_linked_graph (x), small_world (n, k, p),
+        scale_free (n, m) and random_geometric (n, radius). Random graphs take an optional seed.
+        With numeric_ids the nodes are named 0..n-1 instead of letters.
+
+        :param G: the graph
+        :param macro_config: the macro of the config file
+        :return: positions of the nodes or None, if the graph has no natural layout
+        """
+        macro_type = macro_config['type']
+        rng = np.random.default_rng(macro_config.get('seed', None))
+        n = macro_config.get('n', macro_config.get('x', 9))
+
+        if macro_type == '2d_grid_torus':
+            x, y = macro_config['x'], macro_config['y']
+            n = x * y
+            sources, targets, positions = graph_generators.torus_2d(x, y)
+        elif macro_type == '3d_grid_torus':
+            x, y, z = macro_config['x'], macro_config['y'], macro_config['z']
+            n = x * y * z
+            sources, targets, positions = graph_generators.torus_3d(x, y, z)
+        elif macro_type == 'fully_linked_graph':
+            sources, targets, positions = graph_generators.fully_linked(n)
+            positions = None  # laid out like the other graphs without grid
+        elif macro_type == 'small_world':
+            sources, targets, positions = graph_generators.small_world(n, macro_config.get('k', 4),
+                                                                       macro_config.get('p', 0.1), rng)
+        elif macro_type == 'scale_free':
+            sources, targets, positions = graph_generators.scale_free(n, macro_config.get('m', 2), rng)
+        elif macro_type == 'random_geometric':
+            sources, targets, positions = graph_generators.random_geometric(n, macro_config.get('radius', 0.1), rng)
+        else:
+            raise ValueError(f"Unknown macro type {macro_type}")
+
+        return GraphTools.add_generated_graph(G, n, sources, targets, positions, macro_config.get('numeric_ids', False))
+
+    @staticmethod
+    def add_generated_graph(G: nx.DiGraph[Any], node_count: int, sources: np.ndarray, targets: np.ndarray,
+                            positions: Optional[np.ndarray] = None,
+                            numeric_ids: bool = False) -> Optional[dict[Any, np.ndarray]]:
+        """
+        Adds the nodes and edges of a generator from graph_generators with all edges at once
+
+        :param G: the graph
+        :param node_count: number of nodes
+        :param sources: tail node id for every edge
+        :param targets: head node id for every edge
+        :param positions: position for every node id or None
+        :param numeric_ids: if the nodes are named by their ids instead of letters
+        :return: positions of the nodes or None
+        """
+        names = list(range(node_count)) if numeric_ids else GraphTools.generate_nodes(node_count)
+        G.add_nodes_from(names, value=0)
+        if numeric_ids:
+            G.add_edges_from(zip(sources.tolist(), targets.tolist()), weight=1, pheromone=0.0)
+        else:
+            G.add_edges_from(((names[tail], names[head]) for tail, head in zip(sources.tolist(), targets.tolist())),
+                             weight=1, pheromone=0.0)
+
+        if positions is None:
+            return None
+        return dict(zip(names, positions))
+
+    @staticmethod
+    def add_2d_grid_torus(G: nx.DiGraph[Any], x: int, y: int) -> dict[Any, np.ndarray]:
+        """
+        Adds a 2d grid of x * y nodes, where every node is linked to its 4 neighbors and the borders wrap around
+
+        :param G: the graph
+        :param x: number of nodes in x direction
+        :param y: number of nodes in y direction
+        :return: positions of the nodes
+        """
+        sources, targets, positions = graph_generators.torus_2d(x, y)
+        return GraphTools.add_generated_graph(G, x * y, sources, targets, positions)
+
+    @staticmethod
+    def numeric_id(node: Any) -> Any:
+        """
+        converts a node name of a config file to a numeric id, config files store the names as strings
+
+        :param node: a node name
+        :return: the id as int or the name, if it is not a number
+        """
+        try:
+            return int(node)
+        except (TypeError, ValueError):
+            return node
+
     @staticmethod
     def generate_nodes(n: int) -> list[str]:
         """
-        Generates node names
+        Generates node names, see graph_generators.letter_labels()
 
         :return: a list[str] of node names
         """
-        alphabet = list(string.ascii_uppercase)
-        if n <= 26:
-            return alphabet[0:n]
-        elif n <= 26*26:
-            double_alphabet = [letter1 + letter2 for letter1 in alphabet for letter2 in alphabet]
-            return double_alphabet[0:n]
-        elif n <= 26*26*26:
-            double_alphabet = [letter1 + letter2 for letter1 in alphabet for letter2 in alphabet]
-            triple_alphabet = [letter + needle for letter in alphabet for needle in double_alphabet]
-            return triple_alphabet[0:n]
+        return graph_generators.letter_labels(n)
 
     @staticmethod
-    def save_config_as_json(self):
+    def save_config_as_json(plot: Plot) -> dict[str, Any]:
         """
         Generate the configuration data for the wave and plot, formatted for JSON serialization.
 
-        :param self: The instance of the class containing the configuration data.
+        :param plot: The instance of the class containing the configuration data.
         :return: A dictionary containing the full configuration data for the wave and plot.
         :rtype: dict
         """
-        wave_config = self.colony.waves[0].to_dict()
+        wave_config = plot.colony.waves[0].to_dict()
 
-        config_data = {
+        config_data: dict[str, Any] = {
             'nodes': {
                 'macro': {
-                    'type': self.plot_config.get('macro_type', '2d_grid_torus'),
-                    'x': self.plot_config.get('macro_x', 9),
-                    'y': self.plot_config.get('macro_y', 9)
+                    'type': plot.plot_config.get('macro_type', '2d_grid_torus'),
+                    'x': plot.plot_config.get('macro_x', 9),
+                    'y': plot.plot_config.get('macro_y', 9)
                 }
             },
             'ants': [
                 wave_config
             ],
             'plot': {
-                'show_edge_parameters': self.show_edge_parameters,
-                'show_ant_animation': self.show_ant_animation,
-                'node_label_color': self.node_label_color,
-                'node_label_size': self.node_label_size,
-                'edge_weight_label_color': self.edge_weight_label_color,
-                'edge_pheromone_label_color': self.edge_pheromone_label_color,
-                'ant_animation_color': self.ant_animation_color,
-                'cmap_edges': self.plot_config.get('cmap_edges', 'cool'),
-                'cmap_nodes': self.plot_config.get('cmap_nodes', 'winter')
+                'show_edge_parameters': plot.show_edge_parameters,
+                'show_ant_animation': plot.show_ant_animation,
+                'node_label_color': plot.node_label_color,
+                'node_label_size': plot.node_label_size,
+                'edge_weight_label_color': plot.edge_weight_label_color,
+                'edge_pheromone_label_color': plot.edge_pheromone_label_color,
+                'ant_animation_color': plot.ant_animation_color,
+                'cmap_edges': plot.plot_config.get('cmap_edges', 'cool'),
+                'cmap_nodes': plot.plot_config.get('cmap_nodes', 'winter'),
+                'full_speed': plot.full_speed,
+                'replay_interval': plot.replay_interval,
+                'letter_labels': plot.letter_labels,
+                'layout': plot.plot_config.get('layout', 'auto')
             },
-            'visited_nodes': self.colony.visited_nodes  # Add visit counts
+            'visited_nodes': plot.colony.visited_nodes,  # Add visit counts
+            'pos': {node: [float(x), float(y)] for node, (x, y) in plot.pos.items()}  # Keep the layout
         }
+        if plot.G.number_of_nodes() > 0 and all(isinstance(node, int) for node in plot.G.nodes):
+            # JSON keys are strings, the ids are converted back on loading
+            config_data['nodes']['macro']['numeric_ids'] = True
 
-        for node, data in self.G.nodes(data=True):
+        for node, data in plot.G.nodes(data=True):
             config_data['nodes'][node] = {
                 'value': data.get('value', 0),
-                'edges': list(self.G.successors(node)),
-                'weights': [self.G[node][succ]['weight'] for succ in self.G.successors(node)],
-                'pheromones': [self.G[node][succ]['pheromone'] for succ in self.G.successors(node)]
+                'edges': list(plot.G.successors(node)),
+                'weights': [plot.G[node][succ]['weight'] for succ in plot.G.successors(node)],
+                'pheromones': [plot.G[node][succ]['pheromone'] for succ in plot.G.successors(node)]
             }
 
         return config_data
 
     @staticmethod
-    def add_edges_from_outgoing_node(G: nx.DiGraph, outgoing_node: str, target_nodes: list[str], edge_weights=None,
-                                     edge_pheromones=None, node_value=0):
+    def add_edges_from_outgoing_node(G: nx.DiGraph[Any], outgoing_node: str, target_nodes: list[str],
+                                     edge_weights: Optional[list[float]] = None,
+                                     edge_pheromones: Optional[list[float]] = None, node_value: float = 0):
         """
         Add edges from an outgoing node to a list of target nodes with optional edge weights.
 
@@ -240,8 +324,8 @@ class GraphTools:
         nx.set_node_attributes(G, {outgoing_node: {'value': node_value}})
 
     @staticmethod
-    def add_edge(G: nx.DiGraph, tail: str, head: str, weight: float, tail_value: float = None, head_value: float = None,
-                 pos: dict = None) -> dict:
+    def add_edge(G: nx.DiGraph[Any], tail: str, head: str, weight: float, tail_value: Optional[float] = None,
+                 head_value: Optional[float] = None, pos: Optional[dict[Any, Any]] = None) -> dict[Any, Any]:
         """
         Adds an edge to the graph
 
@@ -251,11 +335,11 @@ class GraphTools:
         :param weight: weight of the edge
         :param tail_value: value parameter for the tail node
         :param head_value: value parameter for the head node
-        :param pos: current positions of the nodes
+        :param pos: current positions of the nodes, new nodes are placed next to their neighbors
         :return: new positions for the nodes
         """
         if pos is None:
-            pos = []
+            pos = {}
 
         try:
             weight = float(weight)
@@ -285,17 +369,17 @@ class GraphTools:
 
         # Add the edge with weight and pheromone
         G.add_edge(tail, head, weight=weight, pheromone=0.0)
-        return nx.spring_layout(G)
+        return graph_layout.place_new_nodes(G, pos, [tail, head])
 
     @staticmethod
-    def change_node_value(G: nx.DiGraph, node: str, value):
+    def change_node_value(G: nx.DiGraph[Any], node: str, value: float):
         try:
             nx.set_node_attributes(G, {node: {'value': value}})
         except nx.NetworkXError:  # Node doesn't exist
             pass
 
     @staticmethod
-    def delete_edge(G: nx.DiGraph, tail: str, head: str, pos: dict) -> dict:
+    def delete_edge(G: nx.DiGraph[Any], tail: str, head: str, pos: dict[Any, Any]) -> dict[Any, Any]:
         # Removes the edges of a graph
         try:
             G.remove_edge(tail, head)
@@ -303,10 +387,10 @@ class GraphTools:
             # Removes the node if no edges are connected to it
             if G.degree[tail] == 0:
                 G.remove_node(tail)
-                pos.pop(tail)
+                pos.pop(tail, None)
             if G.degree[head] == 0:
                 G.remove_node(head)
-                pos.pop(head)
+                pos.pop(head, None)
         except nx.NetworkXError:  # Edge doesn't exist
             pass
 
@@ -0,0 +1,181 @@
+import argparse
+import json
+import os
+import signal
+import threading
+import time
+from types import FrameType
+from typing import Any, Callable, Optional
+
+import checkpoint
+from ant_colony_runner import AntColonyRunner
+from graph_tools import GraphTools
+from metrics import sink_for_path
+from storage import MemmapStorage
+
+
+def collect_results(colony: AntColonyRunner) -> dict[str, Any]:
+    """
+    Collects the final state of a colony in a JSON-compatible dictionary
+
+    :param colony: a finished colony
+    :return: a dict with pheromones, visits and the convergence of the run
+    """
+
+    colony.sync_graph()
+
+    edge_traversals = colony.edge_traversals()
+    pheromones: list[dict[str, Any]] = []
+    for tail, head, data in colony.G.edges(data=True):
+        pheromones.append({
+            'tail': tail,
+            'head': head,
+            'weight': float(data['weight']),
+            'pheromone': float(data['pheromone']),
+            'traversals': edge_traversals.get((tail, head), 0)
+        })
+
+    return {
+        'waves': [wave.to_dict() for wave in colony.waves],
+        'pheromones': pheromones,
+        'visited_nodes': colony.visited_nodes,
+        'convergence': colony.convergence
+    }
+
+
+def _drop_message(msg: str):
+    """
+    log callback of quiet runs, the messages are dropped
+    """
+    pass
+
+
+def run_headless(config_path: str, output_path: Optional[str] = None,
+                 log_callback: Optional[Callable[[str], Any]] = None, vectorized: bool = False,
+                 wave_overrides: Optional[dict[str, Any]] = None, seed: Optional[int | list[int]] = None,
+                 metrics_path: Optional[str] = None, checkpoint_path: Optional[str] = None,
+                 checkpoint_every: Optional[int] = None, checkpoint_interval: Optional[float] = None,
+                 resume: bool = False, storage_path: Optional[str] = None, jit: bool = False) -> dict[str, Any]:
+    """
+    Runs all waves of a configuration without the plot and as fast as possible (all sleeps are ignored).
+    With a checkpoint path, checkpoints are saved while running and SIGTERM or SIGINT stop the run after the
+    current step with a last checkpoint, so the run can be resumed later.
+
+    :param config_path: file path of the config file
+    :param output_path: file path for the results as JSON, nothing is written if None
+    :param log_callback: function, which receives the log messages, messages are dropped if None
+    :param vectorized: step the ants of all waves together with array operations
+    :param wave_overrides: wave parameters (keys as in the config file), which replace the values of all waves
+    :param seed: seed (int or list of ints) for a reproducible run
+    :param metrics_path: file path for the metrics of every iteration (.csv, .jsonl or .parquet), none if None
+    :param checkpoint_path: file path for the checkpoints, no checkpoints if None
+    :param checkpoint_every: iterations between two checkpoints
+    :param checkpoint_interval: seconds between two checkpoints
+    :param resume: continue the run of an existing checkpoint at checkpoint_path, the config, vectorized, jit,
+                   wave_overrides and seed of the checkpoint are used
+    :param storage_path: directory for memory-mapped pheromones, weights and visits, kept in memory if None
+    :param jit: step the ants of all waves with the compiled kernels, if numba is installed
+    :return: the results of the run, see collect_results()
+    """
+
+    if log_callback is None:
+        log_callback = _drop_message
+
+    metrics_sinks = [sink_for_path(metrics_path)] if metrics_path else []
+    storage = MemmapStorage(storage_path) if storage_path else None
+    checkpointer = None
+    if checkpoint_path:
+        checkpointer = checkpoint.AutoCheckpoint(checkpoint_path, checkpoint_every, checkpoint_interval)
+
+    if resume and checkpoint_path and os.path.exists(checkpoint_path):
+        colony, _ = checkpoint.load_checkpoint(checkpoint_path, log_callback, ignore_sleep=True,
+                                               metrics_sinks=metrics_sinks, checkpointer=checkpointer,
+                                               storage=storage)
+        # the sinks get the records of the run so far again, so the files are complete
+        for record in colony.convergence:
+            for sink in metrics_sinks:
+                sink.write(record)
+        log_callback(f"Resuming {checkpoint_path} at wave {colony.wave_index} iteration {colony.iteration}")
+    else:
+        G, ants_config, _, pos, visited_nodes = GraphTools.load_config_from_json(config_path, layout=False)
+        for wave_conf in ants_config:
+            if vectorized:
+                wave_conf['vectorized'] = True
+            if jit:
+                wave_conf['jit'] = True
+            if wave_overrides:
+                wave_conf.update(wave_overrides)
+
+        colony = AntColonyRunner(G, ants_config, log_callback, pos=pos, ignore_sleep=True, seed=seed,
+                                 metrics_sinks=metrics_sinks, checkpointer=checkpointer, storage=storage)
+        colony.visited_nodes = visited_nodes
+
+    previous_handlers: dict[int, Any] = {}
+    if checkpointer is not None and threading.current_thread() is threading.main_thread():
+        def stop_on_signal(signum: int, frame: Optional[FrameType]):
+            colony.stop()
+
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            previous_handlers[signum] = signal.signal(signum, stop_on_signal)
+
+    start_time = time.perf_counter()
+    try:
+        colony.run()
+        if checkpointer is not None:
+            # the last checkpoint is the finished run or the position, where the run was stopped
+            checkpointer.save(colony)
+    finally:
+        for signum, handler in previous_handlers.items():
+            signal.signal(signum, handler)
+        for sink in metrics_sinks:
+            sink.close()
+
+    results = collect_results(colony)
+    results['config'] = config_path
+    results['seed'] = colony.seed_sequence.entropy
+    results['runtime'] = time.perf_counter() - start_time
+    results['finished'] = colony.stage == 'finished'
+
+    if output_path:
+        with open(output_path, 'w') as f:
+            json.dump(results, f, indent=4)
+
+    return results
+
+
+def main():
+    """
+    Command line entry point for headless runs
+    """
+
+    parser = argparse.ArgumentParser(description='Runs an ant colony configuration without the plot')
+    parser.add_argument('config', help='path to the config file')
+    parser.add_argument('-o', '--output', help='path for the results, default: <config>_results.json')
+    parser.add_argument('-q', '--quiet', action='store_true', help='do not print the log messages')
+    parser.add_argument('--vectorized', action='store_true', help='step the ants of all waves together')
+    parser.add_argument('--jit', action='store_true', help='step the ants with compiled kernels (needs numba)')
+    parser.add_argument('--seed', type=int, default=None, help='seed for a reproducible run')
+    parser.add_argument('--metrics', help='path for the metrics of every iteration (.csv, .jsonl or .parquet)')
+    parser.add_argument('--checkpoint', help='path for checkpoints (.npz), a last one is saved when stopped')
+    parser.add_argument('--checkpoint-every', type=int, default=None, help='iterations between two checkpoints')
+    parser.add_argument('--checkpoint-interval', type=float, default=None, help='seconds between two checkpoints')
+    parser.add_argument('--resume', action='store_true', help='continue the run of the checkpoint, if it exists')
+    parser.add_argument('--storage', help='directory for memory-mapped pheromones, weights and visits')
+    args = parser.parse_args()
+
+    output_path = args.output
+    if output_path is None:
+        output_path = os.path.splitext(args.config)[0] + '_results.json'
+
+    results = run_headless(args.config, output_path, log_callback=None if args.quiet else print,
+                           vectorized=args.vectorized, seed=args.seed, metrics_path=args.metrics,
+                           checkpoint_path=args.checkpoint, checkpoint_every=args.checkpoint_every,
+                           checkpoint_interval=args.checkpoint_interval, resume=args.resume,
+                           storage_path=args.storage, jit=args.jit)
+    print(f"Results written to {output_path} after {results['runtime']:.2f} s")
+    if not results['finished'] and args.checkpoint:
+        print(f"Run stopped, continue it with --checkpoint {args.checkpoint} --resume")
+
+
+if __name__ == '__main__':
+    main()
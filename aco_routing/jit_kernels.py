@@ -0,0 +1,273 @@
+"""
+Optional compiled kernels for the ants. If numba is installed, one step of all ants of an iteration (neighbor scan,
+values, roulette selection and the pheromones to put) runs as one compiled loop over the arrays of the
+compiled graph, see JitAntBatch. Without numba the kernels are plain Python functions, which are slow but give the
+same results, the runner uses the ant classes then.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Callable, Optional, TypeVar
+
+import numpy as np
+
+from ant_batch import RandomAntBatch
+from compiled_graph import CompiledGraph
+from wave_config import WaveConfig
+
+if TYPE_CHECKING:
+    # only for the annotations, random_ant imports this module
+    from random_ant import RandomAnt
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+JIT_AVAILABLE = numba is not None
+
+# kinds of ants in the kernels
+RANDOM = 0
+ROUTING = 1
+MINORITY = 2
+
+Function = TypeVar('Function', bound=Callable[..., Any])
+
+
+def _jit(function: Function) -> Function:
+    """
+    compiles a function with numba, if it is installed
+    """
+    if numba is None:
+        return function
+    return numba.njit(cache=True)(function)
+
+
+def kernel_kind(ant_class: type[RandomAnt]) -> Optional[int]:
+    """
+    Looks up the kernel for the ants of a class. Subclasses do not inherit the kernel of their base class, they
+    may change the behaviour of the ants, so they are stepped without a kernel unless they set jit_kind themselves.
+
+    :param ant_class: scalar implementation of an ant strategy, see ant_registry
+    :return: RANDOM, ROUTING or MINORITY, None if there is no kernel for the class
+    """
+    return vars(ant_class).get('jit_kind')
+
+
+@_jit
+def _on_path(path: np.ndarray, length: int, node: int) -> bool:
+    """
+    :param path: node ids of the path of an ant
+    :param length: number of nodes in the path
+    :param node: a node id
+    :return: if the node is on the path
+    """
+    for i in range(length):
+        if path[i] == node:
+            return True
+    return False
+
+
+@_jit
+def _pick_column(kind: int, prioritize: bool, alpha: float, start: int, stop: int, indices: np.ndarray,
+                 pheromone: np.ndarray, heuristic: np.ndarray, path: np.ndarray, length: int, weights: np.ndarray,
+                 draw: float) -> int:
+    """
+    Chooses an outgoing edge of a node like RoutingAnt._pick_a_new_node() or MinorityAnt._pick_a_new_node()
+
+    :param kind: ROUTING or MINORITY
+    :param prioritize: minority ants only choose edges with a value of at least 0.01
+    :param alpha: relevance exponent for pheromones
+    :param start: first edge id of the node
+    :param stop: edge id after the last edge of the node
+    :param indices: head of every edge
+    :param pheromone: pheromones of every edge
+    :param heuristic: 1 / (eta ** beta) for every edge
+    :param path: node ids of the path of the ant, its nodes are not chosen again
+    :param length: number of nodes in the path
+    :param weights: scratch array with at least one entry per outgoing edge
+    :param draw: uniform random number for the roulette
+    :return: index of the chosen edge in the row of the node, -1 for a random pick of all edges
+    """
+
+    degree = stop - start
+    total = 0.0
+    first_candidate = -1
+    for column in range(degree):
+        edge = start + column
+        weight = -1.0
+        if not _on_path(path, length, indices[edge]):
+            weight = pheromone[edge] ** alpha * heuristic[edge]
+            if kind == MINORITY and prioritize and weight < 0.01:
+                weight = -1.0
+        weights[column] = weight
+        if weight >= 0.0:
+            total += weight
+            if first_candidate < 0:
+                first_candidate = column
+
+    # random, if there are no pheromones on its way
+    if not total > 0.0:
+        return -1
+
+    if kind == MINORITY:
+        # the weakest trace is the most likely
+        minority_total = 0.0
+        for column in range(degree):
+            if weights[column] >= 0.0:
+                weights[column] = 1.0 - weights[column] / total
+                minority_total += weights[column]
+        # the first candidate, if all probabilities are 0 (e.g. only one candidate)
+        if not minority_total > 0.0:
+            return first_candidate
+        total = minority_total
+
+    target = draw * total
+    cumulative = 0.0
+    chosen = -1
+    for column in range(degree):
+        if weights[column] > 0.0:
+            cumulative += weights[column]
+            chosen = column
+            if cumulative > target:
+                break
+    return chosen
+
+
+@_jit
+def step_ants(indptr: np.ndarray, indices: np.ndarray, pheromone: np.ndarray, heuristic: np.ndarray,
+              value: np.ndarray, alpha: float, random_chance: float, kind: int, prioritize: bool,
+              put_pheromones_always: bool, stop_on_success: bool, max_steps: int, start_nodes: np.ndarray,
+              positions: np.ndarray, paths: np.ndarray, path_edges: np.ndarray, path_lengths: np.ndarray,
+              success: np.ndarray, alive: np.ndarray, draws: np.ndarray, weights: np.ndarray,
+              died: np.ndarray, deposit_edges: np.ndarray, deposit_amounts: np.ndarray) -> tuple[int, int]:
+    """
+    Does a step for every alive ant like RandomAnt.step(). The pheromones are not put on the graph, but returned
+    as edges and amounts, so they are put at once after the step like in RandomAntBatch.step().
+
+    :param indptr: CSR row pointers of the compiled graph
+    :param indices: head of every edge
+    :param pheromone: pheromones of every edge
+    :param heuristic: 1 / (eta ** beta) for every edge
+    :param value: value of every node
+    :param alpha: relevance exponent for pheromones
+    :param random_chance: chance of routing and minority ants to pick a random edge
+    :param kind: RANDOM, ROUTING or MINORITY
+    :param prioritize: see WaveConfig.prioritize_pheromone_routes
+    :param put_pheromones_always: see WaveConfig.put_pheromones_always
+    :param stop_on_success: see WaveConfig.stop_on_success
+    :param max_steps: maximum number of steps of an ant
+    :param start_nodes: start node of every ant
+    :param positions: current node of every ant, changed in place like the following arrays of the batch
+    :param paths: node ids of the path of every ant
+    :param path_edges: edge ids of the path of every ant
+    :param path_lengths: number of nodes in the path of every ant
+    :param success: if the ant has reached a node with a value > 0
+    :param alive: if the ant is still stepping
+    :param draws: two uniform random numbers per ant, for the random chance and for the choice
+    :param weights: scratch array with one entry per outgoing edge of the node with the most edges
+    :param died: receives the indices of the ants, which died in this step
+    :param deposit_edges: receives the edges to put pheromones on, one entry per ant and step at most
+    :param deposit_amounts: receives the pheromones to put on these edges
+    :return: number of died ants and number of deposits
+    """
+
+    died_count = 0
+    deposit_count = 0
+    for ant in range(len(alive)):
+        if not alive[ant]:
+            continue
+        node: int = positions[ant]
+
+        # ants back at the start node after a success do not step anymore
+        if success[ant] and node == start_nodes[ant]:
+            alive[ant] = False
+            died[died_count] = ant
+            died_count += 1
+            continue
+
+        # pick a new node, trapped ants stay at their node
+        start = indptr[node]
+        stop = indptr[node + 1]
+        edge = -1
+        new_node = node
+        if stop > start:
+            column = -1
+            if kind != RANDOM and not draws[ant, 0] < random_chance:
+                column = _pick_column(kind, prioritize, alpha, start, stop, indices, pheromone, heuristic,
+                                      paths[ant], path_lengths[ant], weights, draws[ant, 1])
+            if column < 0:
+                column = min(int(draws[ant, 1] * (stop - start)), stop - start - 1)
+            edge = start + column
+            new_node = indices[edge]
+
+        if put_pheromones_always and edge >= 0:
+            deposit_edges[deposit_count] = edge
+            deposit_amounts[deposit_count] = 1.0
+            deposit_count += 1
+
+        # step to that node
+        length = path_lengths[ant]
+        path_edges[ant, length - 1] = edge
+        paths[ant, length] = new_node
+        path_lengths[ant] = length + 1
+        positions[ant] = new_node
+
+        # check, if it is a success node
+        if value[new_node] > 0:
+            success[ant] = True
+            if not put_pheromones_always:
+                if kind != RANDOM:
+                    # absolute pheromones (double of maximum steps) are distributed to the edges of the path
+                    amount = max_steps / 2 / (length + 1)
+                    for i in range(length):
+                        if path_edges[ant, i] >= 0:
+                            deposit_edges[deposit_count] = path_edges[ant, i]
+                            deposit_amounts[deposit_count] = amount
+                            deposit_count += 1
+                if stop_on_success:
+                    alive[ant] = False
+                    died[died_count] = ant
+                    died_count += 1
+
+    return died_count, deposit_count
+
+
+class JitAntBatch(RandomAntBatch):
+    """
+    All ants of one iteration of any class, stepped by the compiled kernel step_ants()
+    """
+
+    def __init__(self, graph: CompiledGraph, wave: WaveConfig, spawn_nodes: np.ndarray | list[int], kind: int,
+                 rng: Optional[np.random.Generator] = None):
+        """
+        :param graph: the graph
+        :param wave: a wave object
+        :param spawn_nodes: start node id for every ant
+        :param kind: kind of the ants, see kernel_kind()
+        :param rng: random number stream of the batch
+        """
+        super().__init__(graph, wave, spawn_nodes, rng)
+
+        self.kind = kind
+        self.prioritize_pheromone_routes = wave.prioritize_pheromone_routes
+
+        count = len(self.start_nodes)
+        degrees = np.diff(graph.indptr)
+        self.weights = np.zeros(int(degrees.max(initial=0)), dtype=np.float64)
+        self.died = np.zeros(count, dtype=np.int64)
+        self.deposit_edges = np.zeros(count * self.max_steps, dtype=np.int64)
+        self.deposit_amounts = np.zeros(count * self.max_steps, dtype=np.float64)
+
+    def step(self) -> np.ndarray:
+        draws = self.rng.random((len(self.alive), 2))
+        died_count, deposit_count = step_ants(
+            self.graph.indptr, self.graph.indices, self.graph.pheromone, self.transitions.heuristic,
+            self.graph.value, self.alpha, self.random_chance, self.kind, self.prioritize_pheromone_routes,
+            self.put_pheromones_always, self.stop_on_success, self.max_steps, self.start_nodes, self.positions,
+            self.paths, self.path_edges, self.path_lengths, self.success, self.alive, draws,
+            self.weights, self.died, self.deposit_edges, self.deposit_amounts)
+
+        if deposit_count > 0:
+            self.graph.deposit_many(self.deposit_edges[:deposit_count], self.deposit_amounts[:deposit_count])
+        return self.died[:died_count].copy()
@@ -0,0 +1,225 @@
+import csv
+import json
+import os
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any
+
+import numpy as np
+
+from compiled_graph import CompiledGraph
+
+# fields of a metrics record, one record per iteration
+METRIC_FIELDS = ['wave', 'iteration', 'ants', 'success_count', 'mean_path_length', 'mean_path_cost',
+                 'pheromoned_edges', 'total_edges', 'pheromone_entropy', 'wall_time']
+
+
+class IterationMetrics:
+    """
+    Collects the finished ants of one iteration with running sums, so a record costs O(1) per ant
+    """
+
+    ants: int = 0                   # number of finished ants
+    success_count: int = 0          # number of ants, which reached a node with a value > 0
+    path_length_sum: int = 0        # sum of the steps of all ants
+    path_cost_sum: float = 0.0      # sum of the weights along the paths of all ants
+
+    def __init__(self):
+        self.ants = 0
+        self.success_count = 0
+        self.path_length_sum = 0
+        self.path_cost_sum = 0.0
+
+    def add_ant(self, path_length: int, path_cost: float, success: bool):
+        """
+        :param path_length: number of steps of the ant
+        :param path_cost: sum of the weights along its path
+        :param success: if the ant reached a node with a value > 0
+        """
+        self.ants += 1
+        self.success_count += int(success)
+        self.path_length_sum += path_length
+        self.path_cost_sum += path_cost
+
+    def add_ants(self, path_lengths: np.ndarray, path_costs: np.ndarray, successes: np.ndarray):
+        """
+        adds many ants at once, see add_ant()
+        """
+        self.ants += len(path_lengths)
+        self.success_count += int(np.count_nonzero(successes))
+        self.path_length_sum += int(np.sum(path_lengths))
+        self.path_cost_sum += float(np.sum(path_costs))
+
+    def record(self, wave: int, iteration: int, graph: CompiledGraph, wall_time: float) -> dict[str, Any]:
+        """
+        :param wave: number of the wave
+        :param iteration: number of the iteration
+        :param graph: the compiled graph with the kept pheromone aggregates
+        :param wall_time: seconds the iteration took
+        :return: a metrics record with the fields METRIC_FIELDS
+        """
+        return {
+            'wave': wave,
+            'iteration': iteration,
+            'ants': self.ants,
+            'success_count': self.success_count,
+            'mean_path_length': self.path_length_sum / self.ants if self.ants else 0.0,
+            'mean_path_cost': self.path_cost_sum / self.ants if self.ants else 0.0,
+            'pheromoned_edges': graph.count_pheromoned_edges(),
+            'total_edges': graph.edge_count,
+            'pheromone_entropy': graph.pheromone_entropy(),
+            'wall_time': wall_time
+        }
+
+
+class MetricsSink(ABC):
+    """
+    Receives the metrics records of a run, one per iteration
+    """
+
+    @abstractmethod
+    def write(self, record: dict[str, Any]) -> None:
+        """
+        :param record: a metrics record
+        """
+
+    def close(self):
+        """
+        called once after the run, flushes and closes files
+        """
+        pass
+
+
+class RingBufferSink(MetricsSink):
+    """
+    keeps the latest records in memory
+    """
+
+    buffer: deque[dict[str, Any]]   # the latest records, oldest first
+
+    def __init__(self, size: int = 10000):
+        """
+        :param size: number of records to keep
+        """
+        self.buffer = deque(maxlen=size)
+
+    def write(self, record: dict[str, Any]):
+        self.buffer.append(record)
+
+    def records(self) -> list[dict[str, Any]]:
+        """
+        :return: the kept records, oldest first
+        """
+        return list(self.buffer)
+
+
+class CsvSink(MetricsSink):
+    """
+    writes the records as rows of a CSV file
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: file path of the CSV file, an existing file is replaced
+        """
+        self.file = open(path, 'w', newline='')
+        self.writer = csv.DictWriter(self.file, fieldnames=METRIC_FIELDS, extrasaction='ignore')
+        self.writer.writeheader()
+
+    def write(self, record: dict[str, Any]):
+        self.writer.writerow(record)
+
+    def close(self):
+        self.file.close()
+
+
+class JsonLinesSink(MetricsSink):
+    """
+    writes every record as one JSON object per line
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: file path of the JSON lines file, an existing file is replaced
+        """
+        self.file = open(path, 'w')
+
+    def write(self, record: dict[str, Any]):
+        self.file.write(json.dumps(record) + '\n')
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetSink(MetricsSink):
+    """
+    writes the records to a Parquet file in row groups, needs pyarrow
+    """
+
+    pyarrow: Any                    # the pyarrow module, only imported for this sink
+    schema: Any                     # pyarrow schema of the records
+    writer: Any                     # pyarrow.parquet.ParquetWriter of the file
+    rows: list[dict[str, Any]]      # records, which are not written yet
+
+    def __init__(self, path: str, row_group_size: int = 1000):
+        """
+        :param path: file path of the Parquet file, an existing file is replaced
+        :param row_group_size: number of records, which are collected before they are written
+        """
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImportError("Parquet metrics need pyarrow: pip install pyarrow") from e
+
+        self.pyarrow = pyarrow
+        self.schema = self.pyarrow.schema([
+            ('wave', self.pyarrow.int64()),
+            ('iteration', self.pyarrow.int64()),
+            ('ants', self.pyarrow.int64()),
+            ('success_count', self.pyarrow.int64()),
+            ('mean_path_length', self.pyarrow.float64()),
+            ('mean_path_cost', self.pyarrow.float64()),
+            ('pheromoned_edges', self.pyarrow.int64()),
+            ('total_edges', self.pyarrow.int64()),
+            ('pheromone_entropy', self.pyarrow.float64()),
+            ('wall_time', self.pyarrow.float64())
+        ])
+        self.writer = self.pyarrow.parquet.ParquetWriter(path, self.schema)
+        self.row_group_size = row_group_size
+        self.rows = []
+
+    def write(self, record: dict[str, Any]):
+        self.rows.append(record)
+        if len(self.rows) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        """
+        writes the collected records as one row group
+        """
+        if self.rows:
+            self.writer.write_table(self.pyarrow.Table.from_pylist(self.rows, schema=self.schema))
+            self.rows = []
+
+    def close(self):
+        self._flush()
+        self.writer.close()
+
+
+def sink_for_path(path: str) -> MetricsSink:
+    """
+    creates a sink by the file extension: .csv, .jsonl or .parquet
+
+    :param path: file path for the records
+    :return: the sink
+    """
+
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        return CsvSink(path)
+    if extension in ('.jsonl', '.ndjson'):
+        return JsonLinesSink(path)
+    if extension == '.parquet':
+        return ParquetSink(path)
+    raise ValueError(f"Unknown metrics file type {extension}, use .csv, .jsonl or .parquet")
@@ -1,7 +1,11 @@
+from typing import Optional
+
+import jit_kernels
 import routing_ant
 import numpy as np
-import random
-import networkx as nx
+
+from compiled_graph import CompiledGraph
+from wave_config import WaveConfig
 
 
 class MinorityAnt(routing_ant.RoutingAnt):
@@ -9,12 +13,17 @@ class MinorityAnt(routing_ant.RoutingAnt):
     The minority ant: chooses with bigger probability an edge with lesser pheromones
     """
 
-    def __init__(self, G: nx.DiGraph, wave):
-        super().__init__(G, wave)
+    _candidate_pheromoned: np.ndarray   # True for every outgoing edge with a value of at least 0.01
+
+    jit_kind = jit_kernels.MINORITY
+
+    def __init__(self, graph: CompiledGraph, wave: WaveConfig, rng: Optional[np.random.Generator] = None):
+        super().__init__(graph, wave, rng)
 
         self.prioritize_pheromone_routes = wave.prioritize_pheromone_routes
+        self._candidate_pheromoned = np.empty(graph.max_degree, dtype=bool)
 
-    def _pick_a_new_node(self) -> str:
+    def _pick_a_new_node(self) -> int:
         """
         choosing a new node.
         Variant 1: just calculation 1 - (probability of routing ant) -> search mechanism
@@ -23,30 +32,42 @@ class MinorityAnt(routing_ant.RoutingAnt):
         :return: a new node
         """
         # random by chance
-        if random.random() < self.random_chance:
+        if self.rng.random() < self.random_chance:
             return super(routing_ant.RoutingAnt, self)._pick_a_new_node()
 
         # pheromone sensitive behaviour, if pheromones on its way
-        edge_values, target_nodes = self._get_all_unvisited_nodes_value()
+        start, degree = self._evaluate_candidates()
+        edge_values = self._candidate_values[:degree]
+        candidates = self._candidate_unvisited[:degree]
+
+        # no neighbor visited yet: the cached distribution of the node applies
+        if not self.prioritize_pheromone_routes and candidates.all():
+            if self.transitions.value_sums[self.current_node] > 0:
+                if self.transitions.minority_sums[self.current_node] > 0:
+                    return int(self.graph.indices[start + self.transitions.sample_minority(self.current_node,
+                                                                                           self.rng.random())])
+                return int(self.graph.indices[start])
+            return super(routing_ant.RoutingAnt, self)._pick_a_new_node()
 
         # filter possible nodes for pheromones
         if self.prioritize_pheromone_routes:
-            filtered_targets = []
-            for i in range(edge_values.shape[0]):
-                if edge_values[i] < 0.01:
-                    filtered_targets.append(i)
-            if len(filtered_targets) > 0:
-                edge_values = np.delete(edge_values, filtered_targets)
-                target_nodes = np.delete(target_nodes, filtered_targets)
-
-        sum_edge_values = np.sum(edge_values)
+            pheromoned = self._candidate_pheromoned[:degree]
+            np.greater_equal(edge_values, 0.01, out=pheromoned)
+            np.logical_and(candidates, pheromoned, out=candidates)
+            np.multiply(edge_values, candidates, out=edge_values)
+
+        sum_edge_values = edge_values.sum()
         if sum_edge_values > 0:
-            node_probabilities = 1 - (edge_values / sum_edge_values)
+            # 1 - (edge_values / sum_edge_values) for the candidates
+            node_probabilities = self._candidate_buffer[:degree]
+            np.divide(edge_values, -sum_edge_values, out=node_probabilities)
+            np.add(node_probabilities, 1, out=node_probabilities)
+            np.multiply(node_probabilities, candidates, out=node_probabilities)
 
-            if np.sum(node_probabilities) > 0:
-                return random.choices(target_nodes, weights=node_probabilities, k=1)[0]
+            if node_probabilities.sum() > 0:
+                return int(self.graph.indices[start + self._choose(node_probabilities)])
             else:
-                return target_nodes[0]
+                return int(self.graph.indices[start + int(candidates.argmax())])
 
         # random otherwise
         return super(routing_ant.RoutingAnt, self)._pick_a_new_node()
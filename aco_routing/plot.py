@@ -1,4 +1,8 @@
+from __future__ import annotations
+
 import json
+import time
+from typing import Any, Optional
 import tkinter as tk
 from tkinter import filedialog
 import matplotlib.pyplot as plt
@@ -6,17 +10,27 @@ from matplotlib import animation, gridspec
 import matplotlib.colors as mcolors
 import matplotlib as mpl
 import networkx as nx
+import numpy as np
+from matplotlib.collections import LineCollection
+from matplotlib.colors import Colormap
 from matplotlib.widgets import Button, TextBox, CheckButtons, RadioButtons
 from ant_colony_runner import AntColonyRunner
+import ant_registry
+import checkpoint
+import graph_generators
+from compiled_graph import CompiledGraph
 from graph_tools import GraphTools
+from snapshot import ColonySnapshot
 
 
 class Plot:
-    G: nx.DiGraph  # The Graph
-    pos: dict  # positions for the nodes
-    ants_config: dict  # config for the ants
+    G: nx.DiGraph[Any]  # The Graph
+    pos: dict[Any, Any]  # positions for the nodes
+    ants_config: list[dict[str, Any]]  # config for the ants
     colony: AntColonyRunner  # the colony driver
-    plot_config: dict  # config for the plot
+    plot_config: dict[str, Any]  # config for the plot
+    cmap_edges: Colormap  # colors of the edges by their pheromones
+    cmap_nodes: Colormap  # colors of the nodes by their values
 
     show_edge_parameters: bool = True  # if parameters (weights, pheromones) on the edge shall be shown, uses a lot of calculation time
     show_ant_animation: bool = True  # if the steps and paths of the ants shall be shown
@@ -27,23 +41,44 @@ class Plot:
     edge_pheromone_label_color: str = 'blue'  # color for the pheromone parameter shown for edges
     ant_animation_color: str = 'red'  # color of the ant paths shown on the graph
     last_message: str = ''  # last message of the log
-
-    def init_config(self, config_path: str):
+    full_speed: bool = False  # if the colony ignores all sleeps and the plot only samples its latest state
+    replay_interval: float = 0.0  # seconds between two shown snapshots, 0 shows always the latest snapshot
+    replay_history_size: int = 200  # number of snapshots the colony keeps for the replay
+    _shown_snapshot: Optional[ColonySnapshot] = None  # the snapshot shown in replay mode
+    _shown_time: float = 0.0  # time.monotonic() when the shown snapshot was picked
+
+    # artists of the graph, created once per topology and updated in place by update_plot
+    _drawn_graph: Optional[CompiledGraph] = None  # the compiled graph of the colony, which the artists were created for
+    _drawn_version: Optional[int] = None  # version of the last drawn snapshot
+    # show_edge_parameters and show_ant_animation of the last drawn frame
+    _drawn_options: Optional[tuple[bool, bool]] = None
+    _drawn_message: Optional[str] = None  # last message shown in the log box
+    _artists: list[Any] = []  # all artists of the graph
+    _node_names: list[Any] = []  # shown names of the nodes of the drawn graph
+    letter_labels: bool = False  # show letter names for numeric node ids
+
+    def init_config(self, config_path: Optional[str]):
         """
         initializes parameters for the plot
 
         :param config_path: file path for the config file, that has to be loaded
         """
 
-        if config_path:
-            self.G, self.ants_config, self.plot_config, self.pos, visited_nodes = GraphTools.load_config_from_json(
-                config_path)
-            self.last_message = f"Config file from {config_path} loaded"
+        if config_path and config_path.endswith('.npz'):
+            self.colony, plot_config = checkpoint.load_checkpoint(config_path, self.print_message, plot=self)
+            self.G, self.ants_config, self.pos = self.colony.G, self.colony.ants_config, self.colony.pos
+            self.plot_config = plot_config if plot_config is not None else {}
+            self.last_message = f"Checkpoint from {config_path} loaded"
         else:
-            self.G, self.ants_config, self.plot_config, self.pos, visited_nodes = GraphTools.load_default_config()
-            self.last_message = f"Couldn't load config file using default values"
-        self.colony = AntColonyRunner(self, self.print_message)
-        self.colony.visited_nodes = visited_nodes  # Set the visited_nodes
+            if config_path:
+                self.G, self.ants_config, self.plot_config, self.pos, visited_nodes = \
+                    GraphTools.load_config_from_json(config_path)
+                self.last_message = f"Config file from {config_path} loaded"
+            else:
+                self.G, self.ants_config, self.plot_config, self.pos, visited_nodes = GraphTools.load_default_config()
+                self.last_message = f"Couldn't load config file using default values"
+            self.colony = AntColonyRunner(self.G, self.ants_config, self.print_message, pos=self.pos, plot=self)
+            self.colony.visited_nodes = visited_nodes  # Set the visited_nodes
 
         self.show_edge_parameters = self.plot_config.get('show_edge_parameters', True)
         self.show_ant_animation = self.plot_config.get('show_ant_animation', True)
@@ -53,12 +88,17 @@ class Plot:
         self.edge_weight_label_color = self.plot_config.get('edge_weight_label_color', 'red')
         self.edge_pheromone_label_color = self.plot_config.get('edge_pheromone_label_color', 'blue')
         self.ant_animation_color = self.plot_config.get('ant_animation_color', 'red')
+        self.letter_labels = self.plot_config.get('letter_labels', False)
+        self.full_speed = self.plot_config.get('full_speed', False)
+        self.replay_interval = self.plot_config.get('replay_interval', 0.0)
+        self.colony.set_full_speed(self.full_speed)
+        self.set_replay_interval(self.replay_interval)
 
         mpl.rcParams['toolbar'] = 'None'
-        self.cmap_edges = mpl.colormaps.get(self.plot_config.get('cmap_edges', 'cool'))
-        self.cmap_nodes = mpl.colormaps.get(self.plot_config.get('cmap_nodes', 'winter'))
+        self.cmap_edges = mpl.colormaps[self.plot_config.get('cmap_edges', 'cool')]
+        self.cmap_nodes = mpl.colormaps[self.plot_config.get('cmap_nodes', 'winter')]
 
-    def __init__(self, config_path=None):
+    def __init__(self, config_path: Optional[str] = None):
         self.config_path = config_path
         self.init_config(config_path)
         self.buttons_visible = True
@@ -120,7 +160,7 @@ class Plot:
         self.check_stop_on_success.on_clicked(self.toggle_stop_on_success)
 
         self.check_show_graph = CheckButtons(plt.subplot(gs[5, 0]), ['Show Graph'],
-                                             [self.graph_visibly])
+                                             [self.show_graph])
         self.check_show_graph.on_clicked(self.graph_visibly)
 
         #-------------------------Second Row----------------------------#
@@ -153,6 +193,13 @@ class Plot:
         if self.colony.waves[0].ant_random_spawn:
             self.textbox_spawn_node.set_active(False)
 
+        self.check_full_speed = CheckButtons(plt.subplot(gs[3, 2]), ['Full Speed'], [self.full_speed])
+        self.check_full_speed.on_clicked(self.toggle_full_speed)
+
+        plt.subplot(gs[5, 2]).annotate('Replay Interval', (0.5, 1.05), xycoords='axes fraction', ha='center')
+        self.textbox_replay_interval = TextBox(plt.subplot(gs[5, 2]), '', initial=str(self.replay_interval))
+        self.textbox_replay_interval.on_submit(self.update_replay_interval)
+
         # -------------------------Fourth Row----------------------------#
         plt.subplot(gs[0, 3]).annotate('Iteration Sleep', (0.5, 1.05), xycoords='axes fraction', ha='center')
         self.textbox_iteration_sleep = TextBox(plt.subplot(gs[0, 3]), '',
@@ -209,9 +256,9 @@ class Plot:
 
         plt.subplot(gs[0:2, 6]).annotate('Ant Class', (0.5, 1.05), xycoords='axes fraction', ha='center')
         ax_radio = plt.subplot(gs[0:2, 6])
-        ant_classes = ('random', 'routing', 'minority')
+        ant_classes = ant_registry.ant_class_names()
         initial_class_index = ant_classes.index(self.colony.waves[0].ant_class)
-        self.radio_ant_class = RadioButtons(ax_radio, ('random', 'routing', 'minority'), active=initial_class_index)
+        self.radio_ant_class = RadioButtons(ax_radio, ant_classes, active=initial_class_index)
         self.radio_ant_class.on_clicked(self.update_ant_class)
 
         self.start_colony_button = Button(plt.subplot(gs[3, 6]), label='Run Colony')
@@ -235,7 +282,7 @@ class Plot:
         self.textbox_logs = TextBox(ax_log, '', initial='')
         self.textbox_logs.set_active(False)
 
-    def reset_to_initial(self, event):
+    def reset_to_initial(self, event: Any):
         """
         Resets the graph and colony to the last loaded configuration values.
         """
@@ -248,7 +295,7 @@ class Plot:
         else:
             self.print_message("No configuration file loaded to reset.")
 
-    def graph_visibly(self, label):
+    def graph_visibly(self, label: Optional[str]):
         """
         Changes visibility of the graph.
 
@@ -257,12 +304,13 @@ class Plot:
         """
         self.show_graph = not self.show_graph
         if self.show_graph:
-            self.ani.event_source.start()
-        else:
+            if self.ani.event_source is not None:
+                self.ani.event_source.start()
+        elif self.ani.event_source is not None:
             self.ani.event_source.stop()
         plt.draw()
 
-    def update_spawn_node(self, text):
+    def update_spawn_node(self, text: str):
         """
         Update the spawn node for ants.
 
@@ -272,7 +320,7 @@ class Plot:
         """
         self.colony.waves[0].ant_spawn_node = text
 
-    def run_colony(self, label):
+    def run_colony(self, label: Any):
         """
         Updates all parameters and start the colony
 
@@ -284,7 +332,7 @@ class Plot:
         self.update_parameters('')
         self.colony.start()
 
-    def stop_colony(self, label):
+    def stop_colony(self, label: Any):
         """
         Stops the colony
 
@@ -296,7 +344,7 @@ class Plot:
         self.update_parameters('')
         self.colony.stop()
 
-    def save_graphml(self, event):
+    def save_graphml(self, event: Any):
         """
         Save the graph to a GraphML file, including all node and edge attributes.
 
@@ -305,7 +353,7 @@ class Plot:
         :return: None
         """
 
-        def rgba_to_hex(rgba):
+        def rgba_to_hex(rgba: tuple[float, float, float, float]) -> str:
             # Convert RGBA tuple to a hex string
             return '#{:02x}{:02x}{:02x}'.format(int(rgba[0] * 255), int(rgba[1] * 255), int(rgba[2] * 255))
 
@@ -315,24 +363,30 @@ class Plot:
                                                  filetypes=[("GraphML files", "*.graphml"), ("All files", "*.*")])
 
         if file_path:
-            for node in self.G.nodes:
-                self.G.nodes[node]['label'] = str(node)  # Ensure label is set for each node
-                rgba = self.cmap_nodes(self.G.nodes[node]['value'])
-                self.G.nodes[node]['color'] = rgba_to_hex(rgba)
-                self.G.nodes[node]['value'] = self.G.nodes[node].get('value', 0)  # Ensure value is set for each node
-                self.G.nodes[node]['visits'] = self.colony.visited_nodes.get(node, 0)  # Add visit count
-
-            for u, v in self.G.edges:
-                self.G.edges[u, v]['weight'] = float(self.G[u][v]['weight'])
-                self.G.edges[u, v]['pheromone'] = float(self.G[u][v]['pheromone'])
-                rgba = self.cmap_edges(self.G[u][v]['pheromone'])
-                self.G.edges[u, v]['color'] = rgba_to_hex(rgba)
-
-            # Write the GraphML file
-            nx.write_graphml(self.G, file_path)
+            # the colony thread changes G and the pheromones while running
+            with self.colony.graph_lock:
+                self.colony.sync_graph()
+                visited_nodes = self.colony.visited_nodes
+                edge_traversals = self.colony.edge_traversals()
+                for node in self.G.nodes:
+                    self.G.nodes[node]['label'] = str(node)  # Ensure label is set for each node
+                    rgba = self.cmap_nodes(self.G.nodes[node]['value'])
+                    self.G.nodes[node]['color'] = rgba_to_hex(rgba)
+                    self.G.nodes[node]['value'] = self.G.nodes[node].get('value', 0)  # Ensure value is set
+                    self.G.nodes[node]['visits'] = visited_nodes.get(node, 0)  # Add visit count
+
+                for u, v in self.G.edges:
+                    self.G.edges[u, v]['weight'] = float(self.G[u][v]['weight'])
+                    self.G.edges[u, v]['pheromone'] = float(self.G[u][v]['pheromone'])
+                    rgba = self.cmap_edges(self.G[u][v]['pheromone'])
+                    self.G.edges[u, v]['color'] = rgba_to_hex(rgba)
+                    self.G.edges[u, v]['traversals'] = edge_traversals.get((u, v), 0)  # Add traversal count
+
+                # Write the GraphML file
+                nx.write_graphml(self.G, file_path)
             self.print_message(f"Graph saved to {file_path}")
 
-    def print_message(self, msg):
+    def print_message(self, msg: str):
         """
         Displays messages in UI
 
@@ -342,12 +396,12 @@ class Plot:
         print(msg)
         self.last_message = msg
 
-    def update_ant_class(self, label):
+    def update_ant_class(self, label: Optional[str]):
         """
         Update the ant class for the first wave of the colony.
 
         This method sets the ant class for ants in the first wave of the colony based on the selected radio button.
-        Either random, routing or minority.
+        One of the classes registered in ant_registry, e.g. random, routing or minority.
 
         :param label: The label of the selected radio button (unused) but required.
         :type label: str
@@ -355,7 +409,7 @@ class Plot:
         """
         self.colony.waves[0].ant_class = self.radio_ant_class.value_selected
 
-    def update_parameters(self, event):
+    def update_parameters(self, event: Any):
         """
         Update various parameters that have been set via the UI for all waves in the colony.
 
@@ -389,7 +443,7 @@ class Plot:
         except ValueError:
             self.print_message("Please enter valid numerical values for all parameters.")
 
-    def toggle_random_spawn(self, label):
+    def toggle_random_spawn(self, label: Optional[str]):
         """
         Toggle the random spawn setting for ants.
 
@@ -409,7 +463,7 @@ class Plot:
             self.textbox_spawn_node.set_active(True)
             self.textbox_spawn_node.ax.set_visible(True)
 
-    def toggle_put_pheromones_always(self, label):
+    def toggle_put_pheromones_always(self, label: Optional[str]):
         """
         Toggle the put pheromones always setting.
 
@@ -421,7 +475,7 @@ class Plot:
         """
         self.colony.waves[0].put_pheromones_always = not self.colony.waves[0].put_pheromones_always
 
-    def toggle_stop_on_success(self, label):
+    def toggle_stop_on_success(self, label: Optional[str]):
         """
         Toggle the stop on success setting.
 
@@ -434,7 +488,7 @@ class Plot:
         """
         self.colony.waves[0].stop_on_success = not self.colony.waves[0].stop_on_success
 
-    def toggle_prioritize_pheromone_routes(self, label):
+    def toggle_prioritize_pheromone_routes(self, label: Optional[str]):
         """
         Toggle the priority pheromone routes setting.
 
@@ -446,7 +500,47 @@ class Plot:
         """
         self.colony.waves[0].prioritize_pheromone_routes = not self.colony.waves[0].prioritize_pheromone_routes
 
-    def update_step_sleep(self, text):
+    def toggle_full_speed(self, label: Optional[str]):
+        """
+        Toggle the full speed mode.
+
+        At full speed the colony ignores the step, iteration and wave sleeps and runs as fast as possible,
+        the plot shows the latest published state at its own frame rate.
+
+        :param label: The label associated with the toggle (unused) but required.
+        :type label: str
+        :return: None
+        """
+        self.full_speed = not self.full_speed
+        self.colony.set_full_speed(self.full_speed)
+
+    def set_replay_interval(self, interval: float):
+        """
+        Sets the replay throttle, which only slows down the display and not the colony.
+
+        :param interval: seconds between two shown snapshots, 0 shows always the latest snapshot
+        :return: None
+        """
+        self.replay_interval = max(float(interval), 0.0)
+        self.colony.keep_snapshot_history(self.replay_history_size if self.replay_interval > 0 else 0)
+        self._shown_snapshot = None
+
+    def update_replay_interval(self, text: str):
+        """
+        Update the replay interval of the display.
+
+        :param text: The new replay interval in seconds.
+        :type text: str
+        :return: None
+        """
+        try:
+            val = float(text)
+            self.print_message(f'Replay interval set to {val}')
+            self.set_replay_interval(val)
+        except ValueError:
+            self.print_message("Please enter a valid number for replay interval.")
+
+    def update_step_sleep(self, text: str):
         """
         Update the step sleep time for all waves in the colony.
 
@@ -464,7 +558,7 @@ class Plot:
         except ValueError:
             self.print_message("Please enter a valid number for step sleep.")
 
-    def update_iteration_sleep(self, text):
+    def update_iteration_sleep(self, text: str):
         """
         Update the step sleep time for all waves in the colony.
 
@@ -483,7 +577,7 @@ class Plot:
         except ValueError:
             self.print_message("Please enter a valid number for iteration sleep.")
 
-    def update_wave_sleep(self, text):
+    def update_wave_sleep(self, text: str):
         """
         Update the step sleep time for all waves in the colony.
 
@@ -502,7 +596,7 @@ class Plot:
         except ValueError:
             self.print_message("Please enter a valid number for wave sleep.")
 
-    def toggle_buttons(self, event):
+    def toggle_buttons(self, event: Any):
         """
         Toggle the visibility of control buttons and text boxes.
 
@@ -539,7 +633,7 @@ class Plot:
 
         plt.draw()
 
-    def reset(self, config_path):
+    def reset(self, config_path: Optional[str]):
         """
         Reset the colony and reinitialize the configuration.
 
@@ -555,12 +649,13 @@ class Plot:
         self.init_config(config_path)
         self.setup_plot()
 
-    def save_config(self, event):
+    def save_config(self, event: Any):
         """
-        Save the current configuration to a JSON file.
+        Save the current configuration to a JSON file or the full state of the colony to a checkpoint (.npz).
 
         This method updates the parameters, opens a file dialog for the user to specify the
         save location, and saves the current configuration to a JSON file.
+        A checkpoint can be loaded again to continue a stopped run.
 
         :param event: The event that triggered this save (unused) but required.
         :type event: object
@@ -570,16 +665,29 @@ class Plot:
         root = tk.Tk()
         root.withdraw()
         file_path = filedialog.asksaveasfilename(defaultextension=".json",
-                                                 filetypes=[("JSON files", "*.json"), ("All files", "*.*")])
-
-        if file_path:
+                                                 filetypes=[("JSON files", "*.json"), ("Checkpoints", "*.npz"),
+                                                            ("All files", "*.*")])
+
+        if file_path and file_path.endswith('.npz'):
+            try:
+                with self.colony.graph_lock:
+                    plot_config = GraphTools.save_config_as_json(self)['plot']
+                checkpoint.save_checkpoint(self.colony, file_path, plot_config=plot_config)
+                self.print_message(f"Checkpoint saved to {file_path}")
+            except RuntimeError as e:
+                self.print_message(str(e))
+        elif file_path:
+            # the colony thread changes G and the pheromones while running
+            with self.colony.graph_lock:
+                self.colony.sync_graph()
+                config = GraphTools.save_config_as_json(self)
             with open(file_path, 'w') as f:
-                json.dump(GraphTools.save_config_as_json(self), f, indent=4)
+                json.dump(config, f, indent=4)
             self.print_message(f"Configuration saved to {file_path}")
 
-    def on_load_config_clicked(self, event):
+    def on_load_config_clicked(self, event: Any):
         """
-        Load a configuration from a JSON file and reset the colony.
+        Load a configuration from a JSON file or a checkpoint (.npz) and reset the colony.
 
         This method opens a file dialog for the user to select a configuration file,
         and resets the colony with the selected configuration.
@@ -590,13 +698,13 @@ class Plot:
         root = tk.Tk()
         root.withdraw()
         file_path = filedialog.askopenfilename(
-            filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
+            filetypes=[("JSON files", "*.json"), ("Checkpoints", "*.npz"), ("All files", "*.*")]
         )
         if file_path:
             self.config_path = file_path  # Store the path of the loaded configuration file
             self.reset(file_path)
 
-    def update_check_edge(self, label):
+    def update_check_edge(self, label: Optional[str]):
         """
         Toggle the visibility of edge parameters.
 
@@ -608,7 +716,7 @@ class Plot:
         """
         self.show_edge_parameters = not self.show_edge_parameters
 
-    def update_check_ant(self, label):
+    def update_check_ant(self, label: Optional[str]):
         """
         Toggle the visibility of ant animation.
 
@@ -620,108 +728,182 @@ class Plot:
         """
         self.show_ant_animation = not self.show_ant_animation
 
-    def update_plot(self, frame):
+    def _build_artists(self, snapshot: ColonySnapshot):
         """
-        renders the graph
+        Creates the artists for the topology of a snapshot. Only called, when the colony compiled a new graph,
+        all other frames update these artists in place.
+
+        :param snapshot: a snapshot of the colony
         """
 
-        # Find the minimum and maximum weight among all edges in the graph
-        min_weight, max_weight = min(data['weight'] for _, _, data in self.G.edges(data=True)), max(
-            data['weight'] for _, _, data in self.G.edges(data=True))
+        for artist in self._artists:
+            artist.remove()
 
-        # Find the minimum and maximum pheromone level among all edges in the graph
-        min_pheromone, max_pheromone = min(data['pheromone'] for _, _, data in self.G.edges(data=True)), max(
-            data['pheromone'] for _, _, data in self.G.edges(data=True))
+        graph = snapshot.graph
+        pos = snapshot.pos
+        edge_list = snapshot.edges()
+        G: nx.DiGraph[Any] = nx.DiGraph()
+        G.add_nodes_from(graph.nodes)
+        G.add_edges_from(edge_list)
 
-        # Find the minimum and maximum value among all nodes in the graph
-        min_value, max_value = min(data['value'] for _, data in self.G.nodes(data=True)), max(
-            data['value'] for _, data in self.G.nodes(data=True))
+        # node colors by value, node values and weights are fixed for a compiled graph
+        node_norm = mcolors.Normalize(vmin=graph.value_min, vmax=graph.value_max)
+        self._node_artist = nx.draw_networkx_nodes(G, pos=pos, nodelist=graph.nodes,
+                                                   node_color=self.cmap_nodes(node_norm(graph.value)), ax=self.ax)
 
-        # Normalize the node values and edge pheromone levels for color mapping
-        node_norm = mcolors.Normalize(vmin=min_value, vmax=max_value)
-        edge_norm = mcolors.Normalize(vmin=min_pheromone, vmax=max_pheromone)
+        # Calculate the width for each edge based on its weight
+        weights = graph.weight
+        widths = 1 + (weights - graph.weight_min) / (graph.weight_max - graph.weight_min + 1)
+        edges = nx.draw_networkx_edges(G, pos=pos, edgelist=edge_list, width=widths,
+                                       edge_color=self.cmap_edges(np.zeros(len(edge_list))),
+                                       connectionstyle="arc3,rad=0.07", ax=self.ax)
+        self._edge_artists = list(edges) if isinstance(edges, list) else [edges]
+
+        self._node_names = list(graph.nodes)
+        if self.letter_labels and all(isinstance(node, int) for node in graph.nodes):
+            # numeric ids of generated graphs are shown as letters, only the display changes
+            names = graph_generators.letter_labels(max(graph.nodes, default=-1) + 1)
+            self._node_names = [names[node] for node in graph.nodes]
+        node_labels = nx.draw_networkx_labels(G, pos, font_size=self.node_label_size, ax=self.ax,
+                                              font_color=self.node_label_color,
+                                              labels=dict(zip(graph.nodes, self._node_names)))
+        self._node_label_artists = [node_labels[n] for n in graph.nodes]
 
-        self.ax.clear()
+        # Create labels for edge weights and pheromone levels, hidden if edge parameters are not shown
+        weight_labels = {edge: f"{weight:g}" for edge, weight in zip(edge_list, weights.tolist())}
+        edge_weight_labels = nx.draw_networkx_edge_labels(G, pos, edge_labels=weight_labels,
+                                                          font_color=self.edge_weight_label_color,
+                                                          label_pos=0.1, ax=self.ax)
+        self._weight_label_artists = [edge_weight_labels[edge] for edge in edge_list]
+        edge_pheromone_labels = nx.draw_networkx_edge_labels(G, pos, edge_labels={edge: '' for edge in edge_list},
+                                                             font_color=self.edge_pheromone_label_color,
+                                                             label_pos=0.3, ax=self.ax)
+        self._pheromone_label_artists = [edge_pheromone_labels[edge] for edge in edge_list]
 
-        # Generate the color map for nodes based on their values
-        node_colors = [self.cmap_nodes(node_norm(data['value'])) for _, data in self.G.nodes(data=True)]
-        nodes = nx.draw_networkx_nodes(self.G, pos=self.pos, nodelist=list(self.G.nodes()), node_color=node_colors,
-                                       ax=self.ax)
+        # ant paths, current nodes of the ants and the spawn node
+        self._ant_path_artist = LineCollection([], colors=self.ant_animation_color, linestyles='-', linewidths=2,
+                                               zorder=2)
+        self.ax.add_collection(self._ant_path_artist)
+        self._ant_artist = self.ax.scatter([], [], s=700, c=self.ant_animation_color, zorder=2)
+        self._spawn_artist = self.ax.scatter([], [], s=700, c=self.ant_animation_color, zorder=2)
 
-        edges = self.G.edges(data=True)
+        self._artists = ([self._node_artist] + self._edge_artists + self._node_label_artists
+                         + self._weight_label_artists + self._pheromone_label_artists
+                         + [self._ant_path_artist, self._ant_artist, self._spawn_artist])
 
-        # Generate the color map for edges based on their pheromone levels
-        edge_colors = [self.cmap_edges(edge_norm(data['pheromone'])) for _, _, data in edges]
-        # Calculate the width for each edge based on its weight
-        widths = [1 + (data['weight'] - min_weight) / (max_weight - min_weight + 1) for _, _, data in edges]
-        edges = nx.draw_networkx_edges(self.G, pos=self.pos, edgelist=list(edges), width=widths,
-                                       edge_color=edge_colors,
-                                       connectionstyle="arc3,rad=0.07", ax=self.ax)
+        if len(pos) > 0:
+            coordinates = np.array(list(pos.values()), dtype=np.float64)
+            low, high = coordinates.min(axis=0), coordinates.max(axis=0)
+            margin = np.maximum((high - low) * 0.08, 0.1)
+            self.ax.set_xlim(low[0] - margin[0], high[0] + margin[0])
+            self.ax.set_ylim(low[1] - margin[1], high[1] + margin[1])
 
-        # Determine labels to show based on show_edge_parameters flag
-        if self.show_edge_parameters:
-            visit_counts = {node: self.colony.visited_nodes.get(node, 0) for node in self.G.nodes()}
-            labels = {n: f"{visit_counts[n]}" for n in self.G.nodes()}
-        else:
-            labels = {n: n for n in self.G.nodes()}
+        self._drawn_graph = graph
+        self._drawn_version = None
 
-        node_labels = nx.draw_networkx_labels(self.G, self.pos, font_size=self.node_label_size, ax=self.ax,
-                                              font_color=self.node_label_color,
-                                              labels=labels)
+    def _node_coordinates(self, pos: dict[Any, Any], nodes: list[Any]) -> np.ndarray:
+        """
+        :param pos: positions of the nodes
+        :param nodes: node names
+        :return: coordinates of the nodes as an array with one row per node
+        """
+        return np.array([pos[node] for node in nodes], dtype=np.float64).reshape(-1, 2)
 
-        # If edge parameters are to be shown, draw edge weight and pheromone labels
-        if self.show_edge_parameters:
-            # Create labels for edge weights
-            weight_labels = {(tail, head): f"{data['weight']}" for tail, head, data in self.G.edges(data=True)}
-            edge_weight_labels = nx.draw_networkx_edge_labels(self.G, self.pos, edge_labels=weight_labels,
-                                                              font_color=self.edge_weight_label_color,
-                                                              label_pos=0.1, ax=self.ax)
-
-            # Create labels for edge pheromone levels
-            pheromone_labels = {(tail, head): f"{round(data['pheromone'], 1)}" for tail, head, data in
-                                self.G.edges(data=True)}
-            edge_pheromone_labels = nx.draw_networkx_edge_labels(self.G, self.pos, edge_labels=pheromone_labels,
-                                                                 font_color=self.edge_pheromone_label_color,
-                                                                 label_pos=0.3, ax=self.ax)
-
-            # Collect all artists (visual elements) to be drawn required for animations
-            artists = [nodes] + list(edges) + list(node_labels.values()) + list(edge_weight_labels.values()) + list(
-                edge_pheromone_labels.values())
-        else:
-            # Collect only the node and edge artists if edge parameters are not shown
-            artists = [nodes] + list(edges) + list(node_labels.values())
-
-        # If there are ants and ant animation is enabled, draw the ants on the graph
-        if len(self.colony.ants) > 0 and self.show_ant_animation:
-            ant_positions = [ant.current_node for ant in self.colony.ants]
-            current_node_artists = nx.draw_networkx_nodes(self.G, self.pos, nodelist=ant_positions, node_size=700,
-                                                          node_color=self.ant_animation_color, ax=self.ax)
-            artists.append(current_node_artists)
-
-            for ant in self.colony.ants:
-                if len(ant.path) > 1:
-                    path_coords = [(self.pos[ant.path[i]], self.pos[ant.path[i + 1]]) for i in
-                                   range(len(ant.path) - 1)]
-                    for coords in path_coords:
-                        path_line = self.ax.plot([coords[0][0], coords[1][0]], [coords[0][1], coords[1][1]],
-                                                 color=self.ant_animation_color,
-                                                 linestyle='-', linewidth=2)
-                        artists.extend(path_line)
+    def _snapshot_to_show(self) -> Optional[ColonySnapshot]:
+        """
+        Picks the snapshot for the next frame: the latest one of the colony or, with a replay interval,
+        the next published snapshot after the shown one, once the interval has passed.
 
-        try:
-            #if not self.colony.waves[0].ant_random_spawn:
-            current_node_artists = nx.draw_networkx_nodes(self.G, self.pos, ax=self.ax, node_size=700,
-                                                          nodelist=[self.colony.waves[0].ant_spawn_node],
-                                                          node_color=self.ant_animation_color)
-            artists.append(current_node_artists)
-        except:
-            pass
+        :return: a snapshot of the colony, None before the colony published one
+        """
 
-        self.textbox_logs.set_val(self.last_message)
+        latest = self.colony.snapshot
+        if latest is None or self.replay_interval <= 0:
+            return latest
 
-        return artists
+        shown = self._shown_snapshot
+        if shown is not None and shown.version > latest.version:
+            # the colony was replaced, e.g. by loading a config
+            shown = None
+        if shown is not None and time.monotonic() - self._shown_time < self.replay_interval:
+            return shown
 
-    def add_edge(self, tail: str, head: str, weight: float, tail_value: float = None, head_value: float = None):
+        history = list(self.colony.snapshot_history)
+        newer = [snapshot for snapshot in history if shown is None or snapshot.version > shown.version]
+        if newer:
+            shown = newer[0]
+        elif shown is None:
+            shown = latest
+        self._shown_snapshot = shown
+        self._shown_time = time.monotonic()
+        return shown
+
+    def update_plot(self, frame: int) -> list[Any]:
+        """
+        renders the latest snapshot of the colony by updating the artists in place
+        """
+
+        snapshot = self._snapshot_to_show()
+        if snapshot is None:
+            return self._artists
+        if self._drawn_graph is not snapshot.graph:
+            self._build_artists(snapshot)
+
+        options = (self.show_edge_parameters, self.show_ant_animation)
+        if snapshot.version != self._drawn_version or options != self._drawn_options:
+            self._update_artists(snapshot)
+            self._drawn_version = snapshot.version
+            self._drawn_options = options
+
+        # the spawn node can be changed in the text box at any time
+        spawn_node = self.colony.waves[0].ant_spawn_node
+        spawn_nodes = [spawn_node] if spawn_node in snapshot.pos else []
+        self._spawn_artist.set_offsets(self._node_coordinates(snapshot.pos, spawn_nodes))
+
+        if self.last_message != self._drawn_message:
+            self.textbox_logs.set_val(self.last_message)
+            self._drawn_message = self.last_message
+
+        return self._artists
+
+    def _update_artists(self, snapshot: ColonySnapshot):
+        """
+        updates colors, label texts and ants of the artists to a snapshot with the same topology
+
+        :param snapshot: a snapshot of the colony
+        """
+
+        pheromones = snapshot.pheromone
+        # Generate the colors for edges based on their pheromone levels
+        if len(pheromones) > 0:
+            edge_norm = mcolors.Normalize(vmin=snapshot.pheromone_min, vmax=snapshot.pheromone_max)
+            edge_colors = self.cmap_edges(edge_norm(pheromones))
+            for artist, color in zip(self._edge_artists, edge_colors):
+                artist.set_color(color)
+
+        # Determine labels to show based on show_edge_parameters flag
+        if self.show_edge_parameters:
+            for artist, visits in zip(self._node_label_artists, snapshot.visit_counts.tolist()):
+                artist.set_text(f"{visits}")
+            for artist, pheromone in zip(self._pheromone_label_artists, pheromones.tolist()):
+                artist.set_text(f"{round(pheromone, 1)}")
+        else:
+            for artist, name in zip(self._node_label_artists, self._node_names):
+                artist.set_text(f"{name}")
+        for artist in self._weight_label_artists + self._pheromone_label_artists:
+            artist.set_visible(self.show_edge_parameters)
+
+        # If ant animation is enabled, draw the current nodes and the paths of the ants
+        ant_paths = snapshot.ant_paths_by_name() if self.show_ant_animation else []
+        self._ant_artist.set_offsets(self._node_coordinates(snapshot.pos, [path[-1] for path in ant_paths]))
+        segments: list[np.ndarray] = []
+        for path in ant_paths:
+            coordinates = self._node_coordinates(snapshot.pos, path)
+            segments.extend(np.stack((coordinates[:-1], coordinates[1:]), axis=1))
+        self._ant_path_artist.set_segments(segments)
+
+    def add_edge(self, tail: str, head: str, weight: float, tail_value: Optional[float] = None,
+                 head_value: Optional[float] = None):
         """
         Adds an edge to the graph
 
@@ -731,13 +913,21 @@ class Plot:
         :param tail_value: a value for the tail node. node values define possible targets for the ants
         :param head_value: a value for the head node
         """
-        self.pos = GraphTools.add_edge(self.G, tail, head, weight, tail_value, head_value, self.pos)
+        with self.colony.graph_lock:
+            self.colony.sync_graph()
+            self.pos = GraphTools.add_edge(self.G, tail, head, weight, tail_value, head_value, self.pos)
+            self.colony.pos = self.pos
+            self.colony.update_graph()
 
-    def delete_edge(self, tail, head):
+    def delete_edge(self, tail: str, head: str):
         """
         Deletes an edge from the graph
 
         :param tail: outgoing node
         :param head: incoming node
         """
-        self.pos = GraphTools.delete_edge(self.G, tail, head, self.pos)
+        with self.colony.graph_lock:
+            self.colony.sync_graph()
+            self.pos = GraphTools.delete_edge(self.G, tail, head, self.pos)
+            self.colony.pos = self.pos
+            self.colony.update_graph()
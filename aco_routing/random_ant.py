@@ -1,6 +1,10 @@
-import networkx as nx
-import random
-from typing import List
+from typing import List, Optional, Set
+
+import numpy as np
+
+import jit_kernels
+from compiled_graph import CompiledGraph
+from wave_config import WaveConfig
 
 
 class RandomAnt:
@@ -8,92 +12,95 @@ class RandomAnt:
     a basic ant with primitive edge choosing but with a lot of methods for inheriting specialized ant types
     """
 
-    G: nx.DiGraph           # the graph, on which the ant is walking
-    start_node: str         # start node on the graph
-    current_node: str       # current node
+    graph: CompiledGraph    # the graph, on which the ant is walking
+    start_node: int         # id of the start node on the graph
+    current_node: int       # id of the current node
 
     alpha: float            # how much influence trail has
     beta: float             # how much influence attractiveness has
 
     success: bool           # does the ant put pheromones on its way
 
+    rng: np.random.Generator  # random number stream of this ant
+
     max_steps: int          # how many steps can the ant do before giving up
-    path: List[str] = []    # Path taken by the ant so far
+    path: List[int] = []    # Path (node ids) taken by the ant so far
+    visited: Set[int]       # nodes of the path for constant time membership tests
     path_cost: float = 0.0  # Cost of the path taken by the ant so far
 
-    def __init__(self, G: nx.DiGraph, wave):
+    # kind of the compiled kernel for these ants, every class sets its own, see jit_kernels.kernel_kind()
+    jit_kind: Optional[int] = jit_kernels.RANDOM
+
+    def __init__(self, graph: CompiledGraph, wave: WaveConfig, rng: Optional[np.random.Generator] = None):
         # set Parameters
-        self.G = G
+        self.graph = graph
+        self.rng = rng if rng is not None else np.random.default_rng()
         self.alpha = wave.alpha
         self.beta = wave.beta
         self.max_steps = wave.ant_max_steps
-        self.start_node = wave.ant_spawn_node
+        self.start_node = graph.node_index[wave.ant_spawn_node]
         self.random_chance = wave.random_chance
         self.stop_on_success = wave.stop_on_success
         self.put_pheromones_always = wave.put_pheromones_always
 
         # Spawn
-        self.current_node = wave.ant_spawn_node
+        self.current_node = self.start_node
         self.path = []
-        self.path.append(wave.ant_spawn_node)
+        self.path.append(self.start_node)
+        self.visited = {self.start_node}
         self.success = False
 
-    def _value_for_node(self, target_node: str) -> float:
+    def _value_for_edge(self, edge: int) -> float:
         """
-        calculates a value for the edge to the node based on pheromones and weight
+        calculates a value for an edge based on pheromones and weight
 
         Parameters:
-        target_node     target node to find the edge between current node and target node
+        edge            id of an outgoing edge of the current node
 
         Returns:
         the value
         """
 
-        data = self.G[self.current_node][target_node]
-        alpha = self.alpha          # relevance exponent for pheromones
-        beta = self.beta            # relevance exponent for edge cost
-        tau = data["pheromone"]     # pheromones
-        eta = data["weight"]        # edge cost
+        alpha = self.alpha                  # relevance exponent for pheromones
+        beta = self.beta                    # relevance exponent for edge cost
+        tau = self.graph.pheromone[edge]    # pheromones
+        heuristic = self.graph.heuristic(beta)[edge]    # 1 / (edge cost ** beta)
 
-        return (tau ** alpha) / (eta ** beta)
+        return (tau ** alpha) * heuristic
 
-    def _pick_a_new_node(self) -> str:
+    def _pick_a_new_node(self) -> int:
         """
         Pick a new node randomly
 
-        :return: a new node as str or the current node as str if trapped
+        :return: a new node id or the current node id if trapped
         """
 
-        all_neighbors = self._get_all_neighbors()
-        if len(all_neighbors) > 0:
-            return random.choices(all_neighbors)[0]
+        start, stop = self.graph.edge_range(self.current_node)
+        if stop > start:
+            return int(self.graph.indices[start + self.rng.integers(stop - start)])
 
         # Fallback if trapped
         return self.current_node
 
-    def _get_all_neighbors(self) -> List[str]:
+    def _get_all_neighbors(self) -> List[int]:
         """
         Finds all neighbors, which are connected to the current node
 
-        :return: all neighbors as List[str]
+        :return: all neighbor ids as List[int]
         """
 
-        possible_edges = self.G.edges([self.current_node], data=True)
-        all_neighbors = []
-        for current_node, possible_target, data in possible_edges:
-            all_neighbors.append(possible_target)
-        return all_neighbors
+        return self.graph.neighbors(self.current_node).tolist()
 
-    def _get_unvisited_neighbors(self) -> List[str]:
+    def _get_unvisited_neighbors(self) -> List[int]:
         """
         Finds all unvisited neighbors, which are connected to the current node
 
-        :return: all unvisited neighbors as List[str]
+        :return: all unvisited neighbor ids as List[int]
         """
 
-        unvisited_neighbors = []
+        unvisited_neighbors: List[int] = []
         for node in self._get_all_neighbors():
-            if node not in self.path:
+            if node not in self.visited:
                 unvisited_neighbors.append(node)
         return unvisited_neighbors
 
@@ -104,12 +111,12 @@ class RandomAnt:
         :return: True or False
         """
 
-        if self.G.nodes[self.current_node]['value'] > 0:
+        if self.graph.value[self.current_node] > 0:
             self.success = True
             return True
         return False
 
-    def _increase_pheromone_always(self, new_node):
+    def _increase_pheromone_always(self, new_node: int):
         """
         if the ant shall increase pheromones always, this is a method to put pheromones on th visited edge after every step
 
@@ -118,14 +125,14 @@ class RandomAnt:
         """
 
         # Check if both nodes and the edge between them exist
-        if new_node in self.G[self.current_node]:
-            current_pheromones = self.G[self.current_node][new_node]['pheromone']
-            self.G[self.current_node][new_node].update({'pheromone': current_pheromones + 1})
+        edge = self.graph.edge_id(self.current_node, new_node)
+        if edge >= 0:
+            self.graph.deposit(edge, 1)
         else:
             # Error when the node or edge does not exist
-            print(f"No such edge: {self.current_node} -> {new_node}")
+            print(f"No such edge: {self.graph.nodes[self.current_node]} -> {self.graph.nodes[new_node]}")
 
-    def _increase_pheromone(self, new_node):
+    def _increase_pheromone(self, new_node: int):
         self._increase_pheromone_always(new_node)
 
     def step(self) -> int:
@@ -144,6 +151,7 @@ class RandomAnt:
             
             # step to that node
             self.path.append(new_node)
+            self.visited.add(new_node)
             self.current_node = new_node
                 
             # check, if it is a success node
@@ -1,27 +1,78 @@
-import random
+from typing import Optional
+
+import jit_kernels
 import random_ant
 import numpy as np
 
+from compiled_graph import CompiledGraph
+from transition_cache import TransitionCache
+from wave_config import WaveConfig
+
 
 class RoutingAnt(random_ant.RandomAnt):
     """
     The traditional routing ant
     """
 
-    def _get_all_unvisited_nodes_value(self) -> tuple[
-        np.ndarray[np.dtype[float], np.dtype[float]], np.ndarray[np.dtype[str], np.dtype[str]]]:
-        possible_edges = self.G.edges([self.current_node], data=True)
-        target_nodes = np.array([])
-        node_values = np.array([])
-        for current_node, possible_target, data in possible_edges:
-            if possible_target not in self.path:
-                target_nodes = np.append(target_nodes, possible_target)
+    # buffers for the outgoing edges of the current node, allocated once per ant with the maximum out degree
+    _candidate_values: np.ndarray       # value of every edge, 0 for edges to visited nodes
+    _candidate_unvisited: np.ndarray    # True for every edge to an unvisited node
+    _candidate_buffer: np.ndarray       # intermediate results and probabilities
+    _candidate_cumulative: np.ndarray   # cumulative probabilities for the draw
+    _heads: memoryview                  # head of every edge, read as Python ints without a copy of the slice
+    _unvisited_flags: memoryview        # _candidate_unvisited, written with Python bools
+
+    transitions: TransitionCache        # cached edge values and distributions of the graph for alpha and beta
+
+    jit_kind = jit_kernels.ROUTING
+
+    def __init__(self, graph: CompiledGraph, wave: WaveConfig, rng: Optional[np.random.Generator] = None):
+        super().__init__(graph, wave, rng)
+
+        self.transitions = graph.transitions(self.alpha, self.beta)
+
+        self._candidate_values = np.empty(graph.max_degree)
+        self._candidate_unvisited = np.empty(graph.max_degree, dtype=bool)
+        self._candidate_buffer = np.empty(graph.max_degree)
+        self._candidate_cumulative = np.empty(graph.max_degree)
+        self._heads = graph.indices.data
+        self._unvisited_flags = self._candidate_unvisited.data
+
+    def _evaluate_candidates(self) -> tuple[int, int]:
+        """
+        Calculates the values of all outgoing edges of the current node into the candidate buffers.
+        Edges to visited nodes get the value 0 and are marked in _candidate_unvisited.
+
+        :return: first edge id and number of outgoing edges, the buffers are valid up to this number
+        """
+
+        # (tau ** alpha) / (eta ** beta) for the whole slice of edges, only recomputed after pheromone changes
+        start, stop = self.transitions.row(self.current_node)
+        degree = stop - start
+        values = self._candidate_values[:degree]
+        unvisited = self._candidate_unvisited[:degree]
+
+        # the membership tests run over the slice into the preallocated flags, no list per step
+        visited = self.visited
+        flags = self._unvisited_flags
+        for i, possible_target in enumerate(self._heads[start:stop]):
+            flags[i] = possible_target not in visited
+        np.multiply(self.transitions.values[start:stop], unvisited, out=values)
+        return start, degree
+
+    def _choose(self, weights: np.ndarray) -> int:
+        """
+        picks an index with a probability proportional to the weights with one cumulative sum and one draw
+
+        :param weights: non-negative weights with a positive sum
+        :return: the picked index
+        """
 
-                node_value = self._value_for_node(possible_target)
-                node_values = np.append(node_values, node_value)
-        return node_values, target_nodes
+        cumulative = np.cumsum(weights, out=self._candidate_cumulative[:len(weights)])
+        i = int(np.searchsorted(cumulative, self.rng.random() * cumulative[-1], side='right'))
+        return min(i, len(weights) - 1)
 
-    def _pick_a_new_node(self) -> str:
+    def _pick_a_new_node(self) -> int:
         """
         changes the way of picking a new node compared to the random ant.
         This s the traditional routing ant.
@@ -30,15 +81,19 @@ class RoutingAnt(random_ant.RandomAnt):
         """
 
         # random by chance
-        if random.random() < self.random_chance:
+        if self.rng.random() < self.random_chance:
             return super()._pick_a_new_node()
 
         # pheromone sensitive behaviour, if pheromones on its way
-        node_values, target_nodes = self._get_all_unvisited_nodes_value()
-        sum_node_values = np.sum(node_values)
-        if (sum_node_values > 0):
-            node_probabilities = (node_values / sum_node_values)
-            return random.choices(target_nodes, weights=node_probabilities, k=1)[0]
+        start, degree = self._evaluate_candidates()
+        node_values = self._candidate_values[:degree]
+        if self._candidate_unvisited[:degree].all():
+            # no neighbor visited yet: the cached distribution of the node applies
+            if self.transitions.value_sums[self.current_node] > 0:
+                return int(self.graph.indices[start + self.transitions.sample_routing(self.current_node,
+                                                                                      self.rng.random())])
+        elif node_values.sum() > 0:
+            return int(self.graph.indices[start + self._choose(node_values)])
 
         # random otherwise
         return super()._pick_a_new_node()
@@ -54,8 +109,9 @@ class RoutingAnt(random_ant.RandomAnt):
         for i, current_node in enumerate(self.path):
             if i < len(self.path) - 1:
                 next_node = self.path[i + 1]
-                current_weight = self.G[current_node][next_node]['weight']
-                cost += current_weight
+                edge = self.graph.edge_id(current_node, next_node)
+                if edge >= 0:
+                    cost += self.graph.weight[edge]
         return cost
 
     def _increase_pheromone_on_success(self):
@@ -72,10 +128,11 @@ class RoutingAnt(random_ant.RandomAnt):
                 if i < len(self.path) - 1:
                     next_node = self.path[i + 1]
 
-                    current_pheromones = self.G[current_node][next_node]['pheromone']
-                    self.G[current_node][next_node].update({'pheromone': current_pheromones + pheromones_to_put})
+                    edge = self.graph.edge_id(current_node, next_node)
+                    if edge >= 0:
+                        self.graph.deposit(edge, pheromones_to_put)
 
-    def _increase_pheromone(self, new_node):
+    def _increase_pheromone(self, new_node: int):
         # when value node arrived: mark current path
         if self.put_pheromones_always:
             super()._increase_pheromone_always(new_node)
@@ -0,0 +1,73 @@
+import time
+from typing import Any
+
+import numpy as np
+
+from compiled_graph import CompiledGraph
+
+
+class ColonySnapshot:
+    """
+    A state of the colony, which is not changed anymore after it was published.
+    The colony thread publishes a new snapshot at a fixed rate by replacing its reference, the plot only reads the
+    latest snapshot and never touches G, the arrays or the ants, which are changed while running.
+    """
+
+    version: int                    # increasing number of the snapshot
+    created: float                  # time.monotonic() of the publication
+    graph: CompiledGraph            # topology, weights and node values, which are not changed after compiling
+    pos: dict[Any, Any]             # positions of the nodes of the graph
+    pheromone: np.ndarray           # read only copy of the pheromones for every edge of the graph
+    pheromone_min: float            # minimum pheromones on an edge
+    pheromone_max: float            # maximum pheromones on an edge
+    pheromone_total: float          # sum of all pheromones
+    pheromoned_edges: int           # number of edges with pheromones
+    ant_paths: list[np.ndarray]     # node ids of the paths of the stepping ants
+    visit_counts: np.ndarray        # read only copy of the visits on every node id of the graph
+    wave: int                       # number of the current wave
+    iteration: int                  # number of the current iteration
+
+    def __init__(self, version: int, graph: CompiledGraph, pos: dict[Any, Any], ant_paths: list[Any],
+                 visit_counts: np.ndarray, wave: int = 0, iteration: int = 0):
+        """
+        copies the changing state of the colony
+
+        :param version: increasing number of the snapshot
+        :param graph: the current compiled graph
+        :param pos: positions of the nodes at the time the graph was compiled
+        :param ant_paths: node ids of the paths of the stepping ants
+        :param visit_counts: visits on every node id of the graph
+        :param wave: number of the current wave
+        :param iteration: number of the current iteration
+        """
+
+        self.version = version
+        self.created = time.monotonic()
+        self.graph = graph
+        self.pos = pos
+        self.pheromone = graph.pheromone.copy()
+        self.pheromone.setflags(write=False)
+        self.pheromone_min = graph.pheromone_min
+        self.pheromone_max = graph.pheromone_max
+        self.pheromone_total = graph.pheromone_total
+        self.pheromoned_edges = graph.pheromoned_edges
+        self.ant_paths = [np.array(path, dtype=np.int64) for path in ant_paths]
+        self.visit_counts = visit_counts.copy()
+        self.visit_counts.setflags(write=False)
+        self.wave = wave
+        self.iteration = iteration
+
+    def edges(self) -> list[tuple[Any, Any]]:
+        """
+        :return: (tail, head) node names for every edge id of the graph
+        """
+        nodes = self.graph.nodes
+        return [(nodes[tail], nodes[head]) for tail, head in zip(self.graph.sources.tolist(),
+                                                                 self.graph.indices.tolist())]
+
+    def ant_paths_by_name(self) -> list[list[Any]]:
+        """
+        :return: the paths of the stepping ants, each as a list of node names
+        """
+        nodes = self.graph.nodes
+        return [[nodes[node_id] for node_id in path.tolist()] for path in self.ant_paths]
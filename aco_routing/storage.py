@@ -0,0 +1,97 @@
+"""
+Storage backends for the large arrays of a colony: the pheromones and weights of the edges and the visits on
+the nodes. By default the arrays are kept in memory. With a MemmapStorage they are memory-mapped .npy files in a
+directory, the colony updates them in place and other processes (a viewer or an analysis job) can read them
+without copying while the colony is running, see open_arrays().
+"""
+
+import json
+import os
+from typing import Any
+
+import numpy as np
+
+
+class ArrayStorage:
+    """
+    keeps the arrays in memory
+    """
+
+    def array(self, name: str, values: np.ndarray) -> np.ndarray:
+        """
+        :param name: name of the array, e.g. 'pheromone'
+        :param values: initial values of the array
+        :return: the array, which holds the values
+        """
+        return values
+
+    def write_nodes(self, nodes: list[Any]):
+        """
+        :param nodes: node names of the compiled graph, the index of a name is its node id
+        """
+        pass
+
+    def flush(self):
+        """
+        writes changed arrays to their files
+        """
+        pass
+
+
+class MemmapStorage(ArrayStorage):
+    """
+    keeps the arrays in memory-mapped .npy files in a directory.
+    A recompiled graph gets new files, which replace the old ones, readers have to open the arrays again
+    to see the new topology.
+    """
+
+    directory: str                  # directory of the .npy files
+    memmaps: dict[str, np.memmap[Any, Any]]  # name -> the memory-mapped array
+
+    def __init__(self, directory: str):
+        """
+        :param directory: directory for the files, created if it doesn't exist
+        """
+        self.directory = directory
+        self.memmaps = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def array(self, name: str, values: np.ndarray) -> np.ndarray:
+        path = os.path.join(self.directory, name + '.npy')
+        temporary_path = path + '.tmp'
+        memmap = np.lib.format.open_memmap(temporary_path, mode='w+', dtype=values.dtype, shape=values.shape)
+        memmap[...] = values
+        memmap.flush()
+        # replacing the file keeps the old file valid for readers, which still map it
+        os.replace(temporary_path, path)
+        self.memmaps[name] = memmap
+        # a plain array view on the mapped memory, so the hot path doesn't carry the memmap subclass
+        return np.asarray(memmap)
+
+    def write_nodes(self, nodes: list[Any]):
+        path = os.path.join(self.directory, 'nodes.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump(nodes, f)
+        os.replace(path + '.tmp', path)
+
+    def flush(self):
+        for memmap in self.memmaps.values():
+            memmap.flush()
+
+
+def open_arrays(directory: str) -> tuple[list[Any], dict[str, np.ndarray]]:
+    """
+    Opens the arrays of a MemmapStorage read only and without copying, e.g. from another process.
+    The values change, while the colony is running.
+
+    :param directory: directory of the storage
+    :return: the node names and a dict name -> array, e.g. 'pheromone', 'weight', 'indptr', 'indices', 'visits'
+    """
+
+    with open(os.path.join(directory, 'nodes.json')) as f:
+        nodes = json.load(f)
+    arrays: dict[str, np.ndarray] = {}
+    for file_name in os.listdir(directory):
+        if file_name.endswith('.npy'):
+            arrays[file_name[:-len('.npy')]] = np.load(os.path.join(directory, file_name), mmap_mode='r')
+    return nodes, arrays
@@ -0,0 +1,143 @@
+import argparse
+import csv
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Optional
+
+from headless import run_headless
+
+# names of WaveConfig attributes, which differ from the keys in the config file
+WAVE_CONFIG_KEYS = {
+    'ant_class': 'class',
+    'ant_random_spawn': 'random_spawn',
+    'ant_spawn_node': 'spawn_node'
+}
+
+
+def expand_ranges(ranges: dict[str, list[Any]]) -> list[dict[str, Any]]:
+    """
+    Builds all combinations of the given parameter values
+
+    :param ranges: WaveConfig field (or config file key) -> list of values
+    :return: a list of wave overrides with config file keys, one for each combination
+    """
+
+    keys = [WAVE_CONFIG_KEYS.get(key, key) for key in ranges]
+    return [dict(zip(keys, values)) for values in itertools.product(*ranges.values())]
+
+
+def run_setting(config_path: str, wave_overrides: dict[str, Any], repetition: int = 0, vectorized: bool = False,
+                seed: Optional[list[int]] = None) -> dict[str, Any]:
+    """
+    Runs one setting of a sweep headless, executed in a worker process
+
+    :param config_path: file path of the base config file
+    :param wave_overrides: wave parameters, which replace the values of all waves
+    :param repetition: number of the repetition of this setting
+    :param vectorized: step the ants of all waves together with array operations
+    :param seed: seed of the run
+    :return: one row of the result table
+    """
+
+    results = run_headless(config_path, wave_overrides=wave_overrides, vectorized=vectorized, seed=seed)
+
+    convergence = results['convergence']
+    pheromones = [edge['pheromone'] for edge in results['pheromones']]
+    row: dict[str, Any] = dict(wave_overrides)
+    row.update({
+        'repetition': repetition,
+        'seed': results['seed'],
+        'iterations': len(convergence),
+        'pheromoned_edges': convergence[-1]['pheromoned_edges'] if convergence else 0,
+        'total_edges': len(pheromones),
+        'total_pheromone': sum(pheromones),
+        'visited_nodes': len(results['visited_nodes']),
+        'total_visits': sum(results['visited_nodes'].values()),
+        'runtime': results['runtime']
+    })
+    return row
+
+
+def run_sweep(config_path: str, ranges: dict[str, list[Any]], repetitions: int = 1, processes: Optional[int] = None,
+              output_path: Optional[str] = None, vectorized: bool = False,
+              seed: Optional[int] = None) -> list[dict[str, Any]]:
+    """
+    Runs every combination of the parameter ranges on a base configuration in a pool of processes
+
+    :param config_path: file path of the base config file
+    :param ranges: WaveConfig field (or config file key) -> list of values
+    :param repetitions: number of independent runs per combination
+    :param processes: number of worker processes, all cores if None
+    :param output_path: file path for the result table as CSV, nothing is written if None
+    :param vectorized: step the ants of all waves together with array operations
+    :param seed: seed of the sweep, every run gets [seed, run number] as its seed. Fresh entropy for every run if None
+    :return: the result table, one dict per run
+    """
+
+    settings = [(overrides, repetition) for overrides in expand_ranges(ranges) for repetition in range(repetitions)]
+    seeds = [None if seed is None else [seed, i] for i in range(len(settings))]
+
+    with ProcessPoolExecutor(max_workers=processes or os.cpu_count()) as executor:
+        rows = list(executor.map(run_setting,
+                                 itertools.repeat(config_path),
+                                 [overrides for overrides, _ in settings],
+                                 [repetition for _, repetition in settings],
+                                 itertools.repeat(vectorized),
+                                 seeds))
+
+    if output_path and rows:
+        with open(output_path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+            writer.writeheader()
+            writer.writerows(rows)
+
+    return rows
+
+
+def parse_range(text: str) -> tuple[str, list[Any]]:
+    """
+    parses a parameter range of the command line, e.g. "alpha=0.5,0.7,0.9" or "class=routing,minority"
+
+    :param text: name=value1,value2,...
+    :return: name and list of values
+    """
+
+    name, values = text.split('=', 1)
+    parsed: list[Any] = []
+    for value in values.split(','):
+        try:
+            parsed.append(json.loads(value))
+        except json.JSONDecodeError:
+            parsed.append(value)
+    return name, parsed
+
+
+def main():
+    """
+    Command line entry point for parameter sweeps
+    """
+
+    parser = argparse.ArgumentParser(description='Runs a parameter sweep over a base configuration')
+    parser.add_argument('config', help='path to the base config file')
+    parser.add_argument('-s', '--set', action='append', default=[], metavar='NAME=V1,V2,...',
+                        help='values for a wave parameter, can be given multiple times')
+    parser.add_argument('-r', '--repetitions', type=int, default=1, help='runs per combination')
+    parser.add_argument('-j', '--processes', type=int, default=None, help='worker processes, default: all cores')
+    parser.add_argument('-o', '--output', help='path for the result table, default: <config>_sweep.csv')
+    parser.add_argument('--vectorized', action='store_true', help='step the ants of all waves together')
+    parser.add_argument('--seed', type=int, default=None, help='seed for a reproducible sweep')
+    args = parser.parse_args()
+
+    ranges = dict(parse_range(text) for text in args.set)
+    output_path = args.output
+    if output_path is None:
+        output_path = os.path.splitext(args.config)[0] + '_sweep.csv'
+
+    rows = run_sweep(args.config, ranges, args.repetitions, args.processes, output_path, args.vectorized, args.seed)
+    print(f"{len(rows)} runs written to {output_path}")
+
+
+if __name__ == '__main__':
+    main()
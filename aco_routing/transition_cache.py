@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    # only for the annotations, compiled_graph imports this module
+    from compiled_graph import CompiledGraph
+
+
+class TransitionCache:
+    """
+    Caches the values (tau ** alpha) / (eta ** beta) of the outgoing edges of every node for a fixed alpha and beta,
+    together with the cumulative routing and minority distributions over all outgoing edges.
+    A row (all outgoing edges of a node) is computed on first use and only recomputed after the pheromones
+    on one of its edges have changed by a deposit, see CompiledGraph.deposit().
+    """
+
+    graph: CompiledGraph            # the compiled graph of the cached values
+    alpha: float                    # relevance exponent for pheromones
+    beta: float                     # relevance exponent for edge cost
+
+    heuristic: np.ndarray           # 1 / (eta ** beta) for every edge
+    values: np.ndarray              # value for every edge
+    routing_cumulative: np.ndarray  # normalized cumulative routing probabilities along the edges of every node
+    minority_cumulative: np.ndarray  # normalized cumulative minority probabilities along the edges of every node
+    value_sums: np.ndarray          # sum of the values of the outgoing edges of every node
+    minority_sums: np.ndarray       # sum of the minority probabilities 1 - value / value_sum of every node
+    valid: np.ndarray               # if the row of the node is up to date
+
+    def __init__(self, graph: CompiledGraph, alpha: float, beta: float):
+        """
+        :param graph: the compiled graph
+        :param alpha: relevance exponent for pheromones
+        :param beta: relevance exponent for edge cost
+        """
+        self.graph = graph
+        self.alpha = alpha
+        self.beta = beta
+        self.heuristic = graph.heuristic(beta)
+
+        self.values = np.zeros(graph.edge_count)
+        self.routing_cumulative = np.zeros(graph.edge_count)
+        self.minority_cumulative = np.zeros(graph.edge_count)
+        self.value_sums = np.zeros(graph.node_count)
+        self.minority_sums = np.zeros(graph.node_count)
+        self.valid = np.zeros(graph.node_count, dtype=bool)
+
+    def invalidate(self, node: int):
+        """
+        marks the row of a node as outdated
+
+        :param node: a node id
+        """
+        self.valid[node] = False
+
+    def invalidate_edges(self, edges: np.ndarray):
+        """
+        marks the rows of the tails of edges as outdated
+
+        :param edges: edge ids
+        """
+        self.valid[self.graph.sources[edges]] = False
+
+    def invalidate_all(self):
+        """
+        marks all rows as outdated
+        """
+        self.valid.fill(False)
+
+    def row(self, node: int) -> tuple[int, int]:
+        """
+        Brings the row of a node up to date
+
+        :param node: a node id
+        :return: first and last + 1 edge id of the row
+        """
+        start, stop = self.graph.edge_range(node)
+        if not self.valid[node]:
+            self._compute_row(node, start, stop)
+        return start, stop
+
+    def _compute_row(self, node: int, start: int, stop: int):
+        """
+        computes values and distributions of one row
+
+        :param node: a node id
+        :param start: first edge id of the node
+        :param stop: last + 1 edge id of the node
+        """
+        values = self.values[start:stop]
+        np.power(self.graph.pheromone[start:stop], self.alpha, out=values)
+        np.multiply(values, self.heuristic[start:stop], out=values)
+
+        value_sum = values.sum()
+        self.value_sums[node] = value_sum
+        self._fill_cumulative(self.routing_cumulative[start:stop], values, value_sum)
+
+        if value_sum > 0:
+            minority = 1 - values / value_sum
+        else:
+            minority = np.zeros(stop - start)
+        self.minority_sums[node] = minority.sum()
+        self._fill_cumulative(self.minority_cumulative[start:stop], minority, self.minority_sums[node])
+
+        self.valid[node] = True
+
+    @staticmethod
+    def _fill_cumulative(out: np.ndarray, weights: np.ndarray, weight_sum: float):
+        """
+        writes the normalized cumulative sum of weights to out, zeros if the sum is 0
+        """
+        if weight_sum > 0:
+            np.cumsum(weights, out=out)
+            out /= out[-1]
+        else:
+            out.fill(0.0)
+
+    def update_rows(self, nodes: np.ndarray):
+        """
+        Brings the rows of many nodes up to date at once, used by the ant batches
+
+        :param nodes: node ids, may contain duplicates
+        """
+        outdated = np.unique(nodes[~self.valid[nodes]])
+        if len(outdated) == 0:
+            return
+
+        edges = self.graph.padded_edges(outdated)
+        exists = edges >= 0
+        safe_edges = np.where(exists, edges, 0)
+        values = np.where(exists, (self.graph.pheromone[safe_edges] ** self.alpha) * self.heuristic[safe_edges], 0.0)
+
+        value_sums = values.sum(axis=1)
+        pheromoned = value_sums > 0
+        safe_sums = np.where(pheromoned, value_sums, 1.0)
+        minority = np.where(exists & pheromoned[:, None], 1 - values / safe_sums[:, None], 0.0)
+        minority_sums = minority.sum(axis=1)
+        safe_minority_sums = np.where(minority_sums > 0, minority_sums, 1.0)
+
+        self.values[edges[exists]] = values[exists]
+        self.routing_cumulative[edges[exists]] = (np.cumsum(values, axis=1) / safe_sums[:, None])[exists]
+        self.minority_cumulative[edges[exists]] = \
+            (np.cumsum(minority, axis=1) / safe_minority_sums[:, None])[exists]
+        self.value_sums[outdated] = value_sums
+        self.minority_sums[outdated] = minority_sums
+        self.valid[outdated] = True
+
+    def scale(self, factor: float):
+        """
+        Follows a multiplication of all pheromones with factor ** (1 / alpha), like the evaporation.
+        The values of a row are scaled equally, so the normalized distributions stay the same.
+
+        :param factor: factor for all values
+        """
+        self.values *= factor
+        self.value_sums *= factor
+
+    def sample_routing(self, node: int, draw: float) -> int:
+        """
+        picks an outgoing edge of a valid row by the cached routing distribution
+
+        :param node: a node id with value_sums[node] > 0
+        :param draw: a uniform random number in [0, 1)
+        :return: index of the edge within the row
+        """
+        start, stop = self.graph.edge_range(node)
+        i = int(np.searchsorted(self.routing_cumulative[start:stop], draw, side='right'))
+        return min(i, stop - start - 1)
+
+    def sample_minority(self, node: int, draw: float) -> int:
+        """
+        picks an outgoing edge of a valid row by the cached minority distribution
+
+        :param node: a node id with minority_sums[node] > 0
+        :param draw: a uniform random number in [0, 1)
+        :return: index of the edge within the row
+        """
+        start, stop = self.graph.edge_range(node)
+        i = int(np.searchsorted(self.minority_cumulative[start:stop], draw, side='right'))
+        return min(i, stop - start - 1)
@@ -2,6 +2,10 @@
 Inspiration Source: https://github.com/hasnainroopawalla/Ant-Colony-Optimization/blob/master/aco_routing/aco.py
 '''
 
+from typing import Any, Optional
+
+ELITIST_DEPOSITS = ['best_so_far', 'iteration_best']
+
 
 class WaveConfig:
     """
@@ -35,7 +39,7 @@ class WaveConfig:
     # Search ants
     concurrent_ants: int = 2
 
-    # type of ant: random | routing | minority
+    # type of ant: random | routing | minority or another class registered in ant_registry
     ant_class: str = "routing"
 
     # if the ant puts pheromones on its way or just backwards once on success
@@ -53,7 +57,7 @@ class WaveConfig:
     wave_sleep: float = 0.5
 
     # change graph values for this wave
-    node_value_changes: dict
+    node_value_changes: dict[str, float]
 
     # remove edges
     remove_edges: list[list[str]]
@@ -61,7 +65,29 @@ class WaveConfig:
     # clear pheromones before start
     clear_pheromones: bool = False
 
-    def __init__(self, wave: dict):
+    # step all ants of an iteration together with array operations
+    vectorized: bool = False
+
+    # step all ants of an iteration with the compiled kernels, if numba is installed
+    jit: bool = False
+
+    # seed for the random numbers of this wave, derived from the seed of the run if None
+    seed: Optional[int] = None
+
+    # limits for the pheromones of every edge after each iteration (MAX-MIN ant system), no limit if None
+    tau_min: Optional[float] = None
+    tau_max: Optional[float] = None
+
+    # extra pheromones on the cheapest successful path after each iteration: best_so_far | iteration_best | None
+    elitist_deposit: Optional[str] = None
+
+    # factor for the elitist pheromones, relative to the pheromones of a successful routing ant on that path
+    elitist_weight: float = 1.0
+
+    # resets the pheromones, if the best path of the wave didn't improve for this number of iterations, never if None
+    restart_after: Optional[int] = None
+
+    def __init__(self, wave: dict[str, Any]):
         self.ant_class = wave.get('class', 'routing')
         self.ant_max_steps = wave.get('ant_max_steps', 20)
         self.max_iterations = wave.get('max_iterations', 15)
@@ -84,8 +110,20 @@ class WaveConfig:
         self.remove_edges = wave.get('remove_edges', [])
         
         self.clear_pheromones = wave.get('clear_pheromones', False)
-
-    def to_dict(self):
+        self.vectorized = wave.get('vectorized', False)
+        self.jit = wave.get('jit', False)
+        self.seed = wave.get('seed', None)
+
+        self.tau_min = wave.get('tau_min', None)
+        self.tau_max = wave.get('tau_max', None)
+        self.elitist_deposit = wave.get('elitist_deposit', None)
+        self.elitist_weight = wave.get('elitist_weight', 1.0)
+        self.restart_after = wave.get('restart_after', None)
+        if self.elitist_deposit is not None and self.elitist_deposit not in ELITIST_DEPOSITS:
+            raise ValueError(f"Unknown elitist deposit {self.elitist_deposit}, "
+                             f"use one of {', '.join(ELITIST_DEPOSITS)}")
+
+    def to_dict(self) -> dict[str, Any]:
         """
         Convert the wave configuration to a JSON-compatible dictionary.
         :return: A dictionary containing the wave configuration parameters
@@ -110,7 +148,15 @@ class WaveConfig:
             'wave_sleep': self.wave_sleep,
             'node_value_changes': self.node_value_changes,
             'remove_edges': self.remove_edges,
-            'clear_pheromones': self.clear_pheromones
+            'clear_pheromones': self.clear_pheromones,
+            'vectorized': self.vectorized,
+            'jit': self.jit,
+            'seed': self.seed,
+            'tau_min': self.tau_min,
+            'tau_max': self.tau_max,
+            'elitist_deposit': self.elitist_deposit,
+            'elitist_weight': self.elitist_weight,
+            'restart_after': self.restart_after
         }
 
 
@@ -0,0 +1,90 @@
+"""
+Compares the batches of ant_batch, which step all ants of an iteration with array operations, with the ant classes.
+The batches draw their random numbers differently, so only deterministic choices give the same paths, random
+choices have to follow the same distributions.
+"""
+
+from typing import Any, Callable
+
+import numpy as np
+import pytest
+
+import ant_registry
+from ant_batch import RandomAntBatch
+from compiled_graph import CompiledGraph
+from test_jit_kernels import (branch_graph, chi2_critical, expected_first_steps, make_wave, path_lengths, ring_graph,
+                              star_graph, walk_classes)
+from wave_config import WaveConfig
+
+
+def walk_batch(graph: CompiledGraph, wave: WaveConfig, ants: int, seed: int = 0) -> RandomAntBatch:
+    """
+    steps the ants with the batch class of the wave
+
+    :return: the batch
+    """
+    batch_class = ant_registry.get_ant_class(wave.ant_class).batch_class
+    batch = batch_class(graph, wave, [graph.node_index[wave.ant_spawn_node]] * ants, np.random.default_rng(seed))
+    for _ in range(wave.ant_max_steps):
+        batch.step()
+    return batch
+
+
+@pytest.mark.parametrize('make_graph, ant_class, options, expected_path', [
+    (branch_graph, 'routing', {}, [0, 1, 3, 4]),
+    (branch_graph, 'routing', {'put_pheromones_always': True}, [0, 1, 3, 4]),
+    (branch_graph, 'minority', {}, [0, 2, 3, 4]),
+    (branch_graph, 'minority', {'prioritize_pheromone_routes': True}, [0, 1, 3, 4]),
+    (ring_graph, 'random', {'put_pheromones_always': True}, [0, 1, 2, 3, 0]),
+    (ring_graph, 'routing', {}, [0, 1, 2, 3]),
+])
+def test_paths_match_classes(make_graph: Callable[[], CompiledGraph], ant_class: str, options: dict[str, Any],
+                             expected_path: list[int]):
+    # the choices are deterministic and visited nodes are not chosen again, so the paths have to be the same
+    class_graph, batch_graph = make_graph(), make_graph()
+    wave = make_wave(class_graph, ant_class, **options)
+    ants = walk_classes(class_graph, wave, 5)
+    batch = walk_batch(batch_graph, wave, 5)
+
+    for i, ant in enumerate(ants):
+        assert ant.path[:len(expected_path)] == expected_path
+        assert batch.path(i).tolist() == ant.path
+        assert bool(batch.success[i]) == ant.success
+    np.testing.assert_allclose(batch_graph.pheromone, class_graph.pheromone)
+
+
+@pytest.mark.parametrize('ant_class, options', [
+    ('random', {}),
+    ('routing', {}),
+    ('minority', {}),
+    ('minority', {'prioritize_pheromone_routes': True}),
+])
+def test_first_steps_follow_distribution(ant_class: str, options: dict[str, Any]):
+    ants = 4000
+    graph = star_graph()
+    wave = make_wave(graph, ant_class, ant_max_steps=1, random_chance=0.1, **options)
+    probabilities = expected_first_steps(graph, wave)
+
+    heads = walk_batch(star_graph(), wave, ants).paths[:, 1]
+    counts = np.bincount(heads - 1, minlength=len(probabilities))
+    expected = probabilities * ants
+    chi2 = ((counts - expected) ** 2 / expected).sum()
+    assert chi2 < chi2_critical(len(probabilities) - 1)
+
+
+@pytest.mark.parametrize('ant_class, options', [
+    ('random', {}),
+    ('routing', {}),
+    ('minority', {}),
+    ('minority', {'prioritize_pheromone_routes': True}),
+])
+def test_path_lengths_match_classes(ant_class: str, options: dict[str, Any]):
+    ants = 600
+    class_lengths = path_lengths(walk_classes, ant_class, options, ants)
+    batch_lengths = path_lengths(walk_batch, ant_class, options, ants)
+
+    # two sample Kolmogorov-Smirnov test at a level of 0.001
+    values = np.union1d(class_lengths, batch_lengths)
+    class_cdf = np.searchsorted(np.sort(class_lengths), values, side='right') / ants
+    batch_cdf = np.searchsorted(np.sort(batch_lengths), values, side='right') / ants
+    assert np.abs(class_cdf - batch_cdf).max() < 1.95 * np.sqrt(2 / ants)
@@ -0,0 +1,211 @@
+"""
+Compares the kernel of jit_kernels.JitAntBatch with the ant classes. The kernel runs compiled, if numba is
+installed, and as plain Python otherwise, the results have to be the same.
+"""
+
+from typing import Any, Callable
+
+import numpy as np
+import pytest
+
+import ant_registry
+import graph_generators
+import jit_kernels
+from ant_batch import RandomAntBatch
+from compiled_graph import CompiledGraph
+from random_ant import RandomAnt
+from routing_ant import RoutingAnt
+from wave_config import WaveConfig
+
+
+def branch_graph() -> CompiledGraph:
+    """
+    0 -> 1 -> 3 -> 4 and 0 -> 2 -> 3 -> 4 with edges back to the start. 4 is the success node.
+    Only 0 -> 2 has no pheromones, so routing ants walk over 1, minority ants over 2.
+    """
+    edges = [(0, 1, 1.0), (0, 2, 0.0), (1, 0, 1.0), (1, 3, 1.0), (2, 0, 1.0), (2, 3, 1.0), (3, 0, 1.0), (3, 4, 1.0)]
+    sources, targets, pheromone = (np.array(column) for column in zip(*edges))
+    return CompiledGraph.from_arrays(5, sources.astype(np.int64), targets.astype(np.int64),
+                                     pheromone=pheromone, value=np.array([0, 0, 0, 0, 1.0]))
+
+
+def ring_graph() -> CompiledGraph:
+    """
+    the ring 0 -> 1 -> 2 -> 3 -> 0, 3 is the success node
+    """
+    return CompiledGraph.from_arrays(4, np.arange(4), (np.arange(4) + 1) % 4, pheromone=np.ones(4),
+                                     value=np.array([0, 0, 0, 1.0]))
+
+
+def star_graph() -> CompiledGraph:
+    """
+    node 0 with 5 outgoing edges of different weights and pheromones, the first one is below 0.01
+    """
+    return CompiledGraph.from_arrays(6, np.zeros(5, dtype=np.int64), np.arange(1, 6),
+                                     weight=np.array([1.0, 2.0, 3.0, 1.0, 2.0]),
+                                     pheromone=np.array([0.005, 0.5, 1.0, 2.0, 4.0]))
+
+
+def torus_graph() -> CompiledGraph:
+    """
+    a 6 x 6 torus with random weights and pheromones and one success node
+    """
+    sources, targets, _ = graph_generators.torus_2d(6, 6)
+    rng = np.random.default_rng(1)
+    value = np.zeros(36)
+    value[21] = 1
+    return CompiledGraph.from_arrays(36, sources, targets, weight=rng.integers(1, 5, len(sources)).astype(float),
+                                     pheromone=rng.random(len(sources)) * 2, value=value)
+
+
+def make_wave(graph: CompiledGraph, ant_class: str, **options: Any) -> WaveConfig:
+    config: dict[str, Any] = {'class': ant_class, 'spawn_node': graph.nodes[0], 'alpha': 1.5, 'beta': 0.5,
+                              'random_chance': 0.0, 'ant_max_steps': 10}
+    config.update(options)
+    return WaveConfig(config)
+
+
+def walk_classes(graph: CompiledGraph, wave: WaveConfig, ants: int, seed: int = 0) -> list[RandomAnt]:
+    """
+    steps the ants of the class of the wave together like the runner, each with its own random numbers
+
+    :return: the ants
+    """
+    ant_class = ant_registry.get_ant_class(wave.ant_class).ant_class
+    all_ants = [ant_class(graph, wave, np.random.default_rng([seed, i])) for i in range(ants)]
+    stepping = list(all_ants)
+    for _ in range(wave.ant_max_steps):
+        stepping = [ant for ant in stepping if ant.step()]
+    return all_ants
+
+
+def walk_kernel(graph: CompiledGraph, wave: WaveConfig, ants: int, seed: int = 0) -> jit_kernels.JitAntBatch:
+    """
+    steps the ants with the kernel
+
+    :return: the batch
+    """
+    kind = jit_kernels.kernel_kind(ant_registry.get_ant_class(wave.ant_class).ant_class)
+    assert kind is not None
+    batch = jit_kernels.JitAntBatch(graph, wave, [graph.node_index[wave.ant_spawn_node]] * ants, kind,
+                                    np.random.default_rng(seed))
+    for _ in range(wave.ant_max_steps):
+        batch.step()
+    return batch
+
+
+@pytest.mark.parametrize('make_graph, ant_class, options, expected_path', [
+    (branch_graph, 'routing', {}, [0, 1, 3, 4]),
+    (branch_graph, 'routing', {'put_pheromones_always': True}, [0, 1, 3, 4]),
+    (branch_graph, 'minority', {}, [0, 2, 3, 4]),
+    (branch_graph, 'minority', {'prioritize_pheromone_routes': True}, [0, 1, 3, 4]),
+    (ring_graph, 'random', {'put_pheromones_always': True}, [0, 1, 2, 3, 0]),
+    (ring_graph, 'routing', {}, [0, 1, 2, 3]),
+])
+def test_deposits_match_classes(make_graph: Callable[[], CompiledGraph], ant_class: str, options: dict[str, Any],
+                                expected_path: list[int]):
+    # the choices are deterministic, so the paths and the pheromones have to be exactly the same
+    class_graph, kernel_graph = make_graph(), make_graph()
+    wave = make_wave(class_graph, ant_class, **options)
+    ants = walk_classes(class_graph, wave, 5)
+    batch = walk_kernel(kernel_graph, wave, 5)
+
+    for i, ant in enumerate(ants):
+        assert ant.path[:len(expected_path)] == expected_path
+        assert batch.path(i).tolist() == ant.path
+        assert bool(batch.success[i]) == ant.success
+    assert not np.array_equal(class_graph.pheromone, make_graph().pheromone)
+    np.testing.assert_array_equal(kernel_graph.pheromone, class_graph.pheromone)
+    assert kernel_graph.pheromone_total == pytest.approx(class_graph.pheromone_total)
+
+
+def expected_first_steps(graph: CompiledGraph, wave: WaveConfig) -> np.ndarray:
+    """
+    :return: the probabilities of the outgoing edges of the start node for the first step
+    """
+    start, stop = graph.edge_range(graph.node_index[wave.ant_spawn_node])
+    degree = stop - start
+    if wave.ant_class == 'random':
+        return np.full(degree, 1 / degree)
+
+    values = graph.pheromone[start:stop] ** wave.alpha * graph.heuristic(wave.beta)[start:stop]
+    if wave.ant_class == 'routing':
+        chosen = values / values.sum()
+    else:
+        candidates = values >= 0.01 if wave.prioritize_pheromone_routes else np.ones(degree, dtype=bool)
+        minority = np.where(candidates, 1 - values / values[candidates].sum(), 0.0)
+        chosen = minority / minority.sum()
+    return (1 - wave.random_chance) * chosen + wave.random_chance / degree
+
+
+def chi2_critical(freedom: int) -> float:
+    """
+    :return: the 0.999 quantile of the chi-square distribution (Wilson-Hilferty approximation)
+    """
+    return freedom * (1 - 2 / (9 * freedom) + 3.09 * np.sqrt(2 / (9 * freedom))) ** 3
+
+
+@pytest.mark.parametrize('ant_class, options', [
+    ('random', {}),
+    ('routing', {}),
+    ('minority', {}),
+    ('minority', {'prioritize_pheromone_routes': True}),
+])
+def test_first_steps_follow_distribution(ant_class: str, options: dict[str, Any]):
+    # every ant makes one independent choice, both implementations have to follow the expected probabilities
+    ants = 4000
+    graph = star_graph()
+    wave = make_wave(graph, ant_class, ant_max_steps=1, random_chance=0.1, **options)
+    probabilities = expected_first_steps(graph, wave)
+
+    class_heads = [ant.path[1] for ant in walk_classes(star_graph(), wave, ants)]
+    kernel_heads = walk_kernel(star_graph(), wave, ants).paths[:, 1]
+    for heads in (np.array(class_heads), kernel_heads):
+        counts = np.bincount(heads - 1, minlength=len(probabilities))
+        expected = probabilities * ants
+        chi2 = ((counts - expected) ** 2 / expected).sum()
+        assert chi2 < chi2_critical(len(probabilities) - 1)
+
+
+def path_lengths(walk: Callable[[CompiledGraph, WaveConfig, int, int], list[RandomAnt] | RandomAntBatch],
+                 ant_class: str, options: dict[str, Any], ants: int) -> np.ndarray:
+    """
+    walks every ant alone on a fresh torus, so the ants are independent and the pheromones of one ant don't
+    change the choices of the others
+
+    :return: the number of steps of every ant
+    """
+    lengths = np.zeros(ants, dtype=np.int64)
+    for i in range(ants):
+        graph = torus_graph()
+        wave = make_wave(graph, ant_class, ant_max_steps=25, random_chance=0.05, **options)
+        result = walk(graph, wave, 1, i)
+        lengths[i] = len(result[0].path) - 1 if isinstance(result, list) else result.path_lengths[0] - 1
+    return lengths
+
+
+@pytest.mark.parametrize('ant_class, options', [
+    ('random', {}),
+    ('routing', {}),
+    ('minority', {}),
+    ('minority', {'prioritize_pheromone_routes': True}),
+])
+def test_path_lengths_match_classes(ant_class: str, options: dict[str, Any]):
+    ants = 600
+    class_lengths = path_lengths(walk_classes, ant_class, options, ants)
+    kernel_lengths = path_lengths(walk_kernel, ant_class, options, ants)
+
+    # two sample Kolmogorov-Smirnov test at a level of 0.001
+    values = np.union1d(class_lengths, kernel_lengths)
+    class_cdf = np.searchsorted(np.sort(class_lengths), values, side='right') / ants
+    kernel_cdf = np.searchsorted(np.sort(kernel_lengths), values, side='right') / ants
+    assert np.abs(class_cdf - kernel_cdf).max() < 1.95 * np.sqrt(2 / ants)
+
+
+def test_subclasses_have_no_kernel():
+    # a registered subclass may change the choices, it is only stepped by a kernel, if it sets jit_kind itself
+    class CautiousAnt(RoutingAnt):
+        pass
+
+    assert jit_kernels.kernel_kind(RoutingAnt) == jit_kernels.ROUTING
+    assert jit_kernels.kernel_kind(CautiousAnt) is None